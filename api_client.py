@@ -0,0 +1,46 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds; long-running work goes through jobs,
+# so a slow response means the backend is in trouble, not busy
+DEFAULT_TIMEOUT = (3.05, 30)
+
+# Connections kept alive to the backend, shared by all Dash worker threads
+POOL_SIZE = 20
+
+# Idempotent requests are retried on connection errors and gateway failures
+RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+
+# Thin wrapper over one requests.Session: keep-alive connection pooling,
+# default timeouts and retries for every call the Dash app makes
+class BackendClient:
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, retries=RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        retry = Retry(total=retries, backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=RETRY_METHODS, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.base_url + path, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
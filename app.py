@@ -1,18 +1,48 @@
 import dash
 from dash import html, dcc, Output, Input, State, no_update, dash_table
 import dash_bootstrap_components as dbc
-import requests
-import pandas as pd
+import plotly.graph_objects as go
+import math
+import flask
+
+from api_client import BackendClient
+from encoding import accept_header, columns_to_records, decode_table
 
 # Initialize the Dash app
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY],
+                suppress_callback_exceptions=True)  # dataset-table is created by a callback
+
+# Rows shown per page of the preview table
+PAGE_SIZE = 10
 
 # Define the FastAPI backend URL
 API_URL = "http://localhost:8000"
 
+# Pooled, keep-alive connection to the backend shared by every callback
+backend = BackendClient(API_URL)
+
+# Chart types served by the /visualize endpoint
+CHART_KINDS = {'histogram': 'Histogram', 'density': 'Density', 'groupby': 'Group By', 'line': 'Line'}
+
+# Bins per axis and points per line requested for the visible range
+HISTOGRAM_BINS = 60
+DENSITY_BINS = 100
+LINE_POINTS = 1500
+
+def empty_figure(message=""):
+    figure = go.Figure()
+    figure.update_layout(template='plotly_dark', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                         xaxis={'visible': False}, yaxis={'visible': False},
+                         annotations=[{'text': message, 'showarrow': False, 'font': {'size': 16}}] if message else [])
+    return figure
+
 # Define the layout
 app.layout = dbc.Container([
-    dcc.Store(id='uploaded-data-store'),  # Add this for data persistence
+    dcc.Store(id='uploaded-data-store'),  # Set by assets/chunked_upload.js once a file is stored
+    dcc.Store(id='profile-job-store'),
+    dcc.Interval(id='profile-poll', interval=1000, disabled=True),
+    dcc.Store(id='quality-job-store'),
+    dcc.Interval(id='quality-poll', interval=1000, disabled=True),
     dbc.Row(
         dbc.Col(
             dbc.Tabs(
@@ -20,7 +50,8 @@ app.layout = dbc.Container([
                     dbc.Tab(label="Home", tab_id="home", children=[
                         dbc.Card(dbc.CardBody([
                             html.H4("Upload Dataset", className="mb-3"),
-                            dcc.Upload(
+                            # Files are streamed to the backend in parts by assets/chunked_upload.js
+                            html.Div(
                                 id='upload-dataset',
                                 children=html.Div([
                                     'Drag and Drop or ',
@@ -38,25 +69,76 @@ app.layout = dbc.Container([
                                     'transition': 'all 0.3s ease',
                                 },
                                 className='upload-box',
-                                multiple=False,
+                                **{'data-api-url': API_URL}
                             ),
+                            dbc.Progress(id='upload-progress', value=0, striped=True, animated=True,
+                                         className='mt-2', style={'display': 'none'}),
                             html.Div(id='upload-status'),
                             html.Hr(),
                             #html.H5("Dataset Preview", id="dataset-title"),
-                            # Just one loading spinner for the dataset display
-                            dcc.Loading(
-                                id="loading-dataset",
-                                type="circle", 
-                                color = "gray",
-                                children=[html.Div(id='dataset-display')],
-                            ),
+                            # Filled in by polling the backend profiling job
+                            html.Div(id='dataset-display'),
                         ]), className="mt-3")
                     ]),
                     dbc.Tab(label="Benchmark", tab_id="benchmark", children=[
-                        dbc.Card(dbc.CardBody("Benchmark content goes here."), className="mt-3")
+                        dbc.Card(dbc.CardBody([
+                            html.H4("Benchmark Models", className="mb-3"),
+                            dbc.Row([
+                                dbc.Col([
+                                    dbc.Label("Dataset"),
+                                    dcc.Dropdown(id='benchmark-dataset', placeholder="Select a dataset")
+                                ], md=5),
+                                dbc.Col([
+                                    dbc.Label("Target Column"),
+                                    dcc.Dropdown(id='benchmark-target', placeholder="Select the label column")
+                                ], md=5),
+                                dbc.Col([
+                                    dbc.Label("Folds"),
+                                    dbc.Input(id='benchmark-folds', type='number', min=2, max=20, step=1, value=5)
+                                ], md=2),
+                            ], className="mb-3"),
+                            dbc.Label("Models"),
+                            dbc.Checklist(id='benchmark-models', value=['random_forest', 'svm'], inline=True),
+                            dbc.Button("Run Benchmark", id='benchmark-run', color="primary", className="mt-3"),
+                            dcc.Store(id='benchmark-job-store'),
+                            dcc.Interval(id='benchmark-poll', interval=1000, disabled=True),
+                            html.Div(id='benchmark-results', className="mt-3"),
+                        ]), className="mt-3")
                     ]),
                     dbc.Tab(label="Visualize", tab_id="visualize", children=[
-                        dbc.Card(dbc.CardBody("Visualization content goes here."), className="mt-3")
+                        dbc.Card(dbc.CardBody([
+                            html.H4("Visualize Dataset", className="mb-3"),
+                            dbc.Row([
+                                dbc.Col([
+                                    dbc.Label("Dataset"),
+                                    dcc.Dropdown(id='viz-dataset', placeholder="Select a dataset")
+                                ], md=3),
+                                dbc.Col([
+                                    dbc.Label("Chart"),
+                                    dcc.Dropdown(id='viz-kind', value='histogram', clearable=False, options=[
+                                        {'label': label, 'value': kind} for kind, label in CHART_KINDS.items()
+                                    ])
+                                ], md=2),
+                                dbc.Col([
+                                    dbc.Label("X Column"),
+                                    dcc.Dropdown(id='viz-x', placeholder="Select a column")
+                                ], md=3),
+                                dbc.Col([
+                                    dbc.Label("Y Column"),
+                                    dcc.Dropdown(id='viz-y', placeholder="Select a column")
+                                ], md=2),
+                                dbc.Col([
+                                    dbc.Label("Aggregate"),
+                                    dcc.Dropdown(id='viz-agg', value='count', clearable=False, options=[
+                                        {'label': agg.title(), 'value': agg} for agg in ['count', 'sum', 'mean', 'min', 'max']
+                                    ])
+                                ], md=2),
+                            ], className="mb-3"),
+                            # Every chart is binned or downsampled by the backend, and zooming
+                            # asks for the visible range again at full resolution
+                            dcc.Graph(id='viz-graph', figure=empty_figure("Select a dataset and columns to plot")),
+                            html.P(id='viz-info', className="text-muted", style={'textAlign': 'right'}),
+                        ]), className="mt-3")
                     ]),
                 ],
                 id="tabs",
@@ -70,389 +152,301 @@ app.layout = dbc.Container([
     )
 ], fluid=True)
 
-# Callback to handle file upload
-@app.callback(
-    [Output('upload-status', 'children'),
-    Output('dataset-display', 'children')],
-    Input('upload-dataset', 'contents'),
-    State('upload-dataset', 'filename'),
-    State('upload-dataset', 'last_modified')
-)
+# Backend jobs are limited per user; identify Dash visitors by their address
+def user_headers():
+    return {'X-User-Id': flask.request.remote_addr or 'anonymous'} if flask.has_request_context() else {}
 
-def update_output(content, filename, date):
-    if content is not None:
-        # Content is available as a base64 string
-        import base64
-        import io
-        
-        # Decode the base64 string
-        content_type, content_string = content.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        # Create FormData-like structure for the request
-        files = {'file': (filename, io.BytesIO(decoded), content_type)}
-        
-        try:
-            # Send the file to the FastAPI backend
-            response = requests.post(f"{API_URL}/upload/", files=files)
-            
-            if response.status_code == 200:
-                # Get the dataset preview
-                dataset_response = requests.get(f"{API_URL}/dataset/{filename}")
-                
-                if dataset_response.status_code == 200:
-                    dataset_data = dataset_response.json()
-
-                    # Use statistics from the backend
-                    num_rows = dataset_data['total_rows']
-                    num_cols = dataset_data['total_cols']
-                    missing_values = dataset_data['missing_values']
-                    summary_stats = dataset_data['summary_stats']
-                    column_types = dataset_data['column_types']
-                    
-                    # Create DataFrame for display
-                    df = pd.DataFrame(dataset_data['data'])
-                    all_columns = [col for col in df.columns if col != "Row #"]
+# Display names for benchmark estimators that don't title-case well
+MODEL_LABELS = {'svm': 'SVM', 'knn': 'KNN'}
 
-                    numeric_columns = dataset_data.get('numeric_columns', [])
-                    
-                    if 'error' in dataset_data:
-                        return (
-                            dbc.Alert(f"Successfully uploaded {filename}", color="success"),
-                            html.Div([
-                                dbc.Row([
-                                    dbc.Col(
-                                        html.H5(f"Dataset Preview: {filename}"),
-                                        width=6
-                                    ),
-                                    dbc.Col(
-                                        html.H5("Dataset Summary", style={"color": "white"}),
-                                        width=6
-                                    )
-                                ], align="center"),
-                                dbc.Row([
-                                    dbc.Col(
-                                        dbc.Alert(f"Error loading data: {dataset_data['error']}", color="warning"),
-                                        width=6,
-                                    ),
-                                    dbc.Col(
-                                        html.P("Unable to generate summary due to data loading error.", className="text-muted"),
-                                        width=6
-                                    )
-                                ])
-                            ])
-                        )
-
-                    all_columns = [col for col in df.columns if col != "Row #"]
-
-                    # Create a data table
-                    data_table = dash_table.DataTable(
-                        id='dataset-table',
-                        columns=[{"name": col, "id": col} for col in dataset_data['columns']],
-                        data=dataset_data['data'],
-                        page_size=10,
-                        style_table={
-                            'overflowX': 'auto',
-                            'overflowY': 'scroll',  # vertical scrolling
-                            'maxHeight': '395px',   # limit height
-                            'margin': '20px 0',
-                            'borderRadius': '5px',
-                            'boxShadow': '0 2px 8px rgba(0,0,0,0.15)'
-                        },
-                        style_header={
-                            'backgroundColor': '#f1f1f1',  # Light gray header
-                            'color': '#333',  # Dark gray text
-                            'fontWeight': 'bold',
-                            'textAlign': 'left',
-                            'border': 'none',  # Remove borders
-                            'borderBottom': '1px solid #ddd'  # Only keep bottom border
-                        },
-                        style_header_conditional=[
-                            {
-                                'if': {'column_id': 'Row #'},
-                                'color': '#f1f1f1',  # Same as background to "hide"
-                                'fontSize': '0.01em'
-                            }
-                        ],
-                        style_cell={
-                            'backgroundColor': 'white',
-                            'color': '#333',
-                            'textAlign': 'left',
-                            'padding': '12px 15px',  # More padding
-                            'minWidth': '100px', 
-                            'width': '150px', 
-                            'maxWidth': '200px',
-                            'overflow': 'hidden',
-                            'textOverflow': 'ellipsis',
-                            'border': 'none'  # Remove borders between cells
-                        },
-                        style_cell_conditional=[
-                            {
-                                'if': {'column_id': 'Row #'},
-                                'minWidth': '40px',
-                                'width': '50px',
-                                'maxWidth': '50px',
-                                'textAlign': 'right',
-                                'padding': '0 8px',
-                                'color': '#999',
-                                'backgroundColor': '#f4f4f4'
-                            }
-                        ],
-                        style_data={
-                            'borderBottom': '1px solid #eee'  # Light border between rows
-                        },
-                        style_data_conditional=[
-                            {
-                                'if': {'row_index': 'odd'},
-                                'backgroundColor': '#f9f9f9'  # Lighter gray for alternating rows
-                            },
-                            {
-                                'if': {'state': 'selected'},
-                                'backgroundColor': 'rgba(220, 220, 220, 0.5)',  # Light gray for selected cells
-                                'border': '1px solid #ddd'
-                            },
-                            {
-                                'if': {'column_id': 'Row #'},  
-                                'backgroundColor': '#f4f4f4',
-                                'color': '#888',
-                                'textAlign': 'right',
-                                'fontWeight': 'normal',
-                                'fontSize': '0.85em',
-                                'padding': '0 8px'
-                            }
-                        ],
-                        style_as_list_view=True,  # Removes vertical grid lines
-                        page_action='none',
-                        sort_action='native',    # Add sorting capability
-                        fixed_rows={'headers': True},
-                        
-                        # Add tool tip for interactivity
-                        tooltip_data=[
-                            {
-                                column: {'value': str(value) if value is not None else "null", 'type': 'text'}
-                                for column, value in row.items()
-                            } for row in dataset_data['data']
-                        ],
-                        tooltip_duration=None
-                    )
-
-                    # Add some container styling
-                    table_container = html.Div(
-                        [
-                            data_table,
-                            html.P(
-                                f"Showing first {len(dataset_data['data'])} of {dataset_data['total_rows']} rows", 
-                                style={
-                                    'marginTop': '10px', 
-                                    'fontSize': '0.9em', 
-                                    'color': '#777',
-                                    'textAlign': 'right',
-                                    'maxWidth': '65%',
-                                    'marginLeft': 'auto'
-                                }
-                            )
-                        ],
-                        style={
-                            'backgroundColor': 'white',
-                            'padding': '20px',
-                            'borderRadius': '8px',
-                            'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
-                            'marginTop': '10px'
-                        }
-                    )
-
-                    # Return the styled container
-                    return (
-                        dbc.Alert(f"Successfully uploaded {filename}", color="success"),
-                        html.Div([
-                            dbc.Row([
-                                dbc.Col(
-                                    html.H5(f"Dataset Preview: {filename}"),
-                                    width=6
-                                ),
-                                dbc.Col(
-                                    html.H5("Dataset Summary", style={"color": "white"}),
-                                    width=6
-                                )
-                            ], align="center"),
-                            dbc.Row([
-                                dbc.Col(
-                                    table_container,
-                                    width=6,
-                                ),
-                                dbc.Col(
-                                    html.Div([
-                                        # Calculate completeness
-                                        html.Div([
-                                            dbc.Row([
-                                                dbc.Col([
-                                                    html.Div([
-                                                        html.Div(f"{num_rows:,}", className="stat-value"),
-                                                        html.Div("Total Rows", className="stat-label")
-                                                    ], className="stat-card")
-                                                ], width=6, md=3),
-                                                dbc.Col([
-                                                    html.Div([
-                                                        html.Div(f"{num_cols}", className="stat-value"),
-                                                        html.Div("Columns", className="stat-label")
-                                                    ], className="stat-card")
-                                                ], width=6, md=3),
-                                                dbc.Col([
-                                                    html.Div([
-                                                        html.Div(f"{missing_values:,}", className="stat-value"),
-                                                        html.Div("Missing Values", className="stat-label")
-                                                    ], className="stat-card")
-                                                ], width=6, md=3),
-                                                dbc.Col([
-                                                    html.Div([
-                                                        html.Div(f"{100 - round((missing_values / (num_rows * num_cols)) * 100, 2):.1f}%", className="stat-value"),
-                                                        html.Div("Completeness", className="stat-label")
-                                                    ], className="stat-card")
-                                                ], width=6, md=3),
-                                            ])
-                                        ]),
-                                        
-                                        # Numeric column stats (keeping the original format but with updated styling)
-                                        html.Div([
-                                            html.H6("Column Statistics", className="column-stats-header"),
-                                            
-                                            # Add a div with scrolling
-                                            html.Div([
-                                                # Create a table for the stats
-                                                html.Table([
-                                                    html.Thead([
-                                                        html.Tr([
-                                                            html.Th("Column"),
-                                                            html.Th("Type"),
-                                                            html.Th("Mean"),
-                                                            html.Th("Std"),
-                                                            html.Th("Min"),
-                                                            html.Th("Max")
-                                                        ])
-                                                    ]),
-                                                    html.Tbody([
-                                                        html.Tr([
-                                                            html.Td(col),
-                                                            html.Td(html.Span(
-                                                                "numeric" if "float" in column_types.get(col, "").lower() or "int" in column_types.get(col, "").lower() else "string", 
-                                                                className="column-type-badge"
-                                                            )),
-                                                            html.Td(
-                                                                f"{summary_stats.get(col, {}).get('mean', 'N/A'):.2f}" 
-                                                                if col in numeric_columns else "--"
-                                                            ),
-                                                            html.Td(
-                                                                f"{summary_stats.get(col, {}).get('std', 'N/A'):.2f}" 
-                                                                if col in numeric_columns else "--"
-                                                            ),
-                                                            html.Td(
-                                                                f"{summary_stats.get(col, {}).get('min', 'N/A'):.2f}" 
-                                                                if col in numeric_columns else "--"
-                                                            ),
-                                                            html.Td(
-                                                                f"{summary_stats.get(col, {}).get('max', 'N/A'):.2f}" 
-                                                                if col in numeric_columns else "--"
-                                                            )
-                                                        ])
-                                                        for col in all_columns
-                                                    ])
-                                                ], className="column-stats-table")
-                                            ], style={
-                                                'maxHeight': '300px',  # Set a maximum height
-                                                'overflowY': 'auto',   # Enable vertical scrolling
-                                                'overflowX': 'auto'    # Enable horizontal scrolling if needed
-                                            })
-                                        ], className="column-stats-card")
-                                    ], style={"marginTop": "10px"})
-                                )
-                            ], justify="between")
-                        ])
-                    )
-                
-                else:
-                    return (
-                        dbc.Alert(f"Successfully uploaded {filename}", color="success"),
-                        html.Div([
-                            dbc.Row([
-                                dbc.Col(
-                                    html.H5(f"Dataset Preview: {filename}"),
-                                    width=6
-                                ),
-                                dbc.Col(
-                                    html.H5("Dataset Summary", style={"color": "white"}),
-                                    width=6
-                                )
-                            ], align="center"),
-                            dbc.Row([
-                                dbc.Col(
-                                    dbc.Alert(f"Error: Could not retrieve dataset preview", color="warning"),
-                                    width=6,
-                                ),
-                                dbc.Col(
-                                    html.P("Unable to generate summary due to data loading error.", className="text-muted"),
-                                    width=6
-                                )
-                            ])
-                        ])
-                    )
-            else:
-                return (
-                    dbc.Alert(f"Error uploading file: {response.text}", color="danger"),
-                    html.Div([
-                        dbc.Row([
-                            dbc.Col(
-                                html.H5("Dataset Preview"),
-                                width=6
-                            ),
-                            dbc.Col(
-                                html.H5("Dataset Summary", style={"color": "white"}),
-                                width=6
-                            )
-                        ], align="center"),
-                        dbc.Row([
-                            dbc.Col(
-                                html.P("No dataset to display"),
-                                width=6,
-                            ),
-                            dbc.Col(
-                                html.P("Upload a dataset to see summary", className="text-muted"),
-                                width=6
-                            )
-                        ])
-                    ])
+def model_label(name):
+    return MODEL_LABELS.get(name, name.replace('_', ' ').title())
+
+# Cells longer than this may be cut off by the column width
+TOOLTIP_MIN_LENGTH = 20
+
+# Tooltips with the full value of the cells on the current page that can be cut off
+def cell_tooltips(columns):
+    tooltips = [{} for _ in range(max((len(values) for values in columns.values()), default=0))]
+    for column, values in columns.items():
+        for i, value in enumerate(values):
+            if value is not None and len(str(value)) > TOOLTIP_MIN_LENGTH:
+                tooltips[i][column] = {'value': str(value), 'type': 'text'}
+    return tooltips
+
+# First `count` entries of every column array
+def head_columns(columns, count):
+    return {column: values[:count] for column, values in columns.items()}
+
+# One page of the preview table; pyarrow clients get Arrow IPC, others column arrays
+def fetch_rows(filename, params):
+    response = backend.get(f"/dataset/{filename}/rows", params=params, headers={'Accept': accept_header()})
+    return decode_table(response, 'data')
+
+def format_bytes(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+# Undefined statistics (NaN, e.g. the std of a single value) arrive as null
+def format_stat(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "N/A"
+    return f"{value:.2f}"
+
+def page_info(page_current, total_rows):
+    first = page_current * PAGE_SIZE + 1 if total_rows else 0
+    last = min((page_current + 1) * PAGE_SIZE, total_rows)
+    return f"Showing rows {first:,}-{last:,} of {total_rows:,}"
+
+# Empty preview/summary panel shown before a dataset is loaded
+def placeholder_display(preview_text="Upload a dataset to see preview",
+                        summary_text="Upload a dataset to see summary",
+                        title="Dataset Preview"):
+    return html.Div([
+        dbc.Row([
+            dbc.Col(
+                html.H5(title),
+                width=6
+            ),
+            dbc.Col(
+                html.H5("Dataset Summary", style={"color": "white"}),
+                width=6
+            )
+        ], align="center"),
+        dbc.Row([
+            dbc.Col(
+                html.P(preview_text, className="text-muted"),
+                width=6,
+            ),
+            dbc.Col(
+                html.P(summary_text, className="text-muted"),
+                width=6
+            )
+        ])
+    ])
+
+# Progress panel shown while the backend profiles a dataset
+def job_progress_display(filename, job):
+    eta = job.get('eta_seconds')
+    return html.Div([
+        html.H5(f"Profiling {filename}"),
+        dbc.Progress(value=round(job.get('progress', 0) * 100), striped=True, animated=True, className="mb-2"),
+        html.P(
+            f"{job.get('message') or job.get('status', '').title()}" + (f" - about {eta:.0f}s left" if eta else ""),
+            className="text-muted"
+        ),
+        dbc.Button("Cancel", id='profile-cancel', color="secondary", size="sm")
+    ])
+
+def stat_card(value, label):
+    return dbc.Col([
+        html.Div([
+            html.Div(value, className="stat-value"),
+            html.Div(label, className="stat-label")
+        ], className="stat-card")
+    ], width=6, md=3)
+
+# Duplicate/constant/near-copy cards from a /dataset/{filename}/quality report
+def quality_cards(report):
+    if report is None:
+        return html.P("Checking for duplicates...", className="text-muted", style={'fontSize': '0.85em'})
+    if 'error' in report:
+        return html.P(f"Data quality scan failed: {report['error']}", className="text-muted", style={'fontSize': '0.85em'})
+
+    keys = report['keys']
+    constants = report['constant_columns']
+    near_copies = report['near_duplicate_columns']
+    details = []
+    if keys:
+        details.append("Keys: " + ", ".join(f"{key['column']} ({key['duplicates']:,} repeated)" for key in keys))
+    if constants:
+        details.append("Constant: " + ", ".join(str(col['column']) for col in constants))
+    if near_copies:
+        details.append("Near copies: " + ", ".join(
+            f"{pair['columns'][0]} ~ {pair['columns'][1]} ({pair['similarity']:.0%})" for pair in near_copies))
+    return html.Div([
+        dbc.Row([
+            stat_card(f"{report['duplicate_rows']:,}", "Duplicate Rows"),
+            # Repeats in different key columns do not add up, so several keys
+            # show how many of them repeat; the details give each count
+            stat_card(f"{keys[0]['duplicates']:,}", f"Duplicate {keys[0]['column']}") if len(keys) == 1 else
+            stat_card(f"{sum(1 for key in keys if key['duplicates'])} of {len(keys)}" if keys else "-",
+                      "Keys With Duplicates"),
+            stat_card(f"{len(constants)}", "Constant Columns"),
+            stat_card(f"{len(near_copies)}", "Near-Copy Columns"),
+        ]),
+        html.P("; ".join(details), className="text-muted", style={'fontSize': '0.85em'}) if details else None
+    ])
+
+# Build the preview table and summary panel from a /dataset/{filename} profile
+def render_dataset(filename, dataset_data):
+    if 'error' in dataset_data:
+        return html.Div([
+            dbc.Row([
+                dbc.Col(
+                    html.H5(f"Dataset Preview: {filename}"),
+                    width=6
+                ),
+                dbc.Col(
+                    html.H5("Dataset Summary", style={"color": "white"}),
+                    width=6
                 )
+            ], align="center"),
+            dbc.Row([
+                dbc.Col(
+                    dbc.Alert(f"Error loading data: {dataset_data['error']}", color="warning"),
+                    width=6,
+                ),
+                dbc.Col(
+                    html.P("Unable to generate summary due to data loading error.", className="text-muted"),
+                    width=6
+                )
+            ])
+        ])
+
+    # Use statistics from the backend
+    num_rows = dataset_data['total_rows']
+    num_cols = dataset_data['total_cols']
+    missing_values = dataset_data['missing_values']
+    summary_stats = dataset_data['summary_stats']
+    categorical_stats = dataset_data.get('categorical_stats', {})
+    column_types = dataset_data['column_types']
+    memory = dataset_data.get('memory')
+    
+    # The preview arrives as column arrays; only the first page becomes row dicts
+    preview = head_columns(dataset_data['data'], PAGE_SIZE)
+
+    numeric_columns = dataset_data.get('numeric_columns', [])
+    
+
+    all_columns = [col for col in dataset_data['columns'] if col != "Row #"]
+
+    # Create a data table
+    data_table = dash_table.DataTable(
+        id='dataset-table',
+        columns=[{"name": col, "id": col} for col in dataset_data['columns']],
+        data=columns_to_records(preview),
+        page_size=PAGE_SIZE,
+        page_current=0,
+        page_count=max(math.ceil(dataset_data['total_rows'] / PAGE_SIZE), 1),
+        style_table={
+            'overflowX': 'auto',
+            'overflowY': 'scroll',  # vertical scrolling
+            'maxHeight': '395px',   # limit height
+            'margin': '20px 0',
+            'borderRadius': '5px',
+            'boxShadow': '0 2px 8px rgba(0,0,0,0.15)'
+        },
+        style_header={
+            'backgroundColor': '#f1f1f1',  # Light gray header
+            'color': '#333',  # Dark gray text
+            'fontWeight': 'bold',
+            'textAlign': 'left',
+            'border': 'none',  # Remove borders
+            'borderBottom': '1px solid #ddd'  # Only keep bottom border
+        },
+        style_header_conditional=[
+            {
+                'if': {'column_id': 'Row #'},
+                'color': '#f1f1f1',  # Same as background to "hide"
+                'fontSize': '0.01em'
+            }
+        ],
+        style_cell={
+            'backgroundColor': 'white',
+            'color': '#333',
+            'textAlign': 'left',
+            'padding': '12px 15px',  # More padding
+            'minWidth': '100px', 
+            'width': '150px', 
+            'maxWidth': '200px',
+            'overflow': 'hidden',
+            'textOverflow': 'ellipsis',
+            'border': 'none'  # Remove borders between cells
+        },
+        style_cell_conditional=[
+            {
+                'if': {'column_id': 'Row #'},
+                'minWidth': '40px',
+                'width': '50px',
+                'maxWidth': '50px',
+                'textAlign': 'right',
+                'padding': '0 8px',
+                'color': '#999',
+                'backgroundColor': '#f4f4f4'
+            }
+        ],
+        style_data={
+            'borderBottom': '1px solid #eee'  # Light border between rows
+        },
+        style_data_conditional=[
+            {
+                'if': {'row_index': 'odd'},
+                'backgroundColor': '#f9f9f9'  # Lighter gray for alternating rows
+            },
+            {
+                'if': {'state': 'selected'},
+                'backgroundColor': 'rgba(220, 220, 220, 0.5)',  # Light gray for selected cells
+                'border': '1px solid #ddd'
+            },
+            {
+                'if': {'column_id': 'Row #'},  
+                'backgroundColor': '#f4f4f4',
+                'color': '#888',
+                'textAlign': 'right',
+                'fontWeight': 'normal',
+                'fontSize': '0.85em',
+                'padding': '0 8px'
+            }
+        ],
+        style_as_list_view=True,  # Removes vertical grid lines
+        # Paging, sorting and filtering run on the backend over every row
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='single',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        fixed_rows={'headers': True},
         
-        except Exception as e:
-            return (
-                dbc.Alert(f"Error: {str(e)}", color="danger"),
-                html.Div([
-                    dbc.Row([
-                        dbc.Col(
-                            html.H5("Dataset Preview"),
-                            width=6
-                        ),
-                        dbc.Col(
-                            html.H5("Dataset Summary", style={"color": "white"}),
-                            width=6
-                        )
-                    ], align="center"),
-                    dbc.Row([
-                        dbc.Col(
-                            html.P("No dataset to display"),
-                            width=6,
-                        ),
-                        dbc.Col(
-                            html.P("Upload a dataset to see summary", className="text-muted"),
-                            width=6
-                        )
-                    ])
-                ])
+        # Add tool tip for interactivity
+        tooltip_data=cell_tooltips(preview),
+        tooltip_duration=None
+    )
+
+    # Add some container styling
+    table_container = html.Div(
+        [
+            data_table,
+            html.P(
+                page_info(0, dataset_data['total_rows']),
+                id='table-page-info',
+                style={
+                    'marginTop': '10px', 
+                    'fontSize': '0.9em', 
+                    'color': '#777',
+                    'textAlign': 'right',
+                    'maxWidth': '65%',
+                    'marginLeft': 'auto'
+                }
             )
-    
-    return no_update, html.Div([
+        ],
+        style={
+            'backgroundColor': 'white',
+            'padding': '20px',
+            'borderRadius': '8px',
+            'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
+            'marginTop': '10px'
+        }
+    )
+
+    # Return the styled container
+    return html.Div([
         dbc.Row([
             dbc.Col(
-                html.H5("Dataset Preview"),
+                html.H5(f"Dataset Preview: {filename}"),
                 width=6
             ),
             dbc.Col(
@@ -462,16 +456,597 @@ def update_output(content, filename, date):
         ], align="center"),
         dbc.Row([
             dbc.Col(
-                html.P("Upload a dataset to see preview", className="text-muted"),
+                table_container,
                 width=6,
             ),
             dbc.Col(
-                html.P("Upload a dataset to see summary", className="text-muted"),
-                width=6
+                html.Div([
+                    # Calculate completeness
+                    html.Div([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Div([
+                                    html.Div(f"{num_rows:,}", className="stat-value"),
+                                    html.Div("Total Rows", className="stat-label")
+                                ], className="stat-card")
+                            ], width=6, md=3),
+                            dbc.Col([
+                                html.Div([
+                                    html.Div(f"{num_cols}", className="stat-value"),
+                                    html.Div("Columns", className="stat-label")
+                                ], className="stat-card")
+                            ], width=6, md=3),
+                            dbc.Col([
+                                html.Div([
+                                    html.Div(f"{missing_values:,}", className="stat-value"),
+                                    html.Div("Missing Values", className="stat-label")
+                                ], className="stat-card")
+                            ], width=6, md=3),
+                            dbc.Col([
+                                html.Div([
+                                    html.Div(f"{100 - round((missing_values / (num_rows * num_cols)) * 100, 2):.1f}%", className="stat-value"),
+                                    html.Div("Completeness", className="stat-label")
+                                ], className="stat-card")
+                            ], width=6, md=3),
+                        ]),
+                        # Filled in by the data-quality scan job
+                        html.Div(quality_cards(None), id='quality-cards'),
+                        # In-memory size with default vs optimized dtypes
+                        html.P(
+                            f"In memory: {format_bytes(memory['before_bytes'])} with default dtypes, "
+                            f"{format_bytes(memory['after_bytes'])} with the optimized schema",
+                            className="text-muted", style={'fontSize': '0.85em', 'textAlign': 'right'}
+                        ) if memory else None
+                    ]),
+                    
+                    # Numeric column stats (keeping the original format but with updated styling)
+                    html.Div([
+                        html.H6("Column Statistics", className="column-stats-header"),
+                        
+                        # Add a div with scrolling
+                        html.Div([
+                            # Create a table for the stats
+                            html.Table([
+                                html.Thead([
+                                    html.Tr([
+                                        html.Th("Column"),
+                                        html.Th("Type"),
+                                        html.Th("Mean"),
+                                        html.Th("Std"),
+                                        html.Th("Min"),
+                                        html.Th("Max"),
+                                        html.Th("P25"),
+                                        html.Th("Median"),
+                                        html.Th("P75"),
+                                        html.Th("Distinct"),
+                                        html.Th("Top Value")
+                                    ])
+                                ]),
+                                html.Tbody([
+                                    html.Tr([
+                                        html.Td(col),
+                                        html.Td(html.Span(
+                                            "numeric" if "float" in column_types.get(col, "").lower() or "int" in column_types.get(col, "").lower() else "string", 
+                                            className="column-type-badge"
+                                        )),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('mean'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('std'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('min'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('max'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('p25'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('p50'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            format_stat(summary_stats.get(col, {}).get('p75'))
+                                            if col in numeric_columns else "--"
+                                        ),
+                                        html.Td(
+                                            # Numeric cardinalities are exact up to 10k values, HyperLogLog estimates beyond
+                                            f"{summary_stats[col]['distinct']:,}"
+                                            if col in numeric_columns and 'distinct' in summary_stats.get(col, {})
+                                            else f"{categorical_stats[col]['distinct']:,}"
+                                            if categorical_stats.get(col, {}).get('distinct') is not None else "--"
+                                        ),
+                                        html.Td(
+                                            str(categorical_stats[col]['top'][0]['value'])
+                                            if categorical_stats.get(col, {}).get('top') else "--"
+                                        )
+                                    ])
+                                    for col in all_columns
+                                ])
+                            ], className="column-stats-table")
+                        ], style={
+                            'maxHeight': '300px',  # Set a maximum height
+                            'overflowY': 'auto',   # Enable vertical scrolling
+                            'overflowX': 'auto'    # Enable horizontal scrolling if needed
+                        })
+                    ], className="column-stats-card")
+                ], style={"marginTop": "10px"})
             )
-        ])
+        ], justify="between")
     ])
 
+# Callback to start profiling once the browser has stored a file
+@app.callback(
+    [Output('upload-status', 'children'),
+    Output('dataset-display', 'children'),
+    Output('profile-job-store', 'data'),
+    Output('profile-poll', 'disabled')],
+    Input('uploaded-data-store', 'data')
+)
+
+def update_output(upload):
+    if upload is None:
+        return no_update, placeholder_display(), None, True
+
+    filename = upload['filename']
+    if 'error' in upload:
+        return (
+            dbc.Alert(f"Error uploading file: {upload['error']}", color="danger"),
+            placeholder_display("No dataset to display"),
+            None,
+            True
+        )
+
+    # The ingest job's result carries the profile when it was built there
+    profile = upload.get('profile')
+    if profile and 'error' not in profile:
+        return (
+            dbc.Alert(f"Successfully uploaded {filename}", color="success"),
+            render_dataset(filename, profile),
+            None,
+            True
+        )
+
+    try:
+        # Otherwise profiling runs as a backend job; the page polls it instead of blocking a worker
+        job = backend.post(f"/jobs/profile/{filename}", headers=user_headers()).json()
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger"), placeholder_display("No dataset to display"), None, True
+    if 'job_id' not in job:
+        return (
+            dbc.Alert(f"Successfully uploaded {filename}", color="success"),
+            placeholder_display(f"Could not start profiling: {job['error']}", title=f"Dataset Preview: {filename}"),
+            None,
+            True
+        )
+
+    return (
+        dbc.Alert(f"Successfully uploaded {filename}", color="success"),
+        job_progress_display(filename, job),
+        {'job_id': job['job_id'], 'filename': filename},
+        False
+    )
+
+# Callback to follow the profiling job and show the dataset when it finishes
+@app.callback(
+    [Output('dataset-display', 'children', allow_duplicate=True),
+    Output('profile-poll', 'disabled', allow_duplicate=True)],
+    Input('profile-poll', 'n_intervals'),
+    State('profile-job-store', 'data'),
+    prevent_initial_call=True
+)
+
+def poll_profile_job(n_intervals, profile_job):
+    if not profile_job:
+        return no_update, True
+
+    filename = profile_job['filename']
+    try:
+        job = backend.get(f"/jobs/{profile_job['job_id']}").json()
+    except Exception:
+        return no_update, no_update
+    if 'status' not in job:
+        return placeholder_display(f"Error: {job['error']}", title=f"Dataset Preview: {filename}"), True
+
+    if job['status'] == 'succeeded':
+        return render_dataset(filename, job['result']), True
+    if job['status'] == 'failed':
+        return render_dataset(filename, {'error': job['error']}), True
+    if job['status'] == 'cancelled':
+        return placeholder_display("Profiling was cancelled", title=f"Dataset Preview: {filename}"), True
+    return job_progress_display(filename, job), False
+
+# Callback to cancel the profiling job
+@app.callback(
+    Output('profile-cancel', 'disabled'),
+    Input('profile-cancel', 'n_clicks'),
+    State('profile-job-store', 'data'),
+    prevent_initial_call=True
+)
+
+def cancel_profile_job(n_clicks, profile_job):
+    if profile_job:
+        try:
+            backend.delete(f"/jobs/{profile_job['job_id']}")
+        except Exception:
+            pass
+    return True
+
+# Callback to start the data-quality scan once the browser has stored a file
+@app.callback(
+    [Output('quality-job-store', 'data'),
+    Output('quality-poll', 'disabled')],
+    Input('uploaded-data-store', 'data')
+)
+
+def start_quality_job(upload):
+    if upload is None or 'error' in upload:
+        return None, True
+
+    filename = upload['filename']
+    try:
+        job = backend.post(f"/jobs/quality/{filename}", headers=user_headers()).json()
+    except Exception as e:
+        return {'filename': filename, 'result': {'error': str(e)}}, True
+    if 'job_id' not in job:
+        return {'filename': filename, 'result': {'error': job['error']}}, True
+    return {'job_id': job['job_id'], 'filename': filename}, False
+
+# Callback to follow the data-quality job and keep its report
+@app.callback(
+    [Output('quality-job-store', 'data', allow_duplicate=True),
+    Output('quality-poll', 'disabled', allow_duplicate=True)],
+    Input('quality-poll', 'n_intervals'),
+    State('quality-job-store', 'data'),
+    prevent_initial_call=True
+)
+
+def poll_quality_job(n_intervals, quality_job):
+    if not quality_job or 'job_id' not in quality_job:
+        return no_update, True
+
+    try:
+        job = backend.get(f"/jobs/{quality_job['job_id']}").json()
+    except Exception:
+        return no_update, no_update
+    if 'status' not in job:
+        return dict(quality_job, result={'error': job['error']}), True
+
+    if job['status'] == 'succeeded':
+        return dict(quality_job, result=job['result']), True
+    if job['status'] == 'failed':
+        return dict(quality_job, result={'error': job['error']}), True
+    if job['status'] == 'cancelled':
+        return dict(quality_job, result={'error': "Cancelled"}), True
+    return no_update, False
+
+# Callback to show the quality report in the summary panel, whichever of the
+# two (panel or report) arrives last
+@app.callback(
+    Output('quality-cards', 'children'),
+    Input('quality-cards', 'id'),
+    Input('quality-job-store', 'data')
+)
+
+def update_quality_cards(_, quality_job):
+    return quality_cards(quality_job.get('result') if quality_job else None)
+
+# Callback to fetch one page of the preview table from the backend
+@app.callback(
+    [Output('dataset-table', 'data'),
+    Output('dataset-table', 'tooltip_data'),
+    Output('dataset-table', 'page_count'),
+    Output('table-page-info', 'children')],
+    Input('dataset-table', 'page_current'),
+    Input('dataset-table', 'page_size'),
+    Input('dataset-table', 'sort_by'),
+    Input('dataset-table', 'filter_query'),
+    State('uploaded-data-store', 'data')
+)
+
+def update_table_page(page_current, page_size, sort_by, filter_query, upload):
+    if upload is None or 'error' in upload:
+        return no_update, no_update, no_update, no_update
+    filename = upload['filename']
+
+    page_current = page_current or 0
+    params = {'offset': page_current * page_size, 'limit': page_size}
+    if sort_by:
+        params['sort_by'] = sort_by[0]['column_id']
+        params['sort_dir'] = sort_by[0]['direction']
+    if filter_query:
+        params['filter_query'] = filter_query
+
+    try:
+        page, columns = fetch_rows(filename, params)
+    except Exception:
+        return no_update, no_update, no_update, no_update
+    if 'error' in page:
+        return [], [], 1, f"Error: {page['error']}"
+
+    total_rows = page['total_rows']
+    return (
+        columns_to_records(columns),
+        cell_tooltips(columns),
+        max(math.ceil(total_rows / page_size), 1),
+        page_info(page_current, total_rows)
+    )
+
+# Callback to fill the benchmark form when the tab is opened
+@app.callback(
+    [Output('benchmark-dataset', 'options'),
+    Output('benchmark-models', 'options')],
+    Input('tabs', 'active_tab')
+)
+
+def load_benchmark_options(active_tab):
+    if active_tab != 'benchmark':
+        return no_update, no_update
+    try:
+        datasets = backend.get("/datasets/", params={'limit': 500}).json()['datasets']
+        estimators = backend.get("/benchmark/estimators").json()['estimators']
+    except Exception:
+        return [], []
+    return (
+        [{'label': name, 'value': name} for name in sorted(datasets)],
+        [{'label': model_label(name), 'value': name} for name in estimators]
+    )
+
+# Callback to list the columns of the selected dataset as target candidates
+@app.callback(
+    Output('benchmark-target', 'options'),
+    Input('benchmark-dataset', 'value')
+)
+
+def load_benchmark_targets(dataset):
+    if not dataset:
+        return []
+    try:
+        columns, _ = dataset_columns(dataset)
+    except Exception:
+        return []
+    return [{'label': col, 'value': col} for col in columns]
+
+# Column names and the numeric ones, from the dataset's catalog entry rather
+# than its full profile and preview
+def dataset_columns(dataset):
+    entry = backend.get(f"/datasets/{dataset}").json()
+    columns = list(entry.get('column_types') or {})
+    # Summary statistics are kept for exactly the numeric columns
+    summary_stats = entry.get('summary_stats') or {}
+    return columns, [col for col in columns if col in summary_stats]
+
+# Per-model summary and per-fold tables for a (possibly still running) benchmark
+def render_benchmark_results(summary, fold_rows):
+    return html.Div([
+        html.H5("Results" if summary else "Results so far"),
+        dbc.Table([
+            html.Thead(html.Tr([
+                html.Th("Model"), html.Th("Accuracy"), html.Th("Std"), html.Th("F1 (macro)"), html.Th("Fit Time (s)")
+            ])),
+            html.Tbody([
+                html.Tr([
+                    html.Td(model_label(name)),
+                    html.Td(f"{stats['accuracy_mean']:.4f}"),
+                    html.Td(f"{stats['accuracy_std']:.4f}"),
+                    html.Td(f"{stats['f1_macro_mean']:.4f}"),
+                    html.Td(f"{stats['fit_time_total']:.2f}")
+                ])
+                for name, stats in sorted((summary or {}).items(), key=lambda item: -item[1]['accuracy_mean'])
+            ])
+        ], bordered=False, hover=True, size="sm", className="column-stats-table"),
+        html.H6("Per-Fold Results", className="mt-3"),
+        dash_table.DataTable(
+            columns=[{"name": col, "id": col} for col in ['model', 'fold', 'accuracy', 'f1_macro', 'fit_time', 'predict_time']],
+            data=sorted(fold_rows, key=lambda row: (row['model'], row['fold'])),
+            page_size=10,
+            sort_action='native',
+            style_cell={'backgroundColor': 'white', 'color': '#333', 'textAlign': 'left'},
+            style_header={'backgroundColor': '#f1f1f1', 'color': '#333', 'fontWeight': 'bold'}
+        )
+    ])
+
+# Callback to submit a benchmark job
+@app.callback(
+    [Output('benchmark-results', 'children'),
+    Output('benchmark-job-store', 'data'),
+    Output('benchmark-poll', 'disabled')],
+    Input('benchmark-run', 'n_clicks'),
+    State('benchmark-dataset', 'value'),
+    State('benchmark-target', 'value'),
+    State('benchmark-models', 'value'),
+    State('benchmark-folds', 'value'),
+    prevent_initial_call=True
+)
+
+def run_benchmark(n_clicks, dataset, target, models, folds):
+    if not dataset or not target or not models:
+        return dbc.Alert("Select a dataset, a target column and at least one model.", color="warning"), None, True
+
+    payload = {'dataset': dataset, 'target': target, 'estimators': models, 'n_splits': int(folds or 5)}
+    try:
+        job = backend.post("/jobs/benchmark", json=payload, headers=user_headers()).json()
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger"), None, True
+    if 'job_id' not in job:
+        return dbc.Alert(f"Error: {job['error']}", color="danger"), None, True
+    return benchmark_progress_display(job), job['job_id'], False
+
+def benchmark_progress_display(job, partial=None):
+    eta = job.get('eta_seconds')
+    return html.Div([
+        dbc.Progress(value=round(job.get('progress', 0) * 100), striped=True, animated=True, className="mb-2"),
+        html.P(
+            f"{job.get('message') or job.get('status', '').title()}" + (f" - about {eta:.0f}s left" if eta else ""),
+            className="text-muted"
+        ),
+        partial
+    ])
+
+# Callback to follow a benchmark job, showing folds as they finish
+@app.callback(
+    [Output('benchmark-results', 'children', allow_duplicate=True),
+    Output('benchmark-poll', 'disabled', allow_duplicate=True)],
+    Input('benchmark-poll', 'n_intervals'),
+    State('benchmark-job-store', 'data'),
+    prevent_initial_call=True
+)
+
+def poll_benchmark_job(n_intervals, job_id):
+    if not job_id:
+        return no_update, True
+    try:
+        job = backend.get(f"/jobs/{job_id}").json()
+    except Exception:
+        return no_update, no_update
+    if 'status' not in job:
+        return dbc.Alert(f"Error: {job.get('error')}", color="danger"), True
+
+    result = job.get('result') or {}
+    if job['status'] == 'succeeded':
+        return render_benchmark_results(result.get('summary'), result.get('folds', [])), True
+    if job['status'] in ('failed', 'cancelled'):
+        return dbc.Alert(f"Benchmark {job['status']}: {job.get('error') or ''}", color="danger"), True
+    partial = render_benchmark_results(None, result['folds']) if result.get('folds') else None
+    return benchmark_progress_display(job, partial), False
+
+# Callback to list datasets when the Visualize tab is opened
+@app.callback(
+    Output('viz-dataset', 'options'),
+    Input('tabs', 'active_tab')
+)
+
+def load_visualize_options(active_tab):
+    if active_tab != 'visualize':
+        return no_update
+    try:
+        datasets = backend.get("/datasets/", params={'limit': 500}).json()['datasets']
+    except Exception:
+        return []
+    return [{'label': name, 'value': name} for name in sorted(datasets)]
+
+# Callback to offer the columns that suit the selected chart
+@app.callback(
+    [Output('viz-x', 'options'),
+    Output('viz-y', 'options'),
+    Output('viz-y', 'disabled'),
+    Output('viz-agg', 'disabled')],
+    Input('viz-dataset', 'value'),
+    Input('viz-kind', 'value')
+)
+
+def load_visualize_columns(dataset, kind):
+    if not dataset:
+        return [], [], True, True
+    try:
+        columns, numeric_columns = dataset_columns(dataset)
+    except Exception:
+        return [], [], True, True
+    numeric = [{'label': col, 'value': col} for col in numeric_columns]
+    # Group-by keys can be any column; everything else plots numbers
+    x_options = [{'label': col, 'value': col} for col in columns] if kind == 'groupby' else numeric
+    return x_options, numeric, kind == 'histogram', kind != 'groupby'
+
+# Visible axis range from a Plotly relayout event, or None when autoscaled
+def zoom_range(relayout, axis):
+    if not relayout or relayout.get(f'{axis}.autorange'):
+        return None
+    if f'{axis}.range[0]' in relayout:
+        return relayout[f'{axis}.range[0]'], relayout[f'{axis}.range[1]']
+    return relayout.get(f'{axis}.range')
+
+def build_figure(kind, chart, x, y, agg):
+    if kind == 'histogram':
+        edges = chart['edges']
+        trace = go.Bar(x=[(lo + hi) / 2 for lo, hi in zip(edges, edges[1:])], y=chart['counts'],
+                       width=[hi - lo for lo, hi in zip(edges, edges[1:])], marker_color='#375a7f')
+        titles = (x, "Count")
+    elif kind == 'density':
+        x_edges, y_edges = chart['x_edges'], chart['y_edges']
+        trace = go.Heatmap(x=[(lo + hi) / 2 for lo, hi in zip(x_edges, x_edges[1:])],
+                           y=[(lo + hi) / 2 for lo, hi in zip(y_edges, y_edges[1:])],
+                           z=chart['z'], colorscale='Viridis', colorbar={'title': 'Rows'})
+        titles = (x, y)
+    elif kind == 'groupby':
+        groups = chart['groups']
+        trace = go.Bar(x=[str(group['key']) for group in groups], y=[group['value'] for group in groups],
+                       marker_color='#375a7f')
+        titles = (x, f"{agg.title()} of {y}" if agg != 'count' else "Count")
+    else:
+        trace = go.Scattergl(x=chart['x'], y=chart['y'], mode='lines', line={'color': '#00bc8c'})
+        titles = (x or "Row #", y)
+
+    figure = go.Figure(trace)
+    figure.update_layout(template='plotly_dark', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                         xaxis_title=titles[0], yaxis_title=titles[1], bargap=0,
+                         margin={'l': 60, 'r': 20, 't': 30, 'b': 60},
+                         # Keep the user's zoom when the figure is replaced with finer data
+                         uirevision=f"{kind}:{x}:{y}:{agg}")
+    return figure
+
+def chart_info(kind, chart):
+    if kind == 'groupby':
+        shown = len(chart['groups'])
+        return f"Top {shown:,} of {chart['total_groups']:,} groups" + (
+            f" ({chart['other_count']:,} rows in other groups)" if chart['other_count'] else "")
+    if kind == 'line':
+        return f"{len(chart['x']):,} of {chart['total']:,} points shown (LTTB)"
+    return f"{chart['total']:,} rows binned"
+
+# Callback to fetch aggregates for the chart, again for the visible range after zooming
+@app.callback(
+    [Output('viz-graph', 'figure'),
+    Output('viz-info', 'children')],
+    Input('viz-dataset', 'value'),
+    Input('viz-kind', 'value'),
+    Input('viz-x', 'value'),
+    Input('viz-y', 'value'),
+    Input('viz-agg', 'value'),
+    Input('viz-graph', 'relayoutData')
+)
+
+def update_visualization(dataset, kind, x, y, agg, relayout):
+    needs_y = kind in ('density', 'line') or (kind == 'groupby' and agg != 'count')
+    if not dataset or (kind != 'line' and not x) or (needs_y and not y):
+        return empty_figure("Select a dataset and columns to plot"), ""
+
+    params = {'kind': kind, 'x': x, 'agg': agg if kind == 'groupby' else 'count'}
+    if kind == 'histogram':
+        params['bins'] = HISTOGRAM_BINS
+    elif kind == 'density':
+        params.update(y=y, bins=DENSITY_BINS)
+    elif kind == 'groupby' and agg != 'count':
+        params['y'] = y
+    elif kind == 'line':
+        params.update(y=y, points=LINE_POINTS)
+
+    # Only a zoom on the graph itself narrows the range; changing inputs starts over
+    if dash.ctx.triggered_id == 'viz-graph' and kind != 'groupby':
+        x_range = zoom_range(relayout, 'xaxis')
+        if x_range:
+            params.update(x_min=x_range[0], x_max=x_range[1])
+        y_range = zoom_range(relayout, 'yaxis') if kind == 'density' else None
+        if y_range:
+            params.update(y_min=y_range[0], y_max=y_range[1])
+    elif dash.ctx.triggered_id == 'viz-graph':
+        return no_update, no_update
+
+    try:
+        chart = backend.get(f"/dataset/{dataset}/visualize", params=params).json()
+    except Exception as e:
+        return empty_figure(f"Error: {str(e)}"), ""
+    if 'error' in chart:
+        return empty_figure(f"Error: {chart['error']}"), ""
+    return build_figure(kind, chart, x, y, agg), chart_info(kind, chart)
+
 # Run the app
 if __name__ == '__main__':
     app.run(debug=True)
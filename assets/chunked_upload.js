@@ -0,0 +1,183 @@
+// Streams the selected file straight from the browser to the FastAPI chunked
+// upload endpoints: the file is cut into parts, each part is hashed and sent
+// with a few parts in flight at once, and an interrupted upload resumes from
+// the parts the server already has. Dash is only told once the file is stored
+// and the backend has finished ingesting it.
+(function () {
+    const PART_SIZE = 8 * 1024 * 1024;
+    const PARALLEL_PARTS = 4;
+    const PART_RETRIES = 3;
+    const JOB_POLL_MS = 500;
+
+    function setProps(id, props) {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props(id, props);
+        }
+    }
+
+    function showProgress(sent, total, label) {
+        const pct = total ? Math.round((sent / total) * 100) : 100;
+        setProps('upload-progress', {value: pct, label: label || `${pct}%`, style: {}});
+    }
+
+    function hideProgress() {
+        setProps('upload-progress', {value: 0, label: '', style: {display: 'none'}});
+    }
+
+    async function sha256Hex(blob) {
+        // crypto.subtle is only available on secure origins (https, localhost)
+        if (!window.crypto || !window.crypto.subtle) {
+            return null;
+        }
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, options);
+        const body = await response.json();
+        if (!response.ok || body.error) {
+            throw new Error(body.error || `HTTP ${response.status}`);
+        }
+        return body;
+    }
+
+    // Reuse a previous session for the same file if the server still has it
+    async function openSession(apiUrl, file) {
+        const resumeKey = `benchviz-upload:${file.name}:${file.size}:${file.lastModified}`;
+        const previousId = window.localStorage.getItem(resumeKey);
+        if (previousId) {
+            try {
+                const session = await requestJson(`${apiUrl}/uploads/${previousId}`);
+                return {session, resumeKey, received: new Set(session.received_parts)};
+            } catch (e) {
+                window.localStorage.removeItem(resumeKey);
+            }
+        }
+        const session = await requestJson(`${apiUrl}/uploads/`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filename: file.name, size: file.size, part_size: PART_SIZE}),
+        });
+        window.localStorage.setItem(resumeKey, session.upload_id);
+        return {session, resumeKey, received: new Set()};
+    }
+
+    async function sendPart(apiUrl, session, file, partNumber) {
+        const start = (partNumber - 1) * session.part_size;
+        const blob = file.slice(start, Math.min(start + session.part_size, file.size));
+        const checksum = await sha256Hex(blob);
+        const headers = checksum ? {'X-Part-Checksum': checksum} : {};
+        for (let attempt = 1; ; attempt++) {
+            try {
+                await requestJson(`${apiUrl}/uploads/${session.upload_id}/parts/${partNumber}`, {
+                    method: 'PUT', headers, body: blob,
+                });
+                return blob.size;
+            } catch (e) {
+                if (attempt >= PART_RETRIES) {
+                    throw e;
+                }
+                await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+            }
+        }
+    }
+
+    async function upload(apiUrl, file) {
+        const {session, resumeKey, received} = await openSession(apiUrl, file);
+        const pending = [];
+        let sent = 0;
+        for (let part = 1; part <= session.total_parts; part++) {
+            if (received.has(part)) {
+                sent += Math.min(session.part_size, file.size - (part - 1) * session.part_size);
+            } else {
+                pending.push(part);
+            }
+        }
+        showProgress(sent, file.size);
+
+        // A fixed number of workers pull the next missing part until none are left
+        const worker = async () => {
+            while (pending.length) {
+                const size = await sendPart(apiUrl, session, file, pending.shift());
+                sent += size;
+                showProgress(sent, file.size);
+            }
+        };
+        await Promise.all(Array.from({length: PARALLEL_PARTS}, worker));
+
+        showProgress(file.size, file.size, 'Processing...');
+        // Completing returns an ingest job; its result carries the profile and
+        // preview too, saving a round trip
+        const job = await requestJson(`${apiUrl}/uploads/${session.upload_id}/complete?profile=true`, {method: 'POST'});
+        window.localStorage.removeItem(resumeKey);
+        return waitForJob(apiUrl, job);
+    }
+
+    // Poll a backend job until it finishes, showing its progress on the bar
+    async function waitForJob(apiUrl, job) {
+        while (job.status === 'queued' || job.status === 'running') {
+            showProgress(job.progress, 1, job.message || 'Processing...');
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+            job = await requestJson(`${apiUrl}/jobs/${job.job_id}`);
+        }
+        if (job.status !== 'succeeded') {
+            throw new Error(job.error || `Processing was ${job.status}`);
+        }
+        return job.result;
+    }
+
+    async function start(zone, file) {
+        if (!file) {
+            return;
+        }
+        try {
+            const result = await upload(zone.dataset.apiUrl, file);
+            setProps('uploaded-data-store', {data: {...result, uploaded_at: Date.now()}});
+        } catch (e) {
+            setProps('uploaded-data-store', {data: {filename: file.name, error: e.message, uploaded_at: Date.now()}});
+        } finally {
+            hideProgress();
+        }
+    }
+
+    // Dash has no file input component, so the picker is a hidden <input type=file>
+    // added to the page the first time it is needed
+    function fileInput() {
+        let input = document.getElementById('upload-file-input');
+        if (!input) {
+            input = document.createElement('input');
+            input.type = 'file';
+            input.id = 'upload-file-input';
+            input.style.display = 'none';
+            document.body.appendChild(input);
+        }
+        return input;
+    }
+
+    // Dash renders the components after this script loads, so listen on the document
+    document.addEventListener('click', event => {
+        if (event.target.closest('#upload-dataset')) {
+            fileInput().click();
+        }
+    });
+    document.addEventListener('change', event => {
+        if (event.target.id === 'upload-file-input') {
+            const zone = document.getElementById('upload-dataset');
+            start(zone, event.target.files[0]);
+            event.target.value = '';
+        }
+    });
+    document.addEventListener('dragover', event => {
+        if (event.target.closest('#upload-dataset')) {
+            event.preventDefault();
+        }
+    });
+    document.addEventListener('drop', event => {
+        const zone = event.target.closest('#upload-dataset');
+        if (zone) {
+            event.preventDefault();
+            start(zone, event.dataTransfer.files[0]);
+        }
+    });
+})();
@@ -1,89 +1,827 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, Header, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+import asyncio
+import itertools
+import json
 import shutil
 import os
-import pandas as pd
+import tempfile
+import threading
+import time
+import numpy as np
+
+from benchmark import DEFAULT_SEED, DEFAULT_SPLITS, ESTIMATORS, run_benchmark
+from cache import dataset_cache
+from catalog import Catalog
+from chunk_store import collect_garbage, read_blocks, storage_stats, store_blocks
+from encoding import (STREAM_MEDIA_TYPES, dumps, encode_table, frame_columns, negotiate_format,
+                      negotiate_stream_format, stream_frames)
+from feature_store import feature_store
+from jobs import FINISHED_STATES, JobLimitError, job_manager
+from metrics import Gauge, MetricsMiddleware, registry, span
+from profiling import profile_chunks
+from quality import key_candidates, scan_quality
+from query import QueryError, query_limits, run_spec, run_sql
+from schema import SCHEMA_SAMPLE_ROWS, SchemaMismatch, add_footprint, fit_schema, infer_schema
+from storage import (append_csv, columnar_metadata, convert_to_columnar, estimate_rows, fresh_columnar_paths,
+                     iter_chunks, load_profile_state, load_schema, read_preview, save_profile_state, save_schema)
+from table import ROW_NUMBER_COLUMN, ordered_row_ids, take_rows
+from visualize import density_grid, group_by, histogram, line_series
+from uploads import (UploadError, abort_upload, complete_upload, init_upload, load_session,
+                     received_parts, write_part)
 
 app = FastAPI()
 
+# The browser streams upload parts straight to the API, so the Dash origin must be allowed
+CORS_ORIGINS = os.environ.get("BENCHVIZ_CORS_ORIGINS", "http://localhost:8050,http://127.0.0.1:8050").split(",")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    # Lets browser devtools show the per-stage timings of cross-origin calls
+    expose_headers=["Server-Timing"],
+)
+
+# Latency histograms, in-flight count and Server-Timing headers for every request
+app.add_middleware(MetricsMiddleware)
+
+# Dataset cache and feature store counters, read from them at scrape time
+CACHE_STATS = registry.register(Gauge("benchviz_cache", "Dataset cache statistics", ("stat",)))
+FEATURE_STORE_STATS = registry.register(Gauge("benchviz_feature_store", "Feature store statistics", ("stat",)))
+
+def collect_cache_stats():
+    for stat, value in dataset_cache.stats().items():
+        CACHE_STATS.set(value, stat=stat)
+    for stat, value in feature_store.stats().items():
+        FEATURE_STORE_STATS.set(value, stat=stat)
+
+registry.collectors.append(collect_cache_stats)
+
+# Largest page the row endpoint will return
+MAX_PAGE_ROWS = 1000
+
+# How often the job event stream checks for changes (seconds)
+JOB_EVENT_INTERVAL = 0.5
+
 # Create a directory to store uploaded datasets
 UPLOAD_FOLDER = "datasets"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Searchable index of the uploaded datasets and their summaries
+catalog = Catalog(os.path.join(UPLOAD_FOLDER, ".catalog.sqlite3"))
+
 @app.get("/")
 def home():
     return {"message": "Dataset Benchmarking API"}
 
-# Endpoint to upload dataset files
+# Endpoint to upload dataset files. Returns an ingest job (poll /jobs/{job_id});
+# with ?profile=true its result also carries the profile and preview.
 @app.post("/upload/")
-async def upload_dataset(file: UploadFile = File(...)):
+def upload_dataset(file: UploadFile = File(...), profile: bool = False, x_user_id: str = Header("anonymous")):
     file_path = os.path.join(UPLOAD_FOLDER, file.filename)
     
-    # Save the uploaded file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save the uploaded file, storing only chunks no dataset holds yet
+    with span("write"):
+        stored = store_blocks(file_path, read_blocks(file.file))
+
+    return submit_job("ingest", x_user_id, ingest_job, file.filename, file_path, stored, profile,
+                      description=file.filename)
+
+class UploadInit(BaseModel):
+    filename: str
+    size: int
+    part_size: int = None
+
+# Endpoint to start a chunked, resumable upload
+@app.post("/uploads/")
+def start_chunked_upload(body: UploadInit):
+    try:
+        return init_upload(UPLOAD_FOLDER, body.filename, body.size, body.part_size)
+    except UploadError as e:
+        return {"error": str(e)}
+
+# Endpoint to store one part of a chunked upload (raw bytes, optional SHA-256 header)
+@app.put("/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, request: Request,
+                      x_part_checksum: str = Header(None)):
+    try:
+        return await write_part(UPLOAD_FOLDER, upload_id, part_number, request.stream(), x_part_checksum)
+    except UploadError as e:
+        return {"error": str(e)}
+
+# Endpoint to list the parts received so far, used to resume an interrupted upload
+@app.get("/uploads/{upload_id}")
+def get_chunked_upload(upload_id: str):
+    try:
+        session = load_session(UPLOAD_FOLDER, upload_id)
+        session["received_parts"] = received_parts(UPLOAD_FOLDER, upload_id)
+        return session
+    except UploadError as e:
+        return {"error": str(e)}
+
+# Endpoint to assemble the parts into the dataset file; returns an ingest job as /upload/ does
+@app.post("/uploads/{upload_id}/complete")
+def finish_chunked_upload(upload_id: str, profile: bool = False, x_user_id: str = Header("anonymous")):
+    try:
+        filename, file_path, stored = complete_upload(UPLOAD_FOLDER, upload_id)
+    except UploadError as e:
+        return {"error": str(e)}
+    return submit_job("ingest", x_user_id, ingest_job, filename, file_path, stored, profile, description=filename)
+
+# Endpoint to abandon a chunked upload
+@app.delete("/uploads/{upload_id}")
+def cancel_chunked_upload(upload_id: str):
+    try:
+        abort_upload(UPLOAD_FOLDER, upload_id)
+    except UploadError as e:
+        return {"error": str(e)}
+    return {"upload_id": upload_id, "status": "aborted"}
+
+class BenchmarkRequest(BaseModel):
+    dataset: str
+    target: str
+    estimators: list = ["random_forest", "svm"]
+    n_splits: int = DEFAULT_SPLITS
+    random_state: int = DEFAULT_SEED
+
+# Endpoint to list the estimators the benchmark can run
+@app.get("/benchmark/estimators")
+def list_estimators():
+    return {"estimators": list(ESTIMATORS)}
+
+# Endpoint to cross-validate estimators on a dataset, streaming one JSON line per fold
+@app.post("/benchmark/")
+def benchmark_dataset(body: BenchmarkRequest):
+    file_path = os.path.join(UPLOAD_FOLDER, body.dataset)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    events = run_benchmark(file_path, body.target, body.estimators, body.n_splits, body.random_state)
+    try:
+        # Validation and feature encoding happen before the first event
+        first = next(events)
+    except Exception as e:
+        return {"error": str(e)}
+    
+    lines = (json.dumps(event) + "\n" for event in itertools.chain([first], events))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+# Endpoint to profile a dataset in the background
+@app.post("/jobs/profile/{filename}")
+def submit_profile_job(filename: str, x_user_id: str = Header("anonymous")):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    return submit_job("profile", x_user_id, profile_job, filename, file_path, description=filename)
+
+# Endpoint to build the columnar copy of a dataset in the background
+@app.post("/jobs/convert/{filename}")
+def submit_convert_job(filename: str, x_user_id: str = Header("anonymous")):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    return submit_job("convert", x_user_id, convert_job, file_path, description=filename)
+
+# Endpoint to run the data-quality scan in the background
+@app.post("/jobs/quality/{filename}")
+def submit_quality_job(filename: str, keys: str = None, x_user_id: str = Header("anonymous")):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
     
-    return {"filename": file.filename, "status": "uploaded"}
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    return submit_job("quality", x_user_id, quality_job, file_path, keys, description=filename)
 
-# Endpoint to list uploaded datasets
+# Endpoint to run a benchmark in the background
+@app.post("/jobs/benchmark")
+def submit_benchmark_job(body: BenchmarkRequest, x_user_id: str = Header("anonymous")):
+    file_path = os.path.join(UPLOAD_FOLDER, body.dataset)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    return submit_job("benchmark", x_user_id, benchmark_job, file_path, body,
+                      description=f"{body.dataset} -> {body.target}")
+
+# Endpoint to list a user's jobs
+@app.get("/jobs/")
+def list_jobs(x_user_id: str = Header(None)):
+    return {"jobs": [job.to_dict() for job in job_manager.list(x_user_id)]}
+
+# Endpoint to poll the status, progress and ETA of a job
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    return job.to_dict()
+
+# Endpoint to follow a job as server-sent events until it finishes
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+
+    async def stream():
+        version = None
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.status in FINISHED_STATES:
+                break
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# Endpoint to cancel a queued or running job
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    return job.to_dict()
+
+def submit_job(kind, user, fn, *args, description=None):
+    try:
+        job = job_manager.submit(kind, user, fn, *args, description=description)
+    except JobLimitError as e:
+        return {"error": str(e)}
+    return job.to_dict()
+
+# Turn a running row count into progress against the estimated total
+def row_progress(job, file_path, verb):
+    expected = estimate_rows(file_path)
+    return lambda rows: job.report(min(rows / expected, 0.99) if expected else None, f"{rows:,} rows {verb}")
+
+def profile_job(job, filename, file_path):
+    job.report(0.0, "Profiling")
+    return load_profile(filename, file_path, row_progress(job, file_path, "profiled"))
+
+def convert_job(job, file_path):
+    job.report(0.0, "Converting")
+    path = convert_to_columnar(file_path, progress=row_progress(job, file_path, "converted"))
+    if path is None:
+        raise RuntimeError("pyarrow is not installed")
+    return {"filename": os.path.basename(file_path), "status": "converted"}
+
+def quality_job(job, file_path, keys):
+    job.report(0.0, "Scanning")
+    result = load_quality(file_path, keys, row_progress(job, file_path, "scanned"))
+    return {"filename": os.path.basename(file_path), **result}
+
+def benchmark_job(job, file_path, body):
+    job.report(0.0, "Encoding features")
+    result = {"folds": [], "summary": None}
+    events = run_benchmark(file_path, body.target, body.estimators, body.n_splits, body.random_state)
+    try:
+        total = 1
+        for event in events:
+            if event["event"] == "start":
+                total = event["jobs"]
+                result.update(rows=event["rows"], classes=event["classes"])
+            elif event["event"] == "fold":
+                result["folds"].append(event)
+            elif event["event"] == "summary":
+                result["summary"] = event["models"]
+            # Publish a copy so pollers never see the list mid-append
+            job.report(len(result["folds"]) / total, f"{len(result['folds'])}/{total} folds done",
+                       dict(result, folds=list(result["folds"])))
+    finally:
+        events.close()
+    return result
+
+# Work shared by every upload path once the file is in place, run as a job so
+# the upload request returns as soon as the bytes are stored. `stored` is what
+# the chunk store reported for the upload; with `profile` the result also
+# carries the profile built from the sketches made here.
+def ingest_job(job, filename, file_path, stored=None, profile=False):
+    # Re-uploading identical contents leaves the manifest untouched, so the
+    # columnar copy, sketches and schema built for it are all still fresh
+    unchanged = stored is not None and stored["unchanged"]
+    if not unchanged:
+        # Anything cached for the previous version of this file is now stale
+        dataset_cache.invalidate(file_path)
+    if stored is not None and stored["replaced"]:
+        collect_garbage(UPLOAD_FOLDER)
+
+    # Keep a typed columnar copy so later reads skip CSV parsing
+    job.report(0.0, "Converting")
+    try:
+        with span("convert"):
+            if unchanged and fresh_columnar_paths(file_path) is not None:
+                columnar = True
+            else:
+                columnar = convert_to_columnar(file_path) is not None
+    except Exception:
+        columnar = False
+
+    # Build the column sketches once, so profiles never rescan the file
+    job.report(0.25, "Sketching columns")
+    try:
+        with span("sketches"):
+            sketched = profile_state(file_path) is not None
+    except Exception:
+        sketched = False
+
+    # Infer compact dtypes once; later loads reuse them
+    job.report(0.5, "Inferring schema")
+    try:
+        with span("schema"):
+            optimized = schema_state(file_path) is not None
+    except Exception:
+        optimized = False
+
+    job.report(0.75, "Cataloguing")
+    with span("catalog"):
+        catalog_dataset(filename, file_path, uploaded_at=time.time())
+    
+    result = {"filename": filename, "status": "unchanged" if unchanged else "uploaded", "columnar": columnar,
+              "sketches": sketched, "schema": optimized}
+    if stored is not None:
+        result["storage"] = {key: stored[key] for key in ("size", "chunks", "new_chunks", "stored_bytes")}
+    if profile:
+        job.report(0.9, "Profiling")
+        try:
+            with span("profile"):
+                result["profile"] = load_profile(filename, file_path)
+        except Exception as e:
+            result["profile"] = {"error": str(e)}
+    return result
+
+# Endpoint to list uploaded datasets from the catalog: one page, sorted by name,
+# size, rows, cols or uploaded_at, optionally searched by name and filtered by size
 @app.get("/datasets/")
-async def list_datasets():
-    files = os.listdir(UPLOAD_FOLDER)
-    return {"datasets": files}
+def list_datasets(search: str = None, sort_by: str = "name", sort_dir: str = "asc", offset: int = 0,
+                  limit: int = 100, min_rows: int = None, max_rows: int = None, min_cols: int = None,
+                  max_cols: int = None, min_size: int = None, max_size: int = None):
+    try:
+        page = catalog.list(search, sort_by, sort_dir, offset, limit, min_rows, max_rows, min_cols, max_cols,
+                            min_size, max_size)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"datasets": [item["name"] for item in page["items"]], **page}
+
+# Endpoint to get a dataset's catalog entry: schema, content hash and summary statistics
+@app.get("/datasets/{filename}")
+def get_catalog_entry(filename: str):
+    entry = catalog.get(filename)
+    if entry is None:
+        return {"error": "File not found"}
+    return entry
+
+# Record a dataset in the catalog with its profile (when one can be built)
+def catalog_dataset(filename, file_path, uploaded_at=None):
+    try:
+        content_hash = dataset_cache.fingerprint(file_path)[-1]
+        profile = load_profile(filename, file_path)
+    except Exception:
+        content_hash, profile = None, None
+    catalog.upsert(filename, file_path, content_hash, profile, uploaded_at)
+
+# Files already in the folder (e.g. from before the catalog existed) are added
+# with the sketches stored for them; a missing profile is not built here
+def describe_existing(filename, file_path):
+    if load_profile_state(file_path) is None:
+        return None
+    try:
+        return load_profile(filename, file_path)
+    except Exception:
+        return None
 
 # Endpoint to get CSV data
+# (plain def: FastAPI runs it on the threadpool so parsing never blocks the event loop)
 @app.get("/dataset/{filename}")
-async def get_dataset(filename: str):
+def get_dataset(filename: str, format: str = None, accept: str = Header(None)):
     file_path = os.path.join(UPLOAD_FOLDER, filename)
     
     if not os.path.exists(file_path):
         return {"error": "File not found"}
     
     try:
-        # Read the full dataset first to get accurate statistics
-        full_df = pd.read_csv(file_path)
-        
-        # Calculate statistics from the full dataset
-        total_rows = len(full_df)
-        total_cols = len(full_df.columns)
-        missing_values = full_df.isna().sum().sum()
-        
-        # Get column types
-        column_types = {col: str(full_df[col].dtype) for col in full_df.columns}
-        
-         # Calculate summary statistics for numeric columns
-        summary_stats = {}
-        numeric_columns = list(full_df.select_dtypes(include=['number']).columns)
-        
-        for col in numeric_columns:
-            summary_stats[col] = {
-                'mean': float(full_df[col].mean()),
-                'std': float(full_df[col].std()),
-                'min': float(full_df[col].min()),
-                'max': float(full_df[col].max())
-            }
-        
-        # Now limit to 100 rows for display
-        df = full_df.head(100)
-        
-        # Add a row number (like Excel's leftmost index column)
-        df.insert(0, "Row #", range(1, len(df) + 1))
+        with span("profile"):
+            profile = load_profile(filename, file_path)
+    except Exception as e:
+        return {"error": str(e)}
+    return table_response(profile, "data", negotiate_format(format, accept))
 
-        # Replace NaN with None for proper JSON serialization
-        df_json = df.replace({pd.NA: None}).replace({float('nan'): None})
+# Endpoint to page through a dataset with sorting and filtering applied to every row
+@app.get("/dataset/{filename}/rows")
+def get_dataset_rows(filename: str, offset: int = 0, limit: int = 10, sort_by: str = None,
+                     sort_dir: str = "asc", filter_query: str = None, format: str = None,
+                     accept: str = Header(None)):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        offset = max(offset, 0)
+        limit = min(max(limit, 0), MAX_PAGE_ROWS)
 
-        data = df_json.to_dict(orient="records")
-        columns = df.columns.tolist()
+        # The filtered/sorted row order is cached per query, so paging is cheap
+        with span("order"):
+            row_ids = dataset_cache.get_or_load(
+                file_path, ("rows", sort_by, sort_dir, filter_query),
+                lambda path: ordered_row_ids(path, sort_by, sort_dir, filter_query)
+            )
+        if row_ids is None:
+            total_rows = load_profile(filename, file_path)["total_rows"]
+            page_ids = np.arange(offset, min(offset + limit, total_rows))
+        else:
+            total_rows = len(row_ids)
+            page_ids = row_ids[offset:offset + limit]
+
+        with span("take"):
+            df = take_rows(file_path, page_ids).reset_index(drop=True)
+        df.insert(0, ROW_NUMBER_COLUMN, page_ids + 1)
         
-        return {
+        page = {
             "filename": filename,
-            "columns": columns,
-            "data": data,
-            "total_rows": total_rows,
-            "total_cols": total_cols,
-            "missing_values": int(missing_values),
-            "column_types": column_types,
-            "summary_stats": summary_stats,
-            "numeric_columns": numeric_columns
+            "columns": df.columns.tolist(),
+            "offset": offset,
+            "limit": limit,
+            "total_rows": total_rows
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+    return table_response(page, "data", negotiate_format(format, accept), frame=df)
+
+# Appends to the same CSV must not interleave
+append_lock = threading.Lock()
+
+# Endpoint to append new rows (a CSV with the dataset's header) as a new
+# partition; statistics are updated from the new rows alone
+@app.post("/dataset/{filename}/append")
+def append_dataset(filename: str, file: UploadFile = File(...), profile: bool = False):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    # The delta is staged as a hidden file until it has been checked
+    fd, delta_path = tempfile.mkstemp(dir=UPLOAD_FOLDER, prefix=".append-", suffix=".csv")
+    try:
+        with span("write"), os.fdopen(fd, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        with span("append"), append_lock:
+            result = {"filename": filename, "status": "appended", **append_rows(file_path, delta_path)}
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        os.remove(delta_path)
+    
+    if profile:
+        try:
+            with span("profile"):
+                result["profile"] = load_profile(filename, file_path)
+        except Exception as e:
+            result["profile"] = {"error": str(e)}
+    return Response(dumps(result), media_type="application/json")
+
+# Endpoint to build (or rebuild) the columnar copy of a dataset
+@app.post("/dataset/{filename}/convert")
+def convert_dataset(filename: str):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        path = convert_to_columnar(file_path)
+    except Exception as e:
+        return {"error": str(e)}
+    if path is None:
+        return {"error": "pyarrow is not installed"}
+    return {"filename": filename, "status": "converted"}
+
+# Endpoint to inspect the dtypes and row-group statistics of the columnar copy
+@app.get("/dataset/{filename}/columnar")
+def get_columnar_metadata(filename: str):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    metadata = columnar_metadata(file_path)
+    if metadata is None:
+        return {"error": "No columnar copy for this dataset"}
+    return metadata
+
+# Endpoint to read quantiles, distinct counts and top values from the stored sketches
+@app.get("/dataset/{filename}/sketch")
+def get_dataset_sketch(filename: str, column: str = None, quantiles: str = "0.05,0.25,0.5,0.75,0.95",
+                       top_k: int = 10):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        qs = [float(q) for q in quantiles.split(",") if q.strip()]
+        if any(q < 0 or q > 1 for q in qs):
+            return {"error": "Quantiles must be between 0 and 1"}
+        profile = dataset_cache.get_or_load(file_path, "profile_state", profile_state)
+        if column is not None and column not in profile.columns:
+            return {"error": f"Unknown column: {column}"}
+
+        numeric_columns = set(profile.numeric_columns())
+        categorical_stats = profile.categorical_stats(top_k)
+        columns = {}
+        for col in [column] if column is not None else profile.columns:
+            stats = {
+                "dtype": str(profile.dtypes[col]),
+                "nulls": profile.nulls[col],
+                "distinct": profile.distinct_count(col),
+                "distinct_exact": col in profile.value_counts or (
+                    col in profile.distinct and profile.distinct[col].hashes is not None),
+            }
+            if col in numeric_columns:
+                sketch = profile.quantile_sketches[col]
+                stats["quantiles"] = dict(zip((str(q) for q in qs), profile.quantiles(col, qs)))
+                stats["quantiles_exact"] = sketch.exact
+            else:
+                stats["top"] = categorical_stats[col]["top"]
+                stats["top_exact"] = categorical_stats[col]["exact"]
+            columns[col] = stats
+        return {"filename": filename, "total_rows": profile.total_rows, "columns": columns}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Endpoint to get chart-ready aggregates (histogram, density, groupby or line) whose
+# size depends on the requested resolution, never on the number of rows
+@app.get("/dataset/{filename}/visualize")
+def get_visualization(filename: str, kind: str = "histogram", x: str = None, y: str = None, agg: str = "count",
+                      bins: int = 50, points: int = 1000, limit: int = 50, x_min: float = None,
+                      x_max: float = None, y_min: float = None, y_max: float = None):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        profile = dataset_cache.get_or_load(file_path, "profile_state", profile_state)
+        for col in (x, y):
+            if col is not None and col not in profile.columns:
+                return {"error": f"Unknown column: {col}"}
+
+        if kind == "histogram":
+            if x is None:
+                return {"error": "A histogram needs an x column"}
+            x_range = value_range(profile, x, x_min, x_max)
+            build = lambda path: histogram(path, x, *x_range, bins=bins)
+        elif kind == "density":
+            if x is None or y is None:
+                return {"error": "A density grid needs x and y columns"}
+            x_range, y_range = value_range(profile, x, x_min, x_max), value_range(profile, y, y_min, y_max)
+            build = lambda path: density_grid(path, x, y, x_range, y_range, bins=bins)
+        elif kind == "groupby":
+            if x is None:
+                return {"error": "A group-by needs an x (key) column"}
+            build = lambda path: group_by(path, x, y, agg, limit)
+        elif kind == "line":
+            if y is None:
+                return {"error": "A line series needs a y column"}
+            x_range = (x_min, x_max) if x_min is not None and x_max is not None else None
+            build = lambda path: line_series(path, y, x, x_range, points)
+        else:
+            return {"error": f"Unknown chart kind: {kind}"}
+
+        result = dataset_cache.get_or_load(
+            file_path, ("visualize", kind, x, y, agg, bins, points, limit, x_min, x_max, y_min, y_max), build
+        )
+        return {"filename": filename, "kind": kind, **result}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Endpoint to check a dataset for duplicate rows, repeated keys, constant columns
+# and near-copy columns in one bounded-memory pass (?keys=a,b picks the key columns)
+@app.get("/dataset/{filename}/quality")
+def get_dataset_quality(filename: str, keys: str = None):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        with span("quality"):
+            return {"filename": filename, **load_quality(file_path, keys)}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Quality report, cached until the file changes. Key columns default to the
+# identifier-like ones (by name, or exactly unique though nearly unique in the sketches).
+def load_quality(file_path, keys=None, progress=None):
+    if keys is None:
+        key_columns, possible_keys = key_candidates(profile_state(file_path))
+    else:
+        key_columns, possible_keys = [key.strip() for key in keys.split(",") if key.strip()], []
+    return dataset_cache.get_or_load(
+        file_path, ("quality", tuple(key_columns), tuple(possible_keys)),
+        lambda path: scan_quality(path, key_columns, possible_keys, progress=progress))
+
+# Endpoint to get the optimized schema and its before/after memory footprint
+@app.get("/dataset/{filename}/schema")
+def get_dataset_schema(filename: str):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    try:
+        return {"filename": filename, **schema_state(file_path)}
+    except Exception as e:
+        return {"error": str(e)}
+
+class QueryRequest(BaseModel):
+    sql: str = None
+    select: list = None
+    where: list = None
+    group_by: list = None
+    aggregates: list = None
+    order_by: list = None
+    limit: int = None
+    timeout: float = None
+    format: str = "ndjson"
+
+# Endpoint to query a dataset with SQL (needs DuckDB; the dataset is the table
+# `data`) or a structured select/where/group_by spec. Only the referenced
+# columns and matching row groups are read, and results stream in chunks.
+@app.post("/dataset/{filename}/query")
+def query_dataset(filename: str, body: QueryRequest):
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    
+    fmt = negotiate_stream_format(body.format)
+    limit, timeout = query_limits(body.limit, body.timeout)
+    try:
+        with span("query"):
+            if body.sql:
+                chunks = run_sql(file_path, body.sql, limit, timeout)
+            else:
+                spec = body.model_dump(include={"select", "where", "group_by", "aggregates", "order_by"})
+                chunks = run_spec(file_path, spec, limit, timeout)
+            # Bad queries, aggregations and sorts fail here, before the response starts
+            first = next(chunks)
+    except Exception as e:
+        return {"error": str(e)}
+    
+    return StreamingResponse(query_stream(itertools.chain([first], chunks), fmt),
+                             media_type=STREAM_MEDIA_TYPES[fmt], headers={"X-Query-Row-Limit": str(limit)})
+
+# Once streaming has begun the status is sent, so a timeout becomes the last
+# NDJSON line (other formats end with a truncated stream)
+def query_stream(chunks, fmt):
+    try:
+        yield from stream_frames(chunks, fmt)
+    except QueryError as e:
+        if fmt != "ndjson":
+            raise
+        yield dumps({"error": str(e)}) + b"\n"
+
+# Requested axis range, defaulting to the column's min/max from the profile
+def value_range(profile, column, lo=None, hi=None):
+    if column not in profile.numeric_columns():
+        raise ValueError(f"Column {column} is not numeric")
+    _, _, _, col_min, col_max = profile.moments[column]
+    return (col_min if lo is None else lo, col_max if hi is None else hi)
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Endpoint to inspect the dataset cache counters
+@app.get("/cache/stats")
+def cache_stats():
+    return dataset_cache.stats()
+
+# Endpoint to see how much the chunk store saves: dataset bytes against bytes on disk
+@app.get("/storage/stats")
+def chunk_storage_stats():
+    return storage_stats(UPLOAD_FOLDER)
+
+# The profile is cached until the file changes on disk
+def load_profile(filename, file_path, progress=None):
+    return dataset_cache.get_or_load(file_path, "profile", lambda path: build_profile(filename, path, progress))
+
+# Rows as records (default), column arrays or Arrow IPC, per format/Accept negotiation
+def table_response(payload, key, fmt, frame=None):
+    with span("encode"):
+        content, media_type = encode_table(payload, key, fmt, frame)
+    return Response(content, media_type=media_type)
+
+# Sketches stored at ingest, or one streaming pass over the file (stored for next time)
+def profile_state(file_path, progress=None):
+    profile = load_profile_state(file_path)
+    if profile is None:
+        with span("scan"):
+            profile = profile_chunks(iter_chunks(file_path), progress)
+        # The sidecar only saves a rescan next time; failing to write it must not fail the request
+        try:
+            save_profile_state(file_path, profile)
+        except (OSError, TypeError, ValueError):
+            pass
+    return profile
+
+# Stored schema, or one inferred from a sample plus the profile and checked
+# against the whole file (stored for next time)
+def schema_state(file_path):
+    state = load_schema(file_path)
+    if state is None:
+        profile = profile_state(file_path)
+        schema = infer_schema(read_preview(file_path, nrows=SCHEMA_SAMPLE_ROWS), profile)
+        schema, memory = fit_schema(iter_chunks(file_path), schema)
+        state = {"schema": schema, "memory": memory}
+        save_schema(file_path, state["schema"], state["memory"])
+    return state
+
+# Add a delta to a dataset and merge the delta's statistics into the stored
+# sketches, so the work follows the size of the delta, not of the dataset
+def append_rows(file_path, delta_path):
+    profile = profile_state(file_path)
+    stored = load_schema(file_path)
+    memory = stored["memory"] if stored is not None else None
+    fits = memory is not None
+
+    def track_memory(chunk):
+        nonlocal fits
+        if fits:
+            try:
+                add_footprint(memory, chunk, stored["schema"])
+            except SchemaMismatch:
+                fits = False
+
+    delta = append_csv(file_path, delta_path, profile.columns, profile.dtypes, on_chunk=track_memory)
+    if delta.total_rows:
+        dataset_cache.invalidate(file_path)
+        profile.merge(delta)
+        save_profile_state(file_path, profile)
+        # A schema the new rows fit (and the merged statistics still pick) stays;
+        # otherwise it is inferred again on next use. Columns fit_schema dropped
+        # still hold the values that did not fit, so they stay out.
+        inferred = infer_schema(read_preview(file_path, nrows=SCHEMA_SAMPLE_ROWS), profile) if fits else {}
+        if fits and {col: dtype for col, dtype in inferred.items() if col in stored["schema"]} == stored["schema"]:
+            save_schema(file_path, stored["schema"], memory)
+        catalog_dataset(os.path.basename(file_path), file_path)
+    return {"rows_appended": delta.total_rows, "total_rows": profile.total_rows,
+            "partitions": len(fresh_columnar_paths(file_path) or [])}
+
+# Build the /dataset/{filename} response without rescanning the file when sketches exist
+def build_profile(filename, file_path, progress=None):
+    # Statistics come from mergeable sketches, so memory stays flat for any file size
+    profile = profile_state(file_path, progress)
+    
+    total_rows = profile.total_rows
+    total_cols = len(profile.columns)
+    missing_values = sum(profile.nulls.values())
+    
+    # Get column types
+    column_types = {col: str(profile.dtypes[col]) for col in profile.columns}
+    
+    # Summary statistics for numeric columns, cardinality/top values for the rest
+    numeric_columns = profile.numeric_columns()
+    summary_stats = profile.summary_stats()
+    categorical_stats = profile.categorical_stats()
+    
+    # Memory saved by the optimized schema, if one was inferred at ingest
+    stored_schema = load_schema(file_path)
+    memory = stored_schema["memory"] if stored_schema else None
+    
+    # Only the first 100 rows are read for display
+    with span("preview"):
+        df = read_preview(file_path, nrows=100)
+    
+    # Add a row number (like Excel's leftmost index column)
+    df.insert(0, ROW_NUMBER_COLUMN, range(1, len(df) + 1))
+
+    # Kept as column arrays; records are only built if a client asks for them
+    data = frame_columns(df)
+    columns = df.columns.tolist()
+    
+    return {
+        "filename": filename,
+        "columns": columns,
+        "data": data,
+        "total_rows": total_rows,
+        "total_cols": total_cols,
+        "missing_values": int(missing_values),
+        "column_types": column_types,
+        "summary_stats": summary_stats,
+        "categorical_stats": categorical_stats,
+        "numeric_columns": numeric_columns,
+        "memory": memory
+    }
+
+
+# Bring the catalog up to date with the folder once everything above is defined,
+# and drop chunks left behind by replaced uploads
+catalog.sync(UPLOAD_FOLDER, describe_existing)
+collect_garbage(UPLOAD_FOLDER)
@@ -0,0 +1,200 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from cache import dataset_cache
+from feature_store import cache_key, feature_store, load_array, load_meta
+from storage import read_columns
+
+# Estimators that can be benchmarked, built fresh for every fold
+ESTIMATORS = {
+    "random_forest": lambda seed, **params: RandomForestClassifier(
+        **{"n_estimators": 100, "random_state": seed, **params}),
+    "svm": lambda seed, **params: SVC(
+        **{"kernel": "rbf", "C": 1.0, "gamma": "scale", "random_state": seed, **params}),
+    "logistic_regression": lambda seed, **params: LogisticRegression(
+        **{"max_iter": 1000, "random_state": seed, **params}),
+    "decision_tree": lambda seed, **params: DecisionTreeClassifier(**{"random_state": seed, **params}),
+    "gradient_boosting": lambda seed, **params: GradientBoostingClassifier(**{"random_state": seed, **params}),
+    "knn": lambda seed, **params: KNeighborsClassifier(**params),
+}
+
+DEFAULT_SPLITS = 5
+DEFAULT_SEED = 42
+
+# What encode_features() does; part of the feature cache key, so bump the version
+# whenever the encoding changes
+PREPROCESSING = {"version": 1, "impute": "median", "text": "factorize", "scale": "minmax", "dtype": "float32",
+                 "target": "factorize-sorted"}
+
+# Longest gap between events while folds are running
+HEARTBEAT_SECONDS = 1.0
+
+
+# Estimator specs are either a registry name or {"name": ..., "params": {...}}
+def normalize_estimators(estimators):
+    specs = []
+    for spec in estimators:
+        if isinstance(spec, str):
+            spec = {"name": spec}
+        name = spec.get("name")
+        if name not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator: {name}")
+        specs.append({"name": name, "params": spec.get("params") or {}})
+    return specs
+
+
+# Encode a dataset the way the notebook does: numeric features with missing
+# values filled by the median, text features as integer codes, everything
+# min-max scaled to float32, and the target label-encoded
+def encode_features(df, target):
+    df = df[df[target].notna()]
+    y, classes = pd.factorize(df[target], sort=True)
+
+    features = []
+    for col in df.columns:
+        if col == target:
+            continue
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            values = values.astype("float64")
+            values = values.fillna(values.median())
+        else:
+            values = pd.Series(pd.factorize(values)[0], index=values.index).astype("float64")
+        features.append(values.to_numpy())
+    X = np.column_stack(features).astype(np.float32) if features else np.zeros((len(df), 0), np.float32)
+
+    # Min-max scaling, leaving constant columns at zero
+    lo, hi = X.min(axis=0, initial=np.inf), X.max(axis=0, initial=-np.inf)
+    span = np.where(hi > lo, hi - lo, 1).astype(np.float32)
+    X = np.nan_to_num((X - lo) / span).astype(np.float32)
+    return X, y.astype(np.int64), [str(c) for c in classes]
+
+
+# Fold number of every row, so workers can rebuild train/test splits locally
+def fold_assignments(y, n_splits, seed):
+    folds = np.empty(len(y), dtype=np.int16)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for fold, (_, test_idx) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[test_idx] = fold
+    return folds
+
+
+# Encoded matrix for (dataset contents, target, preprocessing) from the feature
+# store, encoding the dataset only on a miss. Returns (folder, key).
+def cached_features(file_path, target, store=feature_store):
+    content_hash = dataset_cache.fingerprint(file_path)[-1]
+    key = cache_key(dataset=content_hash, target=target, preprocessing=PREPROCESSING)
+
+    def build():
+        df = read_columns(file_path, optimize=True)
+        if target not in df.columns:
+            raise ValueError(f"Unknown target column: {target}")
+        X, y, classes = encode_features(df, target)
+        return {"X": X, "y": y}, {"classes": classes, "target": target, "dataset": content_hash}
+
+    return store.get_or_build(key, build), key
+
+
+# Fold assignments for an encoded matrix, split and seed, also from the store
+def cached_folds(features_key, y, n_splits, seed, store=feature_store):
+    key = cache_key(features=features_key, n_splits=n_splits, seed=seed)
+    return store.get_or_build(key, lambda: ({"folds": fold_assignments(y, n_splits, seed)}, {}))
+
+
+# Per-process views of the shared arrays, opened once by the pool initializer
+_shared = {}
+
+
+def _open_shared(features_folder, folds_folder):
+    _shared["X"] = load_array(features_folder, "X")
+    _shared["y"] = load_array(features_folder, "y")
+    _shared["folds"] = load_array(folds_folder, "folds")
+
+
+def _run_fold(name, params, fold, seed):
+    X, y, folds = _shared["X"], _shared["y"], _shared["folds"]
+    test = folds == fold
+    model = ESTIMATORS[name](seed, **params)
+
+    start = time.perf_counter()
+    model.fit(X[~test], y[~test])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = model.predict(X[test])
+    predict_time = time.perf_counter() - start
+
+    return {
+        "model": name,
+        "fold": fold,
+        "accuracy": float(accuracy_score(y[test], predicted)),
+        "f1_macro": float(f1_score(y[test], predicted, average="macro")),
+        "fit_time": fit_time,
+        "predict_time": predict_time,
+        "train_rows": int((~test).sum()),
+        "test_rows": int(test.sum()),
+    }
+
+
+# Run every (estimator x fold) job on a process pool and yield results as they
+# finish. The encoded matrix and folds come from the feature store, so repeated
+# runs skip preprocessing, and every worker memory-maps them instead of having
+# them pickled into each job. The last item is a per-model summary.
+def run_benchmark(file_path, target, estimators, n_splits=DEFAULT_SPLITS, seed=DEFAULT_SEED,
+                  max_workers=None):
+    specs = normalize_estimators(estimators)
+    features_folder, features_key = cached_features(file_path, target)
+    y = load_array(features_folder, "y")
+    classes = load_meta(features_folder)["classes"]
+    if len(y) == 0 or np.bincount(y).min() < n_splits:
+        raise ValueError(f"Every class of {target} needs at least {n_splits} rows for {n_splits}-fold CV")
+    folds_folder = cached_folds(features_key, y, n_splits, seed)
+
+    yield {"event": "start", "rows": len(y), "classes": classes, "n_splits": n_splits,
+           "jobs": len(specs) * n_splits}
+
+    max_workers = max_workers or os.cpu_count() or 1
+    results = {spec["name"]: [] for spec in specs}
+    pool = ProcessPoolExecutor(max_workers=min(max_workers, len(specs) * n_splits),
+                               initializer=_open_shared, initargs=(features_folder, folds_folder))
+    try:
+        pending = {pool.submit(_run_fold, spec["name"], spec["params"], fold, seed)
+                   for spec in specs for fold in range(n_splits)}
+        while pending:
+            done, pending = wait(pending, timeout=HEARTBEAT_SECONDS, return_when=FIRST_COMPLETED)
+            if not done:
+                # Lets consumers (e.g. a cancellable job) regain control while folds run
+                yield {"event": "heartbeat"}
+            for future in done:
+                result = future.result()
+                results[result["model"]].append(result)
+                yield {"event": "fold", **result}
+    finally:
+        # If the consumer stops early, drop queued folds instead of waiting for them
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    yield {"event": "summary", "models": summarize(results)}
+
+
+def summarize(results):
+    summary = {}
+    for name, folds in results.items():
+        accuracy = np.array([r["accuracy"] for r in folds])
+        summary[name] = {
+            "accuracy_mean": float(accuracy.mean()),
+            "accuracy_std": float(accuracy.std()),
+            "f1_macro_mean": float(np.mean([r["f1_macro"] for r in folds])),
+            "fit_time_total": float(sum(r["fit_time"] for r in folds)),
+        }
+    return summary
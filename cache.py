@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Default byte budget for everything held in the dataset cache (512 MB)
+DEFAULT_CACHE_BYTES = int(os.environ.get("BENCHVIZ_CACHE_BYTES", 512 * 1024 * 1024))
+
+# Read size used while hashing file contents
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Rough in-memory size of a cached value, used for the byte budget. Other
+# objects (profiles, sketches) report their own size through __sizeof__.
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is not None else 0)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# Process-wide LRU cache for parsed datasets and their computed profiles.
+# Entries are keyed by (kind, path, mtime, size, content hash), so a file that
+# changes on disk never serves stale results, and eviction is driven by the
+# estimated byte size of the cached values.
+class DatasetCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # (path, mtime, size, hash) for a file, re-hashing only when its stat changes
+    def fingerprint(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            known = self._fingerprints.get(path)
+        if known is not None and known[:2] == (st.st_mtime_ns, st.st_size):
+            return (path,) + known
+
+        content_hash = hash_file(path)
+        known = (st.st_mtime_ns, st.st_size, content_hash)
+        with self._lock:
+            self._fingerprints[path] = known
+        return (path,) + known
+
+    def get_or_load(self, path, kind, loader):
+        key = (kind,) + self.fingerprint(path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = loader(path)
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        # Values bigger than the whole budget are returned but never cached
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    # Drop every cached entry for a file (e.g. after it has been overwritten)
+    def invalidate(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._fingerprints.pop(path, None)
+            for key in [k for k in self._entries if k[1] == path]:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared cache used by the API
+dataset_cache = DatasetCache()
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from chunk_store import dataset_size
+
+# Sortable listing columns, each with an index that also orders ties by name
+SORT_COLUMNS = ("name", "size", "rows", "cols", "uploaded_at")
+
+# Largest page the listing returns
+MAX_CATALOG_PAGE = 500
+
+# The trigram name index needs at least 3 characters; shorter searches match
+# name prefixes with a scan
+MIN_SUBSTRING_SEARCH = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    rows INTEGER,
+    cols INTEGER,
+    missing_values INTEGER,
+    content_hash TEXT,
+    uploaded_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    column_types TEXT,
+    stats TEXT
+);
+CREATE INDEX IF NOT EXISTS datasets_size ON datasets (size, name);
+CREATE INDEX IF NOT EXISTS datasets_rows ON datasets (rows, name);
+CREATE INDEX IF NOT EXISTS datasets_cols ON datasets (cols, name);
+CREATE INDEX IF NOT EXISTS datasets_uploaded_at ON datasets (uploaded_at, name);
+CREATE VIRTUAL TABLE IF NOT EXISTS dataset_names USING fts5(name, content='datasets', content_rowid='id',
+                                                            tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS datasets_ai AFTER INSERT ON datasets BEGIN
+    INSERT INTO dataset_names (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS datasets_ad AFTER DELETE ON datasets BEGIN
+    INSERT INTO dataset_names (dataset_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+# Columns returned by list(); the JSON summaries only come with get()
+_LIST_COLUMNS = "name, size, rows, cols, missing_values, content_hash, uploaded_at, updated_at"
+
+
+# Persistent index of uploaded datasets (SQLite, WAL mode), filled in when a
+# file is uploaded, so listing never touches the datasets themselves
+class Catalog:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # Insert or refresh the entry for a dataset. `profile` is the
+    # /dataset/{filename} summary (or None if profiling failed).
+    def upsert(self, name, file_path, content_hash=None, profile=None, uploaded_at=None):
+        now = time.time()
+        profile = profile or {}
+        stats = {key: profile[key] for key in ("summary_stats", "categorical_stats", "memory") if key in profile}
+        values = (dataset_size(file_path), profile.get("total_rows"), profile.get("total_cols"),
+                  profile.get("missing_values"), content_hash, now,
+                  json.dumps(profile["column_types"]) if "column_types" in profile else None,
+                  json.dumps(stats, default=str) if stats else None)
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                "UPDATE datasets SET size = ?, rows = ?, cols = ?, missing_values = ?, content_hash = ?,"
+                " updated_at = ?, column_types = ?, stats = ?" + (", uploaded_at = ?" if uploaded_at else "") +
+                " WHERE name = ?",
+                values + ((uploaded_at,) if uploaded_at else ()) + (name,)).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO datasets (size, rows, cols, missing_values, content_hash, updated_at,"
+                    " column_types, stats, uploaded_at, name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values + (uploaded_at or now, name))
+
+    def remove(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM datasets WHERE name = ?", (name,))
+
+    def names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM datasets")]
+
+    # Full entry, including column types and summary statistics
+    def get(self, name):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_LIST_COLUMNS}, column_types, stats FROM datasets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        stats = entry.pop("stats")
+        entry["column_types"] = json.loads(entry["column_types"]) if entry["column_types"] else None
+        entry.update(json.loads(stats) if stats else {})
+        return entry
+
+    # One page of entries matching `search` anywhere in the name (as a prefix for
+    # 1-2 characters) and the numeric ranges, plus the number of matches. The
+    # page is read straight off the sort column's index.
+    def list(self, search=None, sort_by="name", sort_dir="asc", offset=0, limit=50, min_rows=None,
+             max_rows=None, min_cols=None, max_cols=None, min_size=None, max_size=None):
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        direction = "DESC" if sort_dir == "desc" else "ASC"
+        limit = min(max(int(limit), 0), MAX_CATALOG_PAGE)
+        offset = max(int(offset), 0)
+
+        where, params = [], []
+        if search:
+            if len(search) >= MIN_SUBSTRING_SEARCH:
+                where.append("id IN (SELECT rowid FROM dataset_names WHERE dataset_names MATCH ?)")
+                params.append('"' + search.replace('"', '""') + '"')
+            else:
+                where.append("name LIKE ? ESCAPE '\\'")
+                params.append(_escape_like(search) + "%")
+        for column, lo, hi in (("rows", min_rows, max_rows), ("cols", min_cols, max_cols),
+                               ("size", min_size, max_size)):
+            if lo is not None:
+                where.append(f"{column} >= ?")
+                params.append(lo)
+            if hi is not None:
+                where.append(f"{column} <= ?")
+                params.append(hi)
+
+        condition = " WHERE " + " AND ".join(where) if where else ""
+        order = f"{sort_by} {direction}" if sort_by == "name" else f"{sort_by} {direction}, name {direction}"
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_LIST_COLUMNS} FROM datasets{condition} ORDER BY {order} LIMIT ? OFFSET ?",
+                                      params + [limit, offset]).fetchall()
+            total = self._conn.execute(f"SELECT COUNT(*) FROM datasets{condition}", params).fetchone()[0]
+        return {"items": [dict(row) for row in rows], "total": total, "offset": offset, "limit": limit}
+
+    # Make the catalog match the folder: add files it has never seen (e.g. from
+    # before the catalog existed) and drop entries whose file is gone
+    def sync(self, folder, describe=None):
+        present = {name for name in os.listdir(folder)
+                   if not name.startswith(".") and os.path.isfile(os.path.join(folder, name))}
+        known = set(self.names())
+        for name in known - present:
+            self.remove(name)
+        for name in sorted(present - known):
+            file_path = os.path.join(folder, name)
+            profile = describe(name, file_path) if describe is not None else None
+            self.upsert(name, file_path, profile=profile, uploaded_at=os.path.getmtime(file_path))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,308 @@
+import bisect
+import hashlib
+import io
+import itertools
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from decompress import MAGIC_BYTES, decompress, detect_compression
+
+# Uploaded datasets are split into content-defined chunks, each stored once in a
+# hidden folder next to the datasets; the dataset file itself becomes a small
+# manifest listing its chunks in order
+CHUNKS_DIRNAME = ".chunks"
+
+# A chunk ends where the rolling hash of the last ROLLING_WINDOW bytes has its
+# low bits all zero, so an edit only changes the chunks around it. Sizes are
+# kept between MIN and MAX, averaging about AVG.
+MIN_CHUNK_BYTES = 8 * 1024
+AVG_CHUNK_BYTES = 32 * 1024
+MAX_CHUNK_BYTES = 128 * 1024
+ROLLING_WINDOW = 48
+
+# Bytes hashed per step (the rolling hash needs 4 bytes of memory per byte)
+READ_BLOCK_BYTES = 1024 * 1024
+
+# Unreferenced chunks newer than this are kept, since an upload in progress
+# may be about to list them (seconds)
+GC_GRACE_SECONDS = 60 * 60
+
+# First line of a manifest; anything else is read as a plain file
+MANIFEST_MAGIC = b"#benchviz-manifest v1\n"
+
+# One random 32-bit value per byte value, fixed so boundaries never move
+_GEAR = np.random.default_rng(0x6265_6e63).integers(0, 2**32, size=256, dtype=np.uint32, endpoint=False)
+_MASK = np.uint32(AVG_CHUNK_BYTES - 1)
+
+
+def chunks_folder(file_path):
+    return os.path.join(os.path.dirname(file_path), CHUNKS_DIRNAME)
+
+
+def _chunk_path(folder, digest):
+    return os.path.join(folder, digest[:2], digest)
+
+
+def read_blocks(f, size=READ_BLOCK_BYTES):
+    return iter(lambda: f.read(size), b"")
+
+
+# Positions (exclusive ends) where the rolling hash allows a chunk to end. The
+# window sums come from one cumulative sum, wrapping modulo 2**32; the first
+# window's worth of bytes is never a candidate (it is below MIN_CHUNK_BYTES).
+def _candidates(buffer):
+    sums = np.cumsum(_GEAR[np.frombuffer(buffer, dtype=np.uint8)], dtype=np.uint32)
+    window = sums[ROLLING_WINDOW:] - sums[:-ROLLING_WINDOW]
+    return np.flatnonzero((window & _MASK) == 0) + ROLLING_WINDOW + 1
+
+
+# Chunk ends in a buffer that starts at a chunk boundary; the bytes after the
+# last end are carried over unless this is the end of the stream
+def _cut_points(candidates, length, final):
+    cuts, start = [], 0
+    for end in candidates.tolist():
+        while end - start > MAX_CHUNK_BYTES:
+            start += MAX_CHUNK_BYTES
+            cuts.append(start)
+        if end - start >= MIN_CHUNK_BYTES:
+            cuts.append(end)
+            start = end
+    while length - start > MAX_CHUNK_BYTES:
+        start += MAX_CHUNK_BYTES
+        cuts.append(start)
+    if final and start < length:
+        cuts.append(length)
+    return cuts
+
+
+# Split a stream of byte blocks into content-defined chunks. Boundaries depend
+# only on the bytes, never on how the stream was blocked.
+def split_chunks(blocks):
+    carry = b""
+    blocks = iter(blocks)
+    block = next(blocks, b"")
+    while block or carry:
+        following = next(blocks, b"")
+        buffer = carry + block
+        final = not following
+        start = 0
+        for end in _cut_points(_candidates(buffer), len(buffer), final):
+            yield buffer[start:end]
+            start = end
+        carry = buffer[start:]
+        block = following
+        if final:
+            break
+
+
+# Store a chunk unless it is already there; True if it was new
+def _put_chunk(folder, digest, data):
+    path = _chunk_path(folder, digest)
+    try:
+        # Already stored: mark it as used so garbage collection leaves it alone
+        os.utime(path)
+        return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _store_chunks(folder, blocks, stats):
+    chunks = []
+    for data in split_chunks(blocks):
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if _put_chunk(folder, digest, data):
+            stats["new_chunks"] += 1
+            stats["stored_bytes"] += len(data)
+        chunks.append([digest, len(data)])
+    stats["chunks"] += len(chunks)
+    return chunks
+
+
+# {"size": ..., "chunks": [[digest, size], ...]} if the file is a manifest, else None
+def load_manifest(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(len(MANIFEST_MAGIC)) != MANIFEST_MAGIC:
+                return None
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+# Manifests hold nothing but the chunk list, so identical contents give
+# byte-identical manifests (and the same content hash in the dataset cache)
+def _save_manifest(file_path, manifest):
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", dir=os.path.dirname(file_path) or ".")
+    with os.fdopen(fd, "wb") as f:
+        f.write(MANIFEST_MAGIC)
+        f.write(json.dumps(manifest, separators=(",", ":")).encode())
+    os.replace(tmp_path, file_path)
+
+
+# Chunk the byte blocks of an upload, store the chunks no dataset holds yet and
+# point `file_path` at them. An upload identical to what the file already holds
+# leaves the manifest untouched ("unchanged"), so everything derived from it
+# stays fresh; "replaced" says an older version's chunks may now be unused.
+def store_blocks(file_path, blocks):
+    stats = {"size": 0, "chunks": 0, "new_chunks": 0, "stored_bytes": 0}
+    counted = _counting(blocks, stats)
+    chunks = _store_chunks(chunks_folder(file_path), counted, stats)
+    manifest = {"size": stats["size"], "chunks": chunks}
+    previous = load_manifest(file_path)
+    stats["unchanged"] = previous == manifest
+    stats["replaced"] = previous is not None and not stats["unchanged"]
+    if not stats["unchanged"]:
+        _save_manifest(file_path, manifest)
+    return stats
+
+
+def _counting(blocks, stats):
+    for block in blocks:
+        stats["size"] += len(block)
+        yield block
+
+
+# Add bytes to the end of a manifest dataset, storing only the new chunks
+def append_blocks(file_path, blocks):
+    manifest = load_manifest(file_path)
+    stats = {"size": 0, "chunks": 0, "new_chunks": 0, "stored_bytes": 0}
+    chunks = _store_chunks(chunks_folder(file_path), _counting(blocks, stats), stats)
+    _save_manifest(file_path, {"size": manifest["size"] + stats["size"], "chunks": manifest["chunks"] + chunks})
+    return stats
+
+
+# Read-only, seekable view of a manifest's chunks as one file
+class ChunkedFile(io.RawIOBase):
+    def __init__(self, folder, chunks):
+        self.folder = folder
+        self.digests = [digest for digest, _ in chunks]
+        self.offsets = list(itertools.accumulate((size for _, size in chunks), initial=0))
+        self.size = self.offsets[-1]
+        self.position = 0
+        self._index = None
+        self._file = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(base + offset, 0)
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        index = bisect.bisect_right(self.offsets, self.position) - 1
+        if index != self._index:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(_chunk_path(self.folder, self.digests[index]), "rb")
+            self._index = index
+        self._file.seek(self.position - self.offsets[index])
+        wanted = min(len(buffer), self.offsets[index + 1] - self.position)
+        n = self._file.readinto(memoryview(buffer)[:wanted])
+        self.position += n
+        return n
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+# Binary file object over the bytes stored for a dataset, whether as chunks or plain
+def open_stored(file_path):
+    manifest = load_manifest(file_path)
+    if manifest is None:
+        return open(file_path, "rb")
+    return io.BufferedReader(ChunkedFile(chunks_folder(file_path), manifest["chunks"]), READ_BLOCK_BYTES)
+
+
+# Binary file object over a dataset's contents, decompressed while reading if
+# it was uploaded compressed
+def open_dataset(file_path):
+    return decompress(open_stored(file_path))
+
+
+# Compression format the dataset is stored in, or None
+def dataset_compression(file_path):
+    with open_stored(file_path) as f:
+        return detect_compression(f.read(MAGIC_BYTES))
+
+
+# Size of the bytes stored for a dataset (not of its manifest); compressed
+# datasets count their compressed size
+def dataset_size(file_path):
+    manifest = load_manifest(file_path)
+    return manifest["size"] if manifest is not None else os.path.getsize(file_path)
+
+
+def _manifests(upload_folder):
+    for entry in os.scandir(upload_folder):
+        if entry.is_file() and not entry.name.startswith("."):
+            manifest = load_manifest(entry.path)
+            if manifest is not None:
+                yield entry.name, manifest
+
+
+def _stored_chunks(upload_folder):
+    folder = os.path.join(upload_folder, CHUNKS_DIRNAME)
+    if not os.path.isdir(folder):
+        return
+    for prefix in os.scandir(folder):
+        if prefix.is_dir():
+            yield from os.scandir(prefix.path)
+
+
+# Delete chunks no manifest lists any more (and abandoned temporary files)
+def collect_garbage(upload_folder, grace=GC_GRACE_SECONDS):
+    referenced = set()
+    for _, manifest in _manifests(upload_folder):
+        referenced.update(digest for digest, _ in manifest["chunks"])
+    cutoff = time.time() - grace
+    removed = 0
+    for entry in _stored_chunks(upload_folder):
+        if entry.name in referenced:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# Bytes the datasets hold against bytes actually stored for them
+def storage_stats(upload_folder):
+    manifests = [manifest for _, manifest in _manifests(upload_folder)]
+    chunks = stored = 0
+    for entry in _stored_chunks(upload_folder):
+        if not entry.name.startswith("."):
+            chunks += 1
+            stored += entry.stat().st_size
+    return {
+        "datasets": len(manifests),
+        "logical_bytes": sum(manifest["size"] for manifest in manifests),
+        "stored_bytes": stored,
+        "chunks": chunks,
+        "dedup_ratio": round(sum(manifest["size"] for manifest in manifests) / stored, 4) if stored else 0.0,
+    }
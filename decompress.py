@@ -0,0 +1,107 @@
+import bz2
+import gzip
+import io
+import zipfile
+
+# zstd needs the zstandard package or pyarrow's codec; either is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Compressed uploads are stored as they arrive and recognized by their first bytes
+COMPRESSIONS = ("gzip", "bz2", "zstd", "zip")
+MAGIC_BYTES = 10
+
+# Bytes decompressed per read
+DECOMPRESS_BLOCK_BYTES = 1024 * 1024
+
+
+class UnsupportedCompression(ValueError):
+    pass
+
+
+# Compression format of a stream from its first MAGIC_BYTES bytes, or None
+def detect_compression(head):
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"\x28\xb5\x2f\xfd"):
+        return "zstd"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    # "BZh", the block size digit and the block magic (pi in BCD)
+    if head[:3] == b"BZh" and head[3:4].isdigit() and head[4:10] == b"\x31\x41\x59\x26\x53\x59":
+        return "bz2"
+    return None
+
+
+# Reads decompressed bytes from `reader`, closing `resources` with it. Not
+# seekable, but tell() counts the bytes read so far.
+class DecompressedFile(io.RawIOBase):
+    def __init__(self, reader, *resources):
+        self.reader = reader
+        self.resources = resources
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, buffer):
+        data = self.reader.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.position += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.reader.close()
+            for resource in self.resources:
+                resource.close()
+        super().close()
+
+
+# The first data file of a zip archive (folders and macOS metadata are skipped)
+def _zip_member(archive):
+    for info in archive.infolist():
+        if not info.is_dir() and not info.filename.startswith("__MACOSX/"):
+            return info
+    raise UnsupportedCompression("The zip archive holds no file")
+
+
+def _zstd_reader(raw):
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    if pa is not None and pa.Codec.is_available("zstd"):
+        return pa.input_stream(raw, compression="zstd")
+    raise UnsupportedCompression("Reading zstd files needs the zstandard or pyarrow package")
+
+
+# Binary stream of the decompressed bytes of `raw` (a buffered binary file),
+# or `raw` itself if it is not compressed. Closing the result closes `raw`.
+def decompress(raw):
+    compression = detect_compression(raw.peek(MAGIC_BYTES)[:MAGIC_BYTES])
+    if compression is None:
+        return raw
+    try:
+        if compression == "gzip":
+            resources = (gzip.GzipFile(fileobj=raw, mode="rb"), raw)
+        elif compression == "bz2":
+            resources = (bz2.BZ2File(raw, mode="rb"), raw)
+        elif compression == "zstd":
+            resources = (_zstd_reader(raw), raw)
+        else:
+            archive = zipfile.ZipFile(raw)
+            resources = (archive.open(_zip_member(archive)), archive, raw)
+    except BaseException:
+        raw.close()
+        raise
+    return io.BufferedReader(DecompressedFile(*resources), DECOMPRESS_BLOCK_BYTES)
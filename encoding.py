@@ -0,0 +1,155 @@
+import io
+import json
+
+# orjson and pyarrow are optional: without them responses use the stdlib
+# encoder and Arrow is simply not offered
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Row dicts (the original format), column arrays, or an Arrow IPC stream
+FORMATS = ("records", "columns", "arrow")
+
+COLUMNS_MEDIA_TYPE = "application/vnd.benchviz.columns+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Schema metadata entry carrying the non-tabular part of an Arrow response
+ARROW_METADATA_KEY = b"benchviz"
+
+# Formats for streamed results: one JSON object per line, CSV, or an Arrow IPC
+# stream with one record batch per chunk
+STREAM_FORMATS = ("ndjson", "csv", "arrow")
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv", "arrow": ARROW_MEDIA_TYPE}
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# ?format= wins; otherwise the Accept header picks it. Arrow quietly becomes
+# columns when pyarrow is not installed.
+def negotiate_format(fmt=None, accept=None):
+    if fmt is None and accept:
+        if ARROW_MEDIA_TYPE in accept:
+            fmt = "arrow"
+        elif COLUMNS_MEDIA_TYPE in accept:
+            fmt = "columns"
+    if fmt not in FORMATS:
+        fmt = "records"
+    if fmt == "arrow" and pa is None:
+        fmt = "columns"
+    return fmt
+
+
+# {column: [values]} with None for missing values; one conversion per column
+# instead of one dict per row
+def frame_columns(df):
+    return {
+        str(col): values.astype(object).where(values.notna(), None).tolist()
+        for col, values in df.items()
+    }
+
+
+def columns_to_records(columns, start=0, stop=None):
+    names = list(columns)
+    rows = zip(*(columns[name][start:stop] for name in names))
+    return [dict(zip(names, row)) for row in rows]
+
+
+# Encode `payload` with its table under `key` in the negotiated format and
+# return (body, media type). The table arrives either as a DataFrame or
+# already as column arrays.
+def encode_table(payload, key, fmt, frame=None):
+    if fmt == "arrow":
+        try:
+            if frame is not None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+            else:
+                table = pa.Table.from_pydict(payload[key])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns have no Arrow type; send columns instead
+            fmt = "columns"
+        else:
+            metadata = {k: v for k, v in payload.items() if k != key}
+            table = table.replace_schema_metadata({ARROW_METADATA_KEY: dumps(metadata)})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), ARROW_MEDIA_TYPE
+    columns = payload[key] if frame is None else frame_columns(frame)
+    if fmt == "columns":
+        return dumps({**payload, key: columns, "format": "columns"}), COLUMNS_MEDIA_TYPE
+    return dumps({**payload, key: columns_to_records(columns)}), "application/json"
+
+
+def negotiate_stream_format(fmt=None):
+    if fmt not in STREAM_FORMATS:
+        fmt = "ndjson"
+    if fmt == "arrow" and pa is None:
+        fmt = "ndjson"
+    return fmt
+
+
+# Encode DataFrame chunks as they arrive. Arrow batches all take the schema of
+# the first chunk, so later chunks cannot silently change a column's type.
+def stream_frames(chunks, fmt):
+    if fmt == "ndjson":
+        for chunk in chunks:
+            yield b"".join(dumps(record) + b"\n" for record in columns_to_records(frame_columns(chunk)))
+    elif fmt == "csv":
+        header = True
+        for chunk in chunks:
+            yield chunk.to_csv(index=False, header=header).encode()
+            header = False
+    else:
+        buffer = io.BytesIO()
+        schema = writer = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_stream(pa.PythonFile(buffer, mode="w"), schema)
+            writer.write_table(table)
+            yield _drain(buffer)
+        if writer is not None:
+            writer.close()
+            yield _drain(buffer)
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+# Client side: the best format this process can decode
+def accept_header():
+    return ARROW_MEDIA_TYPE if pa is not None else COLUMNS_MEDIA_TYPE
+
+
+# Client side: (payload, columns) from any of the three formats
+def decode_table(response, key):
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith(ARROW_MEDIA_TYPE):
+        table = pa.ipc.open_stream(response.content).read_all()
+        payload = loads(table.schema.metadata[ARROW_METADATA_KEY])
+        return payload, table.to_pydict()
+    payload = loads(response.content)
+    data = payload.pop(key, None)
+    if isinstance(data, list):
+        names = list(data[0]) if data else payload.get("columns", [])
+        data = {name: [row.get(name) for row in data] for name in names}
+    return payload, data
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Where encoded feature matrices and fold assignments are kept, and the disk
+# budget (2 GB) past which the least recently used entries are deleted
+FEATURE_STORE_DIR = os.environ.get("BENCHVIZ_FEATURE_STORE_DIR", os.path.join("datasets", ".features"))
+DEFAULT_FEATURE_STORE_BYTES = int(os.environ.get("BENCHVIZ_FEATURE_STORE_BYTES", 2 * 1024 * 1024 * 1024))
+
+# Entries used this recently are never evicted, so a run that just looked one
+# up can still open its arrays (seconds)
+EVICTION_GRACE_SECONDS = 60
+
+META_FILENAME = "meta.json"
+
+
+# Content address for a set of key parts (any JSON-serializable values)
+def cache_key(**parts):
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+# Disk store of NumPy arrays addressed by cache_key(). Each entry is a folder of
+# .npy files plus meta.json, written under a temporary name and renamed into
+# place, so concurrent builders of the same entry never see a partial one. The
+# mtime of meta.json records the last use and drives LRU eviction.
+class FeatureStore:
+    def __init__(self, root=FEATURE_STORE_DIR, max_bytes=DEFAULT_FEATURE_STORE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    # Entry folder if the key is stored (marking it as used), else None
+    def get(self, key):
+        folder = self.entry_path(key)
+        meta_path = os.path.join(folder, META_FILENAME)
+        try:
+            os.utime(meta_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return folder
+
+    # Store `arrays` ({name: ndarray}) and `meta` under `key` and return the folder
+    def put(self, key, arrays, meta=None):
+        os.makedirs(self.root, exist_ok=True)
+        folder = self.entry_path(key)
+        tmp_folder = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        try:
+            for name, values in arrays.items():
+                np.save(os.path.join(tmp_folder, name + ".npy"), values)
+            with open(os.path.join(tmp_folder, META_FILENAME), "w") as f:
+                json.dump({**(meta or {}), "key": key, "created": time.time()}, f)
+            os.rename(tmp_folder, folder)
+        except OSError:
+            # Another run stored the same entry first; its arrays are identical
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            if not os.path.exists(os.path.join(folder, META_FILENAME)):
+                raise
+        self.evict(keep=key)
+        return folder
+
+    # Folder for `key`, calling build() -> (arrays, meta) only on a miss
+    def get_or_build(self, key, build):
+        folder = self.get(key)
+        if folder is None:
+            arrays, meta = build()
+            folder = self.put(key, arrays, meta)
+        return folder
+
+    def entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith("."):
+                continue
+            folder = os.path.join(self.root, name)
+            try:
+                last_used = os.path.getmtime(os.path.join(folder, META_FILENAME))
+                size = sum(entry.stat().st_size for entry in os.scandir(folder))
+            except (FileNotFoundError, NotADirectoryError):
+                # Half-written (or being deleted) entries are not counted
+                continue
+            entries.append((last_used, size, name))
+        return entries
+
+    # Delete least recently used entries until the store fits its budget
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - EVICTION_GRACE_SECONDS
+        for last_used, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep or last_used > cutoff:
+                continue
+            shutil.rmtree(self.entry_path(name), ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        entries = self.entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def load_array(folder, name):
+    return np.load(os.path.join(folder, name + ".npy"), mmap_mode="r")
+
+
+def load_meta(folder):
+    with open(os.path.join(folder, META_FILENAME)) as f:
+        return json.load(f)
+
+
+# Shared store used by the benchmark
+feature_store = FeatureStore()
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Long-running work shares one bounded pool
+DEFAULT_JOB_WORKERS = int(os.environ.get("BENCHVIZ_JOB_WORKERS", 4))
+
+# Queued + running jobs a single user may have at once
+DEFAULT_PER_USER_LIMIT = int(os.environ.get("BENCHVIZ_JOBS_PER_USER", 2))
+
+# Finished jobs are kept this long so clients can collect their results
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLimitError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, user, description=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.user = user
+        self.description = description
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self._cancel = threading.Event()
+
+    # Called by the work function; also the point where cancellation takes effect
+    def report(self, progress=None, message=None, result=None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if result is not None:
+            self.result = result
+        self.version += 1
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    # Linear extrapolation from the progress made so far
+    def eta(self):
+        if self.status != "running" or not self.progress or self.started is None:
+            return None
+        elapsed = time.time() - self.started
+        return elapsed * (1 - self.progress) / self.progress
+
+    def to_dict(self):
+        eta = self.eta()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "user": self.user,
+            "description": self.description,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+# Runs jobs on a bounded thread pool and tracks their state. Work functions take
+# the Job as their first argument and call job.report() as they go.
+class JobManager:
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, per_user_limit=DEFAULT_PER_USER_LIMIT):
+        self.per_user_limit = per_user_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="benchviz-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, user, fn, *args, description=None):
+        job = Job(kind, user, description)
+        with self._lock:
+            self._prune()
+            active = sum(1 for j in self._jobs.values() if j.user == user and j.status not in FINISHED_STATES)
+            if active >= self.per_user_limit:
+                raise JobLimitError(f"User {user} already has {active} active jobs (limit {self.per_user_limit})")
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        if job.cancel_requested:
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started = time.time()
+        job.version += 1
+        try:
+            result = fn(job, *args)
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+        else:
+            job.result = result
+            job.progress = 1.0
+            self._finish(job, "succeeded")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.version += 1
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # Queued jobs never start; running jobs stop at their next report()
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        return job
+
+    def list(self, user=None):
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if user is None or j.user == user]
+        return sorted(jobs, key=lambda j: j.created, reverse=True)
+
+
+# Shared manager used by the API
+job_manager = JobManager()
@@ -0,0 +1,259 @@
+import collections
+import contextlib
+import contextvars
+import math
+import os
+import sys
+import threading
+import time
+
+# Latency buckets (seconds) shared by request and stage histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Sampling profiler for slow requests: off unless BENCHVIZ_PROFILE_SLOW_MS is set;
+# stacks of requests slower than that are written to BENCHVIZ_PROFILE_DIR in
+# collapsed format (flamegraph.pl, speedscope, inferno)
+PROFILE_SLOW_MS = os.environ.get("BENCHVIZ_PROFILE_SLOW_MS")
+PROFILE_DIR = os.environ.get("BENCHVIZ_PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = 0.005
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", key + (_format_value(bound),), count))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, counts[-1]))
+        return samples
+
+
+# Metrics in the Prometheus text exposition format. Collectors are called at
+# scrape time for values that live elsewhere (e.g. the dataset cache counters).
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                label_names = metric.labels + (("le",) if name.endswith("_bucket") else ())
+                lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "benchviz_request_duration_seconds", "HTTP request latency", ("method", "route", "status")))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "benchviz_requests_in_flight", "HTTP requests being served"))
+STAGE_SECONDS = registry.register(Histogram(
+    "benchviz_stage_duration_seconds", "Time spent in each stage of a request", ("stage",)))
+BYTES_READ = registry.register(Counter(
+    "benchviz_bytes_read_total", "Bytes read from dataset files", ("source",)))
+ROWS_PARSED = registry.register(Counter(
+    "benchviz_rows_parsed_total", "Rows parsed from dataset files", ("source",)))
+
+
+def record_read(source, rows=0, nbytes=0):
+    if rows:
+        ROWS_PARSED.inc(rows, source=source)
+    if nbytes:
+        BYTES_READ.inc(nbytes, source=source)
+
+
+# Per-request stage timings and the threads that worked on the request
+class RequestTrace:
+    def __init__(self):
+        self.stages = []
+        self.threads = set()
+        self.start = time.perf_counter()
+
+    def server_timing(self):
+        totals = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        totals["total"] = time.perf_counter() - self.start
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+_current_trace = contextvars.ContextVar("benchviz_trace", default=None)
+
+
+# Time a stage: always into the stage histogram, and into the current request's
+# Server-Timing header when called while serving a request
+@contextlib.contextmanager
+def span(name):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.threads.add(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        if trace is not None:
+            trace.stages.append((name, elapsed))
+
+
+# Samples the stacks of a request's worker threads every few milliseconds
+class StackSampler(threading.Thread):
+    def __init__(self, trace, interval=PROFILE_INTERVAL):
+        super().__init__(name="benchviz-sampler", daemon=True)
+        self.trace = trace
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.trace.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    # One "frame;frame;frame count" line per distinct stack
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# ASGI middleware: in-flight gauge, latency histogram, Server-Timing header and
+# (when enabled) flame graphs of slow requests
+class MetricsMiddleware:
+    def __init__(self, app, slow_ms=PROFILE_SLOW_MS, profile_dir=PROFILE_DIR):
+        self.app = app
+        self.slow_seconds = float(slow_ms) / 1000 if slow_ms else None
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        sampler = StackSampler(trace) if self.slow_seconds is not None else None
+        if sampler is not None:
+            sampler.start()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - trace.start
+            # Route templates keep label cardinality bounded (no filenames or ids)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=str(status[0]))
+            if sampler is not None:
+                sampler.stop()
+                if elapsed >= self.slow_seconds and sampler.stacks:
+                    self._save_profile(scope, route, elapsed, sampler)
+
+    def _save_profile(self, scope, route, elapsed, sampler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{slug}-{elapsed * 1000:.0f}ms.folded"
+        with open(os.path.join(self.profile_dir, name), "w") as f:
+            f.write(sampler.collapsed())
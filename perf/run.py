@@ -0,0 +1,293 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from perf.synthetic import TEMPLATES, generate_csv, template_columns
+
+# Dataset sizes per preset; cols=None keeps the template's own column count
+PRESETS = {
+    "small": {"rows": [10_000, 100_000], "cols": [None]},
+    "medium": {"rows": [1_000_000], "cols": [None, 100]},
+    "large": {"rows": [10_000_000, 50_000_000], "cols": [10, 100, 1000]},
+}
+
+# A stage regresses when it is this much slower (or hungrier) than the baseline
+DEFAULT_THRESHOLD = 0.2
+
+# ...and the difference is above the noise floor
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_BYTES = 1024 * 1024
+
+# Rows encoded by the serialize stages
+SERIALIZE_ROWS = 1000
+
+SERIALIZE_FORMATS = ("records", "columns", "arrow")
+
+# Marks an upload folder the harness created, so a reused --workdir is known
+# to hold nothing but its own datasets
+WORKDIR_MARKER = ".perf-harness"
+
+
+# Best wall time over `repeat` runs and the largest traced peak (tracemalloc
+# sees Python and NumPy allocations, not Arrow's own memory pool). `setup` runs
+# before every run, outside the timing.
+def measure(fn, repeat=1, trace_memory=True, setup=None):
+    best, peak = float("inf"), None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+        if trace_memory:
+            peak = max(peak or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def _check(response):
+    body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+    if response.status_code != 200 or body.get("error"):
+        raise RuntimeError(body.get("error") or f"HTTP {response.status_code}")
+    return response
+
+
+# Uploads return an ingest job; the upload is only done once the job is
+def _wait(client, response, poll=0.01):
+    job = _check(response).json()
+    while job["status"] in ("queued", "running"):
+        time.sleep(poll)
+        job = _check(client.get(f"/jobs/{job['job_id']}")).json()
+    if job["status"] != "succeeded":
+        raise RuntimeError(job["error"] or f"job {job['status']}")
+    return job["result"]
+
+
+# Time every stage for one synthetic dataset, going through the API in-process
+def run_case(client, workdir, template, rows, cols, seed=0, repeat=1, trace_memory=True):
+    # Imported here: back.py creates its upload folder relative to the working directory
+    from back import dataset_cache
+    from chunk_store import collect_garbage, open_dataset
+    from encoding import encode_table
+    from profiling import profile_chunks
+    from storage import iter_chunks, read_preview
+
+    n_cols = len(template_columns(template, cols))
+    name = f"{template}-{rows}x{n_cols}.csv"
+    source = os.path.join(workdir, "generated", name)
+    if not os.path.exists(source):
+        generate_csv(source, template, rows, cols, seed)
+    dataset = os.path.join("datasets", name)
+
+    def upload():
+        with open(source, "rb") as f:
+            _wait(client, client.post("/upload/", files={"file": (name, f, "text/csv")}))
+
+    # Identical bytes are deduplicated into a no-op, so a cold upload first
+    # removes this dataset and the chunks only it used. The folder holds
+    # nothing else (see check_workdir), so no other dataset shares them.
+    def remove_dataset():
+        if os.path.exists(dataset):
+            os.remove(dataset)
+        collect_garbage("datasets", grace=0)
+
+    def parse():
+        with open_dataset(dataset) as f:
+            for _ in pd.read_csv(f, chunksize=100_000):
+                pass
+
+    def preview():
+        dataset_cache.clear()
+        _check(client.get(f"/dataset/{name}"))
+
+    stages = {
+        "upload": measure(upload, repeat, trace_memory, setup=remove_dataset),
+        # Re-uploading the same contents, which stores nothing new
+        "reupload": measure(upload, repeat, trace_memory),
+        "parse": measure(parse, repeat, trace_memory),
+        "profile": measure(lambda: profile_chunks(iter_chunks(dataset)), repeat, trace_memory),
+        "preview": measure(preview, repeat, trace_memory),
+    }
+    page = read_preview(dataset, nrows=SERIALIZE_ROWS)
+    for fmt in SERIALIZE_FORMATS:
+        stages[f"serialize_{fmt}"] = measure(lambda: encode_table({}, "data", fmt, frame=page), repeat,
+                                             trace_memory)
+    remove_dataset()
+    return {
+        "case": f"{template}-{rows}x{n_cols}",
+        "template": template,
+        "rows": rows,
+        "cols": n_cols,
+        "file_bytes": os.path.getsize(source),
+        "stages": stages,
+    }
+
+
+def environment():
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def max_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# The harness deletes what it uploads, so it refuses an upload folder that
+# holds anything it did not put there (e.g. --workdir pointing at the app)
+def check_workdir(workdir):
+    folder = os.path.join(workdir, "datasets")
+    marker = os.path.join(folder, WORKDIR_MARKER)
+    if os.path.isdir(folder) and os.listdir(folder) and not os.path.exists(marker):
+        raise ValueError(f"{folder} already holds datasets; pass an empty or new --workdir")
+    os.makedirs(folder, exist_ok=True)
+    open(marker, "a").close()
+
+
+def run(templates, row_counts, col_counts, seed=0, repeat=1, trace_memory=True, workdir=None, log=print):
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="benchviz-perf-"))
+    check_workdir(workdir)
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    from back import app
+
+    results = []
+    with TestClient(app) as client:
+        for template in templates:
+            for rows in row_counts:
+                for cols in col_counts:
+                    result = run_case(client, workdir, template, rows, cols, seed, repeat, trace_memory)
+                    log(format_case(result))
+                    results.append(result)
+    return {"environment": environment(), "max_rss_bytes": max_rss_bytes(), "seed": seed, "repeat": repeat,
+            "results": results}
+
+
+def format_case(result):
+    parts = [f"{stage} {stats['seconds']:.3f}s" for stage, stats in result["stages"].items()]
+    return f"{result['case']}: " + ", ".join(parts)
+
+
+# Stages slower or hungrier than the baseline by more than `threshold`
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    base = {(r["case"], stage): stats for r in baseline["results"] for stage, stats in r["stages"].items()}
+    rows, regressions = [], []
+    for result in current["results"]:
+        for stage, stats in result["stages"].items():
+            before = base.get((result["case"], stage))
+            if before is None:
+                continue
+            change = stats["seconds"] / before["seconds"] - 1 if before["seconds"] else 0.0
+            slower = change > threshold and stats["seconds"] - before["seconds"] > MIN_REGRESSION_SECONDS
+            hungrier = (stats.get("peak_bytes") is not None and before.get("peak_bytes")
+                        and stats["peak_bytes"] > before["peak_bytes"] * (1 + threshold)
+                        and stats["peak_bytes"] - before["peak_bytes"] > MIN_REGRESSION_BYTES)
+            row = {"case": result["case"], "stage": stage, "baseline_seconds": before["seconds"],
+                   "seconds": stats["seconds"], "change": change, "baseline_peak_bytes": before.get("peak_bytes"),
+                   "peak_bytes": stats.get("peak_bytes"), "slower": bool(slower), "hungrier": bool(hungrier)}
+            rows.append(row)
+            if slower or hungrier:
+                regressions.append(row)
+    return rows, regressions
+
+
+def format_comparison(rows):
+    lines = [f"{'case':<36} {'stage':<18} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows:
+        flag = " SLOWER" if row["slower"] else ""
+        flag += " MEMORY" if row["hungrier"] else ""
+        lines.append(f"{row['case']:<36} {row['stage']:<18} {row['baseline_seconds']:>9.3f}s "
+                     f"{row['seconds']:>9.3f}s {row['change']:>+7.1%}{flag}")
+    return "\n".join(lines)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.run", description="Dataset-BenchViz performance benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate datasets and time every stage")
+    run_parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    run_parser.add_argument("--templates", nargs="+", choices=sorted(TEMPLATES), default=sorted(TEMPLATES))
+    run_parser.add_argument("--rows", nargs="+", type=int, help="row counts (overrides the preset)")
+    run_parser.add_argument("--cols", nargs="+", type=int, help="column counts (overrides the preset)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is kept")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, no peak memory)")
+    run_parser.add_argument("--workdir", help="where datasets are generated and uploaded (default: a temp dir)")
+    run_parser.add_argument("--output", default="perf-results.json")
+    run_parser.add_argument("--baseline", help="compare against these results and fail on regressions")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    generate_parser = commands.add_parser("generate", help="write one synthetic dataset")
+    generate_parser.add_argument("output")
+    generate_parser.add_argument("--template", choices=sorted(TEMPLATES), default="brain_tumor")
+    generate_parser.add_argument("--rows", type=int, default=10_000)
+    generate_parser.add_argument("--cols", type=int)
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate_csv(args.output, args.template, args.rows, args.cols, args.seed)
+        return 0
+
+    if args.command == "compare":
+        rows, regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        print(format_comparison(rows))
+        print(f"{len(regressions)} regression(s)")
+        return 1 if regressions else 0
+
+    output = os.path.abspath(args.output)
+    baseline = load_results(args.baseline) if args.baseline else None
+    preset = PRESETS[args.preset]
+    try:
+        results = run(args.templates, args.rows or preset["rows"], args.cols or preset["cols"], args.seed,
+                      args.repeat, not args.no_memory, args.workdir)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline is not None:
+        rows, regressions = compare(baseline, results, args.threshold)
+        print(format_comparison(rows))
+        print(f"{len(regressions)} regression(s)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows generated and written per step, so any row count fits in memory
+GENERATE_CHUNK_ROWS = 500_000
+
+SYMPTOMS = ["Headache", "Nausea", "Seizures", "Vision Issues"]
+GENRES = ["Drama", "Crime", "Action", "Adventure", "Fantasy", "Biography", "History", "Sci-Fi", "Thriller",
+          "Romance", "Western", "Mystery", "Horror", "War", "Animation", "Family", "Comedy", "Music"]
+COUNTRIES = ["UK", "India", "Australia", "New Zealand", "USA", "Canada"]
+PRODUCTS = ["Mint Chip Choco", "85% Dark Bars", "Peanut Butter Cubes", "Smooth Sliky Salty", "99% Dark & Pure",
+            "After Nines", "50% Dark Bites", "Orange Choco", "Eclairs", "Drinking Coco", "Organic Choco Syrup",
+            "Milk Bars", "Spicy Special Slims", "Fruit & Nut Bars", "White Choc", "Manuka Honey Choco",
+            "Almond Choco", "Raspberry Choco", "Choco Coated Almonds", "Baker's Choco Chips", "Caramel Stuffed Bars",
+            "70% Dark Bites"]
+WORDS = ["The", "Last", "Night", "City", "Dark", "Love", "King", "Man", "Story", "Return", "Lost", "Great",
+         "Blue", "House", "Road", "War", "Star", "Time", "Dream", "River"]
+
+
+def _choice(options, p=None):
+    options = np.asarray(options, dtype=object)
+    return lambda rng, start, n: options[rng.choice(len(options), size=n, p=p)]
+
+
+def _names(prefix, count):
+    return lambda rng, start, n: np.char.add(prefix, rng.integers(0, count, n).astype(str)).astype(object)
+
+
+def _with_gaps(builder, fraction):
+    def build(rng, start, n):
+        values = pd.Series(builder(rng, start, n))
+        return values.mask(rng.random(n) < fraction)
+    return build
+
+
+def _title(rng, start, n):
+    words = np.asarray(WORDS, dtype=object)
+    return words[rng.integers(0, len(words), n)] + " " + words[rng.integers(0, len(words), n)]
+
+
+def _genres(rng, start, n):
+    first = _choice(GENRES)(rng, start, n)
+    second = _choice(GENRES)(rng, start, n)
+    return np.where(rng.random(n) < 0.6, first + ", " + second, first)
+
+
+def _amount(rng, start, n):
+    return pd.Series(rng.integers(7, 22_000, n)).map("${:,} ".format).to_numpy()
+
+
+def _date(rng, start, n):
+    days = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 240, n), unit="D")
+    return days.strftime("%d-%b-%y").to_numpy()
+
+
+# Column generators for each template, modeled on the sample datasets: same
+# names, value ranges, cardinalities and share of missing values
+TEMPLATES = {
+    "brain_tumor": [
+        ("Patient_ID", lambda rng, start, n: np.arange(start + 1, start + n + 1)),
+        ("Age", lambda rng, start, n: rng.integers(20, 80, n)),
+        ("Gender", _choice(["Male", "Female"])),
+        ("Tumor_Type", _choice(["Malignant", "Benign"])),
+        ("Tumor_Size", lambda rng, start, n: rng.uniform(0.5, 10, n)),
+        ("Location", _choice(["Temporal", "Parietal", "Frontal", "Occipital"])),
+        ("Histology", _choice(["Astrocytoma", "Glioblastoma", "Meningioma", "Medulloblastoma"])),
+        ("Stage", _choice(["I", "II", "III", "IV"])),
+        ("Symptom_1", _choice(SYMPTOMS)),
+        ("Symptom_2", _choice(SYMPTOMS)),
+        ("Symptom_3", _choice(SYMPTOMS)),
+        ("Radiation_Treatment", _choice(["Yes", "No"])),
+        ("Surgery_Performed", _choice(["Yes", "No"])),
+        ("Chemotherapy", _choice(["Yes", "No"])),
+        ("Survival_Rate", lambda rng, start, n: rng.uniform(40, 100, n)),
+        ("Tumor_Growth_Rate", lambda rng, start, n: rng.uniform(0.1, 3, n)),
+        ("Family_History", _choice(["Yes", "No"])),
+        ("MRI_Result", _choice(["Positive", "Negative"])),
+        ("Follow_Up_Required", _choice(["Yes", "No"])),
+    ],
+    "results_with_crew": [
+        ("tconst", lambda rng, start, n: np.char.add("tt", np.char.zfill(
+            np.arange(start + 1, start + n + 1).astype(str), 7)).astype(object)),
+        ("primaryTitle", _title),
+        ("startYear", lambda rng, start, n: rng.integers(1920, 2025, n)),
+        ("rank", lambda rng, start, n: np.arange(start + 1, start + n + 1)),
+        ("averageRating", lambda rng, start, n: np.round(rng.uniform(5.5, 9.3, n), 1)),
+        ("numVotes", lambda rng, start, n: rng.lognormal(11, 1.2, n).astype(np.int64) + 1000),
+        ("runtimeMinutes", _with_gaps(lambda rng, start, n: rng.integers(60, 240, n), 0.01)),
+        ("directors", _names("Director ", 5_000)),
+        ("writers", _names("Writer ", 20_000)),
+        ("genres", _genres),
+    ],
+    "chocolate_sales": [
+        ("Sales Person", _names("Sales Person ", 25)),
+        ("Country", _choice(COUNTRIES)),
+        ("Product", _choice(PRODUCTS)),
+        ("Date", _date),
+        ("Amount", _amount),
+        ("Boxes Shipped", lambda rng, start, n: rng.integers(1, 710, n)),
+    ],
+}
+
+
+# The template's columns, cycled with numbered suffixes (or cut) to `cols`
+def template_columns(template, cols=None):
+    base = TEMPLATES[template]
+    cols = cols or len(base)
+    columns = []
+    for i in range(cols):
+        name, builder = base[i % len(base)]
+        repeat = i // len(base)
+        columns.append((f"{name}_{repeat + 1}" if repeat else name, builder))
+    return columns
+
+
+def generate_frame(template, rows, cols=None, seed=0, start=0):
+    rng = np.random.default_rng([seed, start])
+    return pd.DataFrame({name: builder(rng, start, rows) for name, builder in template_columns(template, cols)})
+
+
+# Write a reproducible synthetic CSV chunk by chunk; the same arguments always
+# produce the same file
+def generate_csv(path, template, rows, cols=None, seed=0, chunk_rows=GENERATE_CHUNK_ROWS):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        for start in range(0, max(rows, 1), chunk_rows):
+            n = min(chunk_rows, rows - start)
+            generate_frame(template, n, cols, seed, start).to_csv(f, header=start == 0, index=False)
+    return path
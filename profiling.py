@@ -0,0 +1,282 @@
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, KLLSketch, SpaceSaving, _plain
+
+# Rows parsed per chunk; memory use is bounded by this, not by the file size
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+# Combine the dtypes a column had in different chunks into the dtype a
+# single full read would have produced
+def merge_dtypes(a, b):
+    if a == b:
+        return a
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b) \
+            and not pd.api.types.is_bool_dtype(a) and not pd.api.types.is_bool_dtype(b):
+        return np.dtype("float64")
+    # A text column that was all-null in some chunk keeps its text dtype
+    if pd.api.types.is_numeric_dtype(a) and not pd.api.types.is_numeric_dtype(b):
+        return b
+    if pd.api.types.is_numeric_dtype(b) and not pd.api.types.is_numeric_dtype(a):
+        return a
+    return np.dtype("object")
+
+
+# Distinct values counted exactly per text column before switching to sketches
+MAX_TRACKED_VALUES = 10_000
+
+# Quantiles reported for numeric columns
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+# Count, mean, M2, min and max of every column of a 2-D float block (NaN =
+# missing), computed with whole-block NumPy reductions instead of per-column calls
+def block_moments(block):
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=0)
+    sums = np.where(valid, block, 0.0).sum(axis=0)
+    means = np.divide(sums, counts, out=np.zeros(block.shape[1]), where=counts > 0)
+    m2 = np.square(np.where(valid, block - means, 0.0)).sum(axis=0)
+    mins = np.where(valid, block, np.inf).min(axis=0, initial=np.inf)
+    maxs = np.where(valid, block, -np.inf).max(axis=0, initial=-np.inf)
+    return counts, means, m2, mins, maxs
+
+
+# Value counts keyed by JSON-safe values. pyarrow reads ISO dates as
+# datetime.date, so temporal values are counted under their ISO strings; that
+# way the counts survive the JSON sidecar and merge with the ones loaded from it.
+def json_safe_counts(counts):
+    if pd.api.types.infer_dtype(counts.index, skipna=True) in ("date", "datetime", "datetime64", "time", "mixed"):
+        counts = counts.set_axis(counts.index.map(_plain))
+        counts = counts.groupby(level=0, sort=False).sum()
+    return counts
+
+
+# Single-pass profile accumulator. Each chunk's numeric block is reduced with one
+# set of vectorized reductions to per-column (count, mean, M2, min, max), merged
+# with Chan et al.'s parallel variance update so the result matches a full
+# in-memory pass. Every column also carries fixed-size sketches: KLL for the
+# quantiles of numeric columns, HyperLogLog for distinct counts, and for text
+# columns exact value counts that turn into a Space-Saving summary once there
+# are too many distinct values. All of it merges across chunks and partitions
+# and round-trips through to_dict()/from_dict().
+class ChunkedProfile:
+    def __init__(self, seed=0):
+        self.total_rows = 0
+        self.columns = []
+        self.dtypes = {}
+        self.nulls = {}
+        self.moments = {}
+        self.quantile_sketches = {}
+        self.distinct = {}
+        self.value_counts = {}
+        self.heavy_hitters = {}
+        self.seed = seed
+
+    def update(self, chunk):
+        if not self.columns:
+            self.columns = list(chunk.columns)
+        self.total_rows += len(chunk)
+
+        for col, dtype in chunk.dtypes.items():
+            self.dtypes[col] = merge_dtypes(self.dtypes[col], dtype) if col in self.dtypes else dtype
+        for col, nulls in zip(chunk.columns, chunk.isna().to_numpy().sum(axis=0)):
+            self.nulls[col] = self.nulls.get(col, 0) + int(nulls)
+        for col in chunk.columns:
+            if col not in self.distinct:
+                self.distinct[col] = HyperLogLog()
+            self.distinct[col].update(chunk[col])
+
+        numeric = chunk.select_dtypes(include=["number"])
+        if len(numeric.columns):
+            block = numeric.to_numpy(dtype="float64", na_value=np.nan)
+            counts, means, m2, mins, maxs = block_moments(block)
+            for j, col in enumerate(numeric.columns):
+                part = (int(counts[j]), float(means[j]), float(m2[j]), float(mins[j]), float(maxs[j]))
+                self.moments[col] = merge_moments(self.moments[col], part) if col in self.moments else part
+                self._quantile_sketch(col).update(block[:, j])
+
+        for col in chunk.columns.difference(numeric.columns, sort=False):
+            self._add_counts(col, json_safe_counts(chunk[col].value_counts(dropna=True)))
+        return self
+
+    def _quantile_sketch(self, col):
+        if col not in self.quantile_sketches:
+            self.quantile_sketches[col] = KLLSketch(seed=self.seed)
+        return self.quantile_sketches[col]
+
+    def _add_counts(self, col, counts):
+        if col in self.heavy_hitters:
+            self.heavy_hitters[col].update_counts(counts)
+            return
+        merged = self.value_counts.get(col)
+        merged = counts if merged is None else merged.add(counts, fill_value=0)
+        if len(merged) > MAX_TRACKED_VALUES:
+            # Too many distinct values to count exactly (IDs, free text, ...)
+            self.heavy_hitters[col] = SpaceSaving().update_counts(merged)
+            self.value_counts.pop(col, None)
+        else:
+            self.value_counts[col] = merged
+
+    def merge(self, other):
+        if not self.columns:
+            self.columns = list(other.columns)
+        self.total_rows += other.total_rows
+        for col, dtype in other.dtypes.items():
+            self.dtypes[col] = merge_dtypes(self.dtypes[col], dtype) if col in self.dtypes else dtype
+            self.nulls[col] = self.nulls.get(col, 0) + other.nulls[col]
+        for col, part in other.moments.items():
+            self.moments[col] = merge_moments(self.moments[col], part) if col in self.moments else part
+        for col, sketch in other.quantile_sketches.items():
+            self._quantile_sketch(col).merge(sketch)
+        for col, sketch in other.distinct.items():
+            if col not in self.distinct:
+                self.distinct[col] = HyperLogLog()
+            self.distinct[col].merge(sketch)
+        for col, counts in other.value_counts.items():
+            self._add_counts(col, counts)
+        for col, sketch in other.heavy_hitters.items():
+            if col not in self.heavy_hitters:
+                # Fold whatever this side counted exactly into the summary
+                self.heavy_hitters[col] = SpaceSaving()
+                if col in self.value_counts:
+                    self.heavy_hitters[col].update_counts(self.value_counts.pop(col))
+            self.heavy_hitters[col].merge(sketch)
+        return self
+
+    # Columns that stayed numeric in every chunk
+    def numeric_columns(self):
+        return [col for col in self.columns
+                if col in self.moments and pd.api.types.is_numeric_dtype(self.dtypes[col])
+                and not pd.api.types.is_bool_dtype(self.dtypes[col])]
+
+    # Exact for small cardinalities; the HyperLogLog estimate beyond that, never
+    # more than the column's non-null count
+    def distinct_count(self, col):
+        if col in self.value_counts:
+            return int(len(self.value_counts[col]))
+        if col not in self.distinct:
+            return 0
+        return min(self.distinct[col].count(), self.total_rows - self.nulls.get(col, 0))
+
+    def quantiles(self, col, qs):
+        sketch = self.quantile_sketches.get(col)
+        return sketch.quantiles(qs) if sketch is not None else [float('nan')] * len(qs)
+
+    def summary_stats(self):
+        summary_stats = {}
+        for col in self.numeric_columns():
+            n, mean, m2, lo, hi = self.moments[col]
+            quantiles = self.quantiles(col, QUANTILES)
+            summary_stats[col] = {
+                'count': n,
+                'nulls': self.nulls[col],
+                'mean': mean if n else float('nan'),
+                'std': math.sqrt(m2 / (n - 1)) if n > 1 else float('nan'),
+                'min': lo if n else float('nan'),
+                'max': hi if n else float('nan'),
+                'p25': quantiles[0],
+                'p50': quantiles[1],
+                'p75': quantiles[2],
+                # Exact until a column has more values than the KLL sketch keeps
+                # whole (100k); estimated from the sketch beyond that
+                'quantiles_exact': self.quantile_sketches[col].exact,
+                'distinct': self.distinct_count(col)
+            }
+        return summary_stats
+
+    # Cardinality and most frequent values of every non-numeric column
+    def categorical_stats(self, top_k=5):
+        categorical_stats = {}
+        numeric_columns = set(self.numeric_columns())
+        for col in self.columns:
+            if col in numeric_columns:
+                continue
+            if col in self.heavy_hitters:
+                categorical_stats[col] = {
+                    'distinct': self.distinct_count(col),
+                    'top': self.heavy_hitters[col].top(top_k),
+                    'exact': False
+                }
+                continue
+            counts = self.value_counts.get(col, pd.Series(dtype="int64"))
+            top = counts.sort_values(ascending=False, kind="mergesort").head(top_k)
+            categorical_stats[col] = {
+                'distinct': int(len(counts)),
+                'top': [{'value': _plain(value), 'count': int(count)} for value, count in top.items()],
+                'exact': True
+            }
+        return categorical_stats
+
+    # Bytes held by the sketches and exact counts, so the dataset cache budgets a
+    # profile by what it really holds (sys.getsizeof)
+    def __sizeof__(self):
+        parts = (self.dtypes, self.nulls, self.moments, self.quantile_sketches, self.distinct,
+                 self.value_counts, self.heavy_hitters)
+        return object.__sizeof__(self) + sum(
+            sys.getsizeof(part) + sum(sys.getsizeof(value) for value in part.values()) for part in parts)
+
+    # JSON-ready state, so a profile built at ingest can be stored and merged later
+    def to_dict(self):
+        return {
+            "total_rows": self.total_rows,
+            "columns": self.columns,
+            "dtypes": {col: str(dtype) for col, dtype in self.dtypes.items()},
+            "nulls": self.nulls,
+            "moments": self.moments,
+            "quantile_sketches": {col: sketch.to_dict() for col, sketch in self.quantile_sketches.items()},
+            "distinct": {col: sketch.to_dict() for col, sketch in self.distinct.items()},
+            "value_counts": {col: [[_plain(value), int(count)] for value, count in counts.items()]
+                             for col, counts in self.value_counts.items()},
+            "heavy_hitters": {col: sketch.to_dict() for col, sketch in self.heavy_hitters.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        profile.total_rows = data["total_rows"]
+        profile.columns = data["columns"]
+        profile.dtypes = {col: pd.api.types.pandas_dtype(dtype) for col, dtype in data["dtypes"].items()}
+        profile.nulls = data["nulls"]
+        profile.moments = {col: tuple(part) for col, part in data["moments"].items()}
+        profile.quantile_sketches = {col: KLLSketch.from_dict(sketch)
+                                     for col, sketch in data["quantile_sketches"].items()}
+        profile.distinct = {col: HyperLogLog.from_dict(sketch) for col, sketch in data["distinct"].items()}
+        profile.value_counts = {
+            col: pd.Series([count for _, count in pairs], index=[value for value, _ in pairs], dtype="int64")
+            for col, pairs in data["value_counts"].items()
+        }
+        profile.heavy_hitters = {col: SpaceSaving.from_dict(sketch)
+                                 for col, sketch in data["heavy_hitters"].items()}
+        return profile
+
+
+def merge_moments(a, b):
+    n_a, mean_a, m2_a, min_a, max_a = a
+    n_b, mean_b, m2_b, min_b, max_b = b
+    n = n_a + n_b
+    if n == 0:
+        return a
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return (n, mean, m2, min(min_a, min_b), max(max_a, max_b))
+
+
+# Profile any iterable of DataFrame chunks, calling progress(rows) after each one
+def profile_chunks(chunks, progress=None):
+    profile = ChunkedProfile()
+    for chunk in chunks:
+        profile.update(chunk)
+        if progress is not None:
+            progress(profile.total_rows)
+    return profile
+
+
+# Profile a CSV without ever holding more than one chunk in memory
+def profile_csv(file_path, chunksize=DEFAULT_CHUNK_ROWS):
+    return profile_chunks(pd.read_csv(file_path, chunksize=chunksize))
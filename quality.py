@@ -0,0 +1,221 @@
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from storage import estimate_rows, iter_chunks
+
+# Memory for the row and key hashes held before they spill to disk (bytes)
+QUALITY_MEMORY_BYTES = int(os.environ.get("BENCHVIZ_QUALITY_MEMORY_BYTES", 64 * 1024 * 1024))
+
+# Most spill partitions per hash set (2**bits files)
+MAX_PARTITION_BITS = 12
+
+# Bottom-k MinHash size per column; similarity estimates are within ~1/sqrt(k)
+MINHASH_SIZE = 256
+
+# Columns whose (row, value) pairs overlap at least this much are near-copies
+NEAR_DUPLICATE_SIMILARITY = 0.9
+
+# Columns checked for repeated keys: named like identifiers, or nearly unique in
+# the profile sketches (those only count as keys if the scan finds no repeats)
+KEY_NAME_PATTERN = re.compile(r"(^|[_\s])id$|^id([_\s]|$)|_key$", re.IGNORECASE)
+KEY_DISTINCT_SHARE = 0.95
+
+# Hash every null gets, whatever the column's dtype
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# splitmix64 finalizer over uint64 arrays (wraps modulo 2**64)
+def _mix(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# 64-bit hash per value. Numbers are hashed as float64 so a value hashes the
+# same whether a chunk parsed it as int or float.
+def _hash_column(values, nulls):
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        hashes = pd.util.hash_array(values.to_numpy(dtype="float64", na_value=np.nan))
+    else:
+        hashes = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+    hashes[nulls] = _NULL_HASH
+    return hashes
+
+
+# Multiset of 64-bit hashes that counts repeats in bounded memory. Hashes are
+# routed to partitions by their top bits; once the buffers outgrow the budget
+# every partition is appended to its own file, and counting loads one
+# partition at a time.
+class SpillingHashSet:
+    def __init__(self, folder, name, memory_bytes=QUALITY_MEMORY_BYTES, expected=0):
+        self.folder = folder
+        self.name = name
+        self.memory_bytes = memory_bytes
+        # Enough partitions (with 2x headroom) that each one fits the budget
+        needed = 2 * expected * 8 / max(memory_bytes, 1)
+        self.bits = min(int(np.ceil(np.log2(needed))) if needed > 1 else 0, MAX_PARTITION_BITS)
+        self.buffers = [[] for _ in range(2 ** self.bits)]
+        self.buffered = 0
+        self.total = 0
+        self.spilled = False
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        self.total += len(hashes)
+        if self.bits:
+            partition = (hashes >> np.uint64(64 - self.bits)).astype(np.intp)
+            order = np.argsort(partition, kind="stable")
+            bounds = np.searchsorted(partition[order], np.arange(1, len(self.buffers)))
+            for buffer, piece in zip(self.buffers, np.split(hashes[order], bounds)):
+                if len(piece):
+                    buffer.append(piece)
+        elif len(hashes):
+            self.buffers[0].append(hashes)
+        self.buffered += hashes.nbytes
+        if self.buffered > self.memory_bytes:
+            self._spill()
+
+    def _path(self, i):
+        return os.path.join(self.folder, f"{self.name}-{i:04d}.u64")
+
+    def _spill(self):
+        for i, buffer in enumerate(self.buffers):
+            if buffer:
+                with open(self._path(i), "ab") as f:
+                    for piece in buffer:
+                        piece.tofile(f)
+                buffer.clear()
+        self.buffered = 0
+        self.spilled = True
+
+    # Hashes that were already in the set when added (total minus distinct)
+    def repeats(self):
+        distinct = 0
+        for i, buffer in enumerate(self.buffers):
+            pieces = list(buffer)
+            if os.path.exists(self._path(i)):
+                pieces.append(np.fromfile(self._path(i), dtype=np.uint64))
+            if pieces:
+                distinct += len(np.unique(np.concatenate(pieces)))
+        return self.total - distinct
+
+
+# Bottom-k MinHash of a set: the k smallest element hashes seen. Mergeable
+# chunk by chunk, and two sketches estimate the sets' Jaccard similarity.
+class MinHash:
+    def __init__(self, size=MINHASH_SIZE):
+        self.size = size
+        self.values = np.empty(0, dtype=np.uint64)
+
+    def update(self, hashes):
+        if len(hashes) > self.size:
+            hashes = np.partition(hashes, self.size - 1)[:self.size]
+        self.values = np.unique(np.concatenate([self.values, hashes]))[:self.size]
+        return self
+
+    def similarity(self, other):
+        union = np.union1d(self.values, other.values)[:self.size]
+        if not len(union):
+            return 0.0
+        both = np.isin(union, self.values) & np.isin(union, other.values)
+        return float(both.sum()) / len(union)
+
+
+# Columns to check for duplicate keys, as (keys, possible_keys): identifier-like
+# names, and columns the profile's distinct-count sketches show as (almost)
+# unique. Free text and measures can be nearly unique too, so possible keys are
+# only reported when the scan finds them exactly unique.
+def key_candidates(profile):
+    keys, possible_keys = [], []
+    for col in profile.columns:
+        non_null = profile.total_rows - profile.nulls.get(col, 0)
+        if pd.api.types.is_float_dtype(profile.dtypes[col]):
+            continue
+        if KEY_NAME_PATTERN.search(str(col)):
+            keys.append(col)
+        elif non_null > 1 and profile.distinct_count(col) >= KEY_DISTINCT_SHARE * non_null:
+            possible_keys.append(col)
+    return keys, possible_keys
+
+
+# One streaming pass over a dataset reporting exact duplicate rows, repeated
+# values in `keys` (and in whichever `possible_keys` turn out unique), constant
+# columns and near-copy column pairs. Row and key hashes spill to a hidden
+# folder next to the dataset when they outgrow the memory budget; everything
+# else is a fixed-size sketch per column.
+def scan_quality(file_path, keys=(), possible_keys=(), memory_bytes=QUALITY_MEMORY_BYTES, progress=None):
+    declared = list(keys)
+    keys = list(dict.fromkeys(declared + list(possible_keys)))
+    expected = estimate_rows(file_path)
+    folder = tempfile.mkdtemp(prefix=".quality-", dir=os.path.dirname(file_path) or ".")
+    try:
+        budget = memory_bytes // (1 + len(keys))
+        rows = SpillingHashSet(folder, "rows", budget, expected)
+        key_sets = {key: SpillingHashSet(folder, f"key{i}", budget, expected) for i, key in enumerate(keys)}
+        key_nulls = dict.fromkeys(keys, 0)
+        columns, first, varies, minhashes = None, {}, {}, {}
+        total = 0
+
+        for chunk in iter_chunks(file_path):
+            if columns is None:
+                columns = list(chunk.columns)
+                missing = [key for key in keys if key not in columns]
+                if missing:
+                    raise ValueError(f"Unknown column(s): {', '.join(map(str, missing))}")
+                varies = dict.fromkeys(columns, False)
+                minhashes = {col: MinHash() for col in columns}
+            row_ids = _mix(np.arange(total, total + len(chunk), dtype=np.uint64))
+            row_hashes = np.zeros(len(chunk), dtype=np.uint64)
+            for col in columns:
+                nulls = chunk[col].isna().to_numpy()
+                hashes = _hash_column(chunk[col], nulls)
+                row_hashes = _mix(row_hashes ^ hashes)
+                present = hashes[~nulls]
+                if not varies[col] and len(present):
+                    if col not in first:
+                        first[col] = (present[0], _plain(chunk[col][~nulls].iloc[0]))
+                    varies[col] = bool((present != first[col][0]).any())
+                minhashes[col].update(_mix(present ^ row_ids[~nulls]))
+                if col in key_sets:
+                    key_sets[col].add(present)
+                    key_nulls[col] += int(nulls.sum())
+            rows.add(row_hashes)
+            total += len(chunk)
+            if progress is not None:
+                progress(total)
+
+        columns = columns or []
+        duplicate_rows = rows.repeats()
+        candidates = [col for col in columns if varies[col]]
+        near_duplicates = []
+        for i, a in enumerate(candidates):
+            for b in candidates[i + 1:]:
+                similarity = minhashes[a].similarity(minhashes[b])
+                if similarity >= NEAR_DUPLICATE_SIMILARITY:
+                    near_duplicates.append({"columns": [a, b], "similarity": round(similarity, 3)})
+        near_duplicates.sort(key=lambda pair: -pair["similarity"])
+
+        return {
+            "rows": total,
+            "duplicate_rows": duplicate_rows,
+            "duplicate_share": duplicate_rows / total if total else 0.0,
+            "keys": [{"column": key, "duplicates": duplicates, "nulls": key_nulls[key]}
+                     for key, duplicates in ((key, key_sets[key].repeats()) for key in keys)
+                     if key in declared or duplicates == 0],
+            "constant_columns": [{"column": col, "value": first[col][1] if col in first else None}
+                                 for col in columns if not varies[col]],
+            "near_duplicate_columns": near_duplicates,
+            "spilled": rows.spilled or any(key_set.spilled for key_set in key_sets.values()),
+        }
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
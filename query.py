@@ -0,0 +1,310 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from chunk_store import open_dataset
+from storage import fresh_columnar_paths, iter_chunks, pa, read_preview
+
+# DuckDB is optional: without it only structured queries are available
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+if pa is not None:
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+
+# Most rows a query may return, and the default when it sets no limit
+MAX_QUERY_ROWS = 100_000
+DEFAULT_QUERY_ROWS = 10_000
+
+# Wall-clock budget per query (seconds), enforced between chunks and by
+# interrupting DuckDB
+DEFAULT_QUERY_TIMEOUT = 10
+MAX_QUERY_TIMEOUT = 60
+
+# Rows per streamed chunk
+QUERY_BATCH_ROWS = 10_000
+
+# Distinct group keys a structured query may accumulate before it is refused
+MAX_QUERY_GROUPS = 100_000
+
+# Name the dataset goes by in SQL queries
+SQL_TABLE = "data"
+
+QUERY_AGGREGATES = ("count", "sum", "mean", "min", "max")
+FILTER_OPERATORS = ("==", "=", "!=", "<", "<=", ">", ">=", "in", "not in")
+
+# Per-chunk partial aggregates each output needs, and how partials combine
+_PARTIALS = {"count": ("count",), "sum": ("sum",), "mean": ("sum", "count"), "min": ("min",), "max": ("max",)}
+_MERGE = {"size": "sum", "count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class QueryTimeout(QueryError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def check(self):
+        if time.monotonic() > self.expires:
+            raise QueryTimeout(f"Query timed out after {self.seconds:g}s")
+
+
+def query_limits(limit=None, timeout=None):
+    limit = DEFAULT_QUERY_ROWS if limit is None else min(max(int(limit), 0), MAX_QUERY_ROWS)
+    timeout = DEFAULT_QUERY_TIMEOUT if timeout is None else min(max(float(timeout), 0.1), MAX_QUERY_TIMEOUT)
+    return limit, timeout
+
+
+def _column_list(value, name):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise QueryError(f"{name} must be a list of column names")
+    return value
+
+
+# Validate a structured query against the dataset's columns:
+#   select     columns to return (default: all)
+#   where      pyarrow DNF filters, e.g. [["Stage", "==", "III"], ["Age", ">", 40]]
+#   group_by   key columns
+#   aggregates [{"agg": "mean", "column": "Survival_Rate", "as": "avg_survival"}, ...]
+#   order_by   ["Age", ["Survival_Rate", "desc"], ...]
+def parse_spec(spec, columns):
+    known = set(columns)
+
+    def check(names):
+        missing = [name for name in names if name not in known]
+        if missing:
+            raise QueryError(f"Unknown column(s): {', '.join(missing)}")
+        return names
+
+    where = spec.get("where") or []
+    if where and not isinstance(where[0][0], (list, tuple)):
+        where = [where]
+    filters = []
+    for conjunction in where:
+        terms = []
+        for term in conjunction:
+            if len(term) != 3 or term[1] not in FILTER_OPERATORS:
+                raise QueryError(f"Unsupported filter: {term}")
+            name, op, value = term
+            check([name])
+            terms.append((name, "==" if op == "=" else op, value))
+        filters.append(terms)
+
+    group_by = check(_column_list(spec.get("group_by"), "group_by"))
+    aggregates = []
+    for item in spec.get("aggregates") or []:
+        agg, column = item.get("agg"), item.get("column")
+        if agg not in QUERY_AGGREGATES:
+            raise QueryError(f"Unknown aggregate: {agg}")
+        if column is None and agg != "count":
+            raise QueryError(f"Aggregate {agg} needs a column")
+        if column is not None:
+            check([column])
+        aggregates.append((agg, column, item.get("as") or (f"{agg}({column})" if column else "count")))
+
+    if group_by or aggregates:
+        select = group_by + [name for _, _, name in aggregates]
+    else:
+        select = check(_column_list(spec.get("select"), "select")) or list(columns)
+
+    order_by = []
+    for item in spec.get("order_by") or []:
+        name, direction = (item, "asc") if isinstance(item, str) else (item[0], item[1] if len(item) > 1 else "asc")
+        if name not in select:
+            raise QueryError(f"Cannot order by {name}: it is not in the result")
+        if direction not in ("asc", "desc"):
+            raise QueryError(f"Unknown sort direction: {direction}")
+        order_by.append((name, direction == "asc"))
+
+    return {"columns": list(columns), "select": select, "filters": filters, "group_by": group_by,
+            "aggregates": aggregates, "order_by": order_by}
+
+
+# Run a structured query chunk by chunk, reading only the columns it touches
+# and letting the columnar copy skip row groups the filters rule out. Yields
+# DataFrames (at least one, possibly empty).
+def run_spec(file_path, spec, limit, timeout):
+    deadline = Deadline(timeout)
+    parsed = parse_spec(spec, read_preview(file_path, nrows=1).columns.tolist())
+    if parsed["group_by"] or parsed["aggregates"]:
+        chunks = [_aggregate(file_path, parsed, deadline)]
+    else:
+        chunks = _scan(file_path, parsed, deadline)
+    if parsed["order_by"]:
+        chunks = [_top(chunks, parsed["order_by"], limit, deadline)]
+    return _limit(chunks, parsed["select"], limit, deadline)
+
+
+def _scan(file_path, parsed, deadline):
+    for chunk in iter_chunks(file_path, columns=parsed["select"], chunksize=QUERY_BATCH_ROWS,
+                             filters=parsed["filters"] or None):
+        deadline.check()
+        yield chunk
+
+
+# Sorting only needs the best `limit` rows, so keep just those between chunks
+def _top(chunks, order_by, limit, deadline):
+    names, ascending = [name for name, _ in order_by], [asc for _, asc in order_by]
+    best = None
+    for chunk in chunks:
+        deadline.check()
+        best = chunk if best is None else pd.concat([best, chunk], ignore_index=True)
+        best = best.sort_values(names, ascending=ascending, kind="mergesort", na_position="last").head(limit)
+    return best
+
+
+def _limit(chunks, select, limit, deadline):
+    remaining = limit
+    empty = True
+    for chunk in chunks:
+        if remaining <= 0:
+            break
+        deadline.check()
+        chunk = chunk.head(remaining).reset_index(drop=True)
+        remaining -= len(chunk)
+        for start in range(0, len(chunk), QUERY_BATCH_ROWS):
+            empty = False
+            yield chunk.iloc[start:start + QUERY_BATCH_ROWS]
+    if empty:
+        yield pd.DataFrame(columns=select)
+
+
+# Group-by with per-chunk partial aggregates merged as the scan goes, so memory
+# grows with the number of groups rather than rows
+def _aggregate(file_path, parsed, deadline):
+    keys, aggregates = parsed["group_by"], parsed["aggregates"]
+    value_columns = [column for _, column, _ in aggregates if column is not None]
+    # Counting rows alone still needs one column to read
+    columns = list(dict.fromkeys(keys + value_columns)) or parsed["columns"][:1]
+    partials = {}
+    for agg, column, _ in aggregates:
+        if column is not None:
+            for stat in _PARTIALS[agg]:
+                partials[f"{stat}:{column}"] = (column, stat)
+
+    totals = None
+    for chunk in iter_chunks(file_path, columns=columns, chunksize=QUERY_BATCH_ROWS,
+                             filters=parsed["filters"] or None):
+        deadline.check()
+        for agg, column, _ in aggregates:
+            if agg in ("sum", "mean") and not _is_numeric(chunk[column]):
+                raise QueryError(f"Column {column} is not numeric")
+        # A constant key stands in for "all rows" when there is no group_by
+        group_keys = keys or [np.zeros(len(chunk), dtype=np.int8)]
+        grouped = chunk.groupby(group_keys, sort=False, dropna=False)
+        part = grouped.agg(**partials) if partials else None
+        size = grouped.size().rename("size")
+        part = size.to_frame() if part is None else part.join(size)
+        if totals is not None:
+            part = pd.concat([totals, part]).groupby(level=list(range(part.index.nlevels)), sort=False,
+                                                     dropna=False).agg(
+                {name: _MERGE[name.split(":")[0]] for name in part.columns})
+        totals = part
+        if len(totals) > MAX_QUERY_GROUPS:
+            raise QueryError(f"More than {MAX_QUERY_GROUPS} groups; add filters or fewer group_by columns")
+
+    if totals is None or not len(totals):
+        if keys:
+            return pd.DataFrame(columns=parsed["select"])
+        # Aggregates over no rows still make one row, as in SQL
+        totals = pd.DataFrame({"size": [0]})
+        for name in partials:
+            totals[name] = 0 if name.startswith("count:") else np.nan
+    result = pd.DataFrame(index=totals.index)
+    for agg, column, name in aggregates:
+        if column is None:
+            result[name] = totals["size"]
+        elif agg == "mean":
+            count = totals[f"count:{column}"]
+            result[name] = totals[f"sum:{column}"] / count.where(count > 0)
+        else:
+            result[name] = totals[f"{agg}:{column}"]
+    if keys:
+        result = result.reset_index()
+        result.columns = parsed["select"]
+    else:
+        result = result.reset_index(drop=True)
+    return result
+
+
+def _is_numeric(values):
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+
+# Run SQL with DuckDB over the dataset, exposed as the table `data`. DuckDB
+# scans the columnar copy through Arrow, pushing projections and filters down
+# to row groups, and the connection cannot touch any other file. Yields
+# DataFrames (at least one, possibly empty).
+def run_sql(file_path, sql, limit, timeout):
+    if duckdb is None or pa is None:
+        raise QueryError("SQL queries need the duckdb and pyarrow packages; send a structured query instead")
+    sql = sql.strip().rstrip(";")
+    if not sql:
+        raise QueryError("Empty query")
+
+    paths = fresh_columnar_paths(file_path)
+    source = None
+    if paths:
+        dataset = ds.dataset(paths, format="parquet")
+    else:
+        # Chunked datasets are not files pyarrow can open by path
+        source = open_dataset(file_path)
+        dataset = pacsv.open_csv(source)
+    conn = duckdb.connect()
+    timer = threading.Timer(timeout, conn.interrupt)
+    try:
+        conn.register(SQL_TABLE, dataset)
+        conn.execute("SET enable_external_access = false")
+        conn.execute("SET lock_configuration = true")
+        timer.start()
+        try:
+            reader = conn.execute(f"SELECT * FROM ({sql}) AS q LIMIT {int(limit)}").fetch_record_batch(
+                QUERY_BATCH_ROWS)
+        except duckdb.InterruptException:
+            raise QueryTimeout(f"Query timed out after {timeout:g}s")
+        except duckdb.Error as e:
+            raise QueryError(str(e))
+    except BaseException:
+        timer.cancel()
+        conn.close()
+        if source is not None:
+            source.close()
+        raise
+    return _read_batches(reader, conn, timer, timeout, source)
+
+
+def _read_batches(reader, conn, timer, timeout, source=None):
+    try:
+        empty = True
+        while True:
+            try:
+                batch = reader.read_next_batch()
+            except StopIteration:
+                break
+            except duckdb.InterruptException:
+                raise QueryTimeout(f"Query timed out after {timeout:g}s")
+            empty = False
+            yield batch.to_pandas()
+        if empty:
+            yield reader.schema.empty_table().to_pandas()
+    finally:
+        timer.cancel()
+        conn.close()
+        if source is not None:
+            source.close()
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+# Rows read to decide each column's type; the full-file profile supplies the
+# exact ranges and cardinalities when it is available
+SCHEMA_SAMPLE_ROWS = 10_000
+
+# Text columns become `category` when they repeat enough
+CATEGORY_MAX_VALUES = 10_000
+CATEGORY_MAX_RATIO = 0.5
+
+# Spellings parsed as booleans (compared lower-cased and stripped)
+BOOLEAN_VALUES = {"yes": True, "no": False, "y": True, "n": False, "true": True, "false": False}
+
+INTEGER_DTYPES = ("uint8", "int8", "uint16", "int16", "uint32", "int32", "uint64", "int64")
+
+
+class SchemaMismatch(ValueError):
+    pass
+
+
+# Smallest integer dtype holding [lo, hi]; nullable (capitalized) if there are nulls
+def smallest_integer_dtype(lo, hi, nullable=False):
+    for name in INTEGER_DTYPES:
+        info = np.iinfo(name)
+        if info.min <= lo and hi <= info.max:
+            return name.capitalize().replace("Ui", "UI") if nullable else name
+    return "Int64" if nullable else "int64"
+
+
+def _is_boolean_text(values):
+    lowered = pd.Series(values.dropna().unique()).astype(str).str.strip().str.lower()
+    return len(lowered) > 0 and lowered.isin(list(BOOLEAN_VALUES)).all()
+
+
+# Pick a compact dtype for every column of `sample`. `profile` (a ChunkedProfile
+# of the whole file) provides the true min/max, null counts and distinct counts,
+# so a sample that happens to miss large values still gets a safe integer width.
+# Whole-number and boolean checks only see the sample, so the result goes
+# through fit_schema() before use. Columns whose default dtype is already the
+# best choice are left out.
+def infer_schema(sample, profile=None):
+    schema = {}
+    for col in sample.columns:
+        values = sample[col]
+        dtype = profile.dtypes[col] if profile is not None and col in profile.dtypes else values.dtype
+        nulls = profile.nulls[col] if profile is not None else int(values.isna().sum())
+        rows = profile.total_rows if profile is not None else len(values)
+
+        if pd.api.types.is_bool_dtype(dtype):
+            schema[col] = "boolean" if nulls else "bool"
+        elif pd.api.types.is_numeric_dtype(dtype):
+            if profile is not None and col in profile.moments:
+                n, _, _, lo, hi = profile.moments[col]
+            else:
+                n, lo, hi = values.count(), values.min(), values.max()
+            if not n:
+                continue
+            # Floats that only hold whole numbers (ints with gaps) become nullable ints
+            whole = pd.api.types.is_integer_dtype(dtype) or (
+                np.isfinite([lo, hi]).all() and (values.dropna() % 1 == 0).all())
+            if whole:
+                schema[col] = smallest_integer_dtype(lo, hi, nullable=bool(nulls))
+        elif _is_boolean_text(values):
+            schema[col] = "boolean" if nulls else "bool"
+        else:
+            distinct = profile.distinct_count(col) if profile is not None else values.nunique()
+            if distinct <= CATEGORY_MAX_VALUES and distinct <= CATEGORY_MAX_RATIO * max(rows - nulls, 1):
+                schema[col] = "category"
+    return schema
+
+
+def _cast(values, dtype, col):
+    if dtype in ("bool", "boolean"):
+        if pd.api.types.is_bool_dtype(values):
+            return values.astype(dtype)
+        lowered = values.astype("string").str.strip().str.lower()
+        mapped = lowered.map(BOOLEAN_VALUES)
+        if (mapped.isna() & lowered.notna()).any():
+            raise SchemaMismatch(f"Column {col} has values that are not booleans")
+        return mapped.astype("boolean") if dtype == "boolean" else mapped.astype("bool")
+    if dtype.lower() in INTEGER_DTYPES:
+        # astype() silently wraps out-of-range integers, so check the range first
+        info = np.iinfo(dtype.lower())
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            raise SchemaMismatch(f"Column {col} does not fit {dtype}")
+        if dtype.islower() and values.isna().any():
+            raise SchemaMismatch(f"Column {col} has missing values")
+        # astype() also truncates fractions
+        if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 != 0).any():
+            raise SchemaMismatch(f"Column {col} has values that are not whole numbers")
+    return values.astype(dtype)
+
+
+# One column converted to its schema dtype; SchemaMismatch if it does not fit
+def cast_column(values, dtype, col):
+    try:
+        return _cast(values, dtype, col)
+    except SchemaMismatch:
+        raise
+    except (TypeError, ValueError, OverflowError) as e:
+        raise SchemaMismatch(str(e)) from e
+
+
+# Convert a frame (or chunk) to the schema; SchemaMismatch if the data has
+# outgrown it, e.g. a value the sample never showed
+def apply_schema(df, schema):
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col in df.columns:
+            df[col] = cast_column(df[col], dtype, col)
+    return df
+
+
+# Deep memory use of every column before and after the schema, summed over chunks
+def memory_footprint(chunks, schema):
+    report = {"before_bytes": 0, "after_bytes": 0, "columns": {}}
+    for chunk in chunks:
+        add_footprint(report, chunk, schema)
+    return report
+
+
+# Check a schema inferred from a sample against every chunk of the file and
+# measure it. Columns some chunk does not fit (a fraction after a sample of
+# whole numbers, a spelling that is not a boolean, ...) are dropped from the
+# schema and keep their default dtype. Returns (schema, memory_footprint report).
+def fit_schema(chunks, schema):
+    schema = dict(schema)
+    report = {"before_bytes": 0, "after_bytes": 0, "columns": {}}
+    for chunk in chunks:
+        before = chunk.memory_usage(deep=True, index=False)
+        for col in chunk.columns:
+            sizes = report["columns"].setdefault(col, {"before_bytes": 0, "after_bytes": 0})
+            after = before[col]
+            if col in schema:
+                try:
+                    after = cast_column(chunk[col], schema[col], col).memory_usage(deep=True, index=False)
+                except SchemaMismatch:
+                    del schema[col]
+                    # Earlier chunks were measured narrowed; count them at their default size
+                    report["after_bytes"] += sizes["before_bytes"] - sizes["after_bytes"]
+                    sizes["after_bytes"] = sizes["before_bytes"]
+            sizes["before_bytes"] += int(before[col])
+            sizes["after_bytes"] += int(after)
+            report["before_bytes"] += int(before[col])
+            report["after_bytes"] += int(after)
+    return schema, report
+
+
+# Add one chunk's memory use to a memory_footprint() report, e.g. for appended
+# rows. Raises SchemaMismatch (leaving the report as it was) if the chunk does
+# not fit the schema.
+def add_footprint(report, chunk, schema):
+    before = chunk.memory_usage(deep=True, index=False)
+    after = apply_schema(chunk, schema).memory_usage(deep=True, index=False)
+    for col in chunk.columns:
+        sizes = report["columns"].setdefault(col, {"before_bytes": 0, "after_bytes": 0})
+        sizes["before_bytes"] += int(before[col])
+        sizes["after_bytes"] += int(after[col])
+        report["before_bytes"] += int(before[col])
+        report["after_bytes"] += int(after[col])
+    return report
+
+
+def _kind(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    return "text"
+
+
+# SchemaMismatch unless rows appended in `chunk` can join columns of the given
+# dtypes: numeric and boolean columns stay so, text columns take anything.
+# Columns that are entirely missing in the chunk fit any type.
+def check_append(dtypes, chunk):
+    for col, values in chunk.items():
+        expected = _kind(dtypes[col])
+        if expected == "text" or values.isna().all():
+            continue
+        if _kind(values.dtype) != expected:
+            raise SchemaMismatch(f"Column {col} holds {expected} values, the new rows do not")
@@ -0,0 +1,263 @@
+import base64
+import datetime
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Sketch sizes; memory per column is fixed no matter how many rows it has
+KLL_CAPACITY = 1024
+HLL_PRECISION = 12
+SPACE_SAVING_CAPACITY = 1000
+
+# Below these sizes the sketches keep every input and answer exactly: values
+# for quantiles, distinct value hashes for cardinality
+KLL_EXACT_VALUES = 100_000
+HLL_EXACT_VALUES = 10_000
+
+
+# JSON-safe scalar: NumPy scalars unwrapped, dates and times as ISO strings
+def _plain(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+# Quantile sketch in the KLL/MRL family: a stack of compactors where an item on
+# level h stands for 2**h inputs. A full level is sorted and every other item
+# (random offset) is promoted, so the rank error stays around
+# O(log(n / k) / k) while memory stays O(k log(n / k)).
+class KLLSketch:
+    def __init__(self, capacity=KLL_CAPACITY, seed=0, exact_values=KLL_EXACT_VALUES):
+        self.capacity = capacity
+        self.exact_values = exact_values
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def _compress(self):
+        # Nothing is compacted until there are more inputs than exact_values
+        if self.exact and self.n <= self.exact_values:
+            return
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # An odd item out stays behind so weights stay exact
+                keep = level[:len(level) % 2]
+                paired = level[len(level) % 2:]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def merge(self, other):
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+        return self
+
+    # True while nothing has been compacted, i.e. every input is still held
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def quantiles(self, qs):
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype="float64")
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="mergesort")
+        values, weights = values[order], weights[order]
+        if self.exact:
+            return [float(v) for v in np.quantile(values, qs)]
+        # Weighted midpoint ranks, clamped to the exact min/max
+        ranks = (np.cumsum(weights) - weights / 2) / weights.sum()
+        return [float(np.clip(np.interp(q, ranks, values), self.min, self.max)) for q in qs]
+
+    # Counted by the dataset cache's byte budget (sys.getsizeof)
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(level.nbytes for level in self.levels)
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "exact_values": self.exact_values, "n": self.n,
+                "min": self.min if self.n else None,
+                "max": self.max if self.n else None, "levels": [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"], exact_values=data.get("exact_values", KLL_EXACT_VALUES))
+        sketch.n = data["n"]
+        sketch.min = data["min"] if data["min"] is not None else math.inf
+        sketch.max = data["max"] if data["max"] is not None else -math.inf
+        sketch.levels = [np.asarray(level, dtype="float64") for level in data["levels"]]
+        return sketch
+
+
+# 64-bit hashes of a column's values. Numbers are hashed as float64 so the same
+# value hashes identically whether a chunk parsed it as int or float.
+def hash_values(values):
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return pd.util.hash_array(values.to_numpy(dtype="float64"))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+def _bit_length(x):
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        length += high * shift
+        x = np.where(high, x >> np.uint64(shift), x)
+    return length + (x > 0)
+
+
+# HyperLogLog distinct counter (~1.04 / sqrt(2**p) relative error). Up to
+# exact_values distinct values it also keeps their hashes and counts exactly.
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION, exact_values=HLL_EXACT_VALUES):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+        self.exact_values = exact_values
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def _add_exact(self, hashes):
+        if self.hashes is None:
+            return
+        self.hashes = np.union1d(self.hashes, hashes)
+        if len(self.hashes) > self.exact_values:
+            self.hashes = None
+
+    def update_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return self
+        self._add_exact(hashes)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def update(self, values):
+        return self.update_hashes(hash_values(values))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if other.hashes is None:
+            self.hashes = None
+        else:
+            self._add_exact(other.hashes)
+        return self
+
+    def count(self):
+        if self.hashes is not None:
+            return len(self.hashes)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        zeros = int((self.registers == 0).sum())
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.registers.nbytes + (self.hashes.nbytes if self.hashes is not None else 0)
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode(),
+                "exact_values": self.exact_values,
+                "hashes": base64.b64encode(self.hashes.tobytes()).decode() if self.hashes is not None else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["precision"], data.get("exact_values", HLL_EXACT_VALUES))
+        sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        # States saved before exact counting existed carry no hashes
+        hashes = data.get("hashes")
+        sketch.hashes = np.frombuffer(base64.b64decode(hashes), dtype=np.uint64).copy() if hashes is not None else None
+        return sketch
+
+
+# Space-Saving heavy hitters, kept as {value: (count, error)}: count is an
+# upper bound and count - error a lower bound on the true frequency, and any
+# value not tracked occurs at most `floor` times. Summaries merge as in Agarwal
+# et al., "Mergeable Summaries", so chunks and partitions combine freely.
+class SpaceSaving:
+    def __init__(self, capacity=SPACE_SAVING_CAPACITY):
+        self.capacity = capacity
+        self.counters = {}
+        self.floor = 0
+
+    # Add exact counts (e.g. a chunk's value_counts())
+    def update_counts(self, counts):
+        top = counts.sort_values(ascending=False, kind="mergesort")
+        other = SpaceSaving(self.capacity)
+        other.counters = {_plain(value): (int(count), 0) for value, count in top.head(self.capacity).items()}
+        if len(top) > self.capacity:
+            other.floor = int(top.iloc[self.capacity])
+        return self.merge(other)
+
+    def update(self, values):
+        return self.update_counts(pd.Series(values).value_counts(dropna=True))
+
+    def merge(self, other):
+        merged = {}
+        for value in self.counters.keys() | other.counters.keys():
+            count_a, error_a = self.counters.get(value, (self.floor, self.floor))
+            count_b, error_b = other.counters.get(value, (other.floor, other.floor))
+            merged[value] = (count_a + count_b, error_a + error_b)
+        top = sorted(merged.items(), key=lambda item: -item[1][0])
+        floor = self.floor + other.floor
+        if len(top) > self.capacity:
+            floor = max(floor, top[self.capacity][1][0])
+        self.counters = dict(top[:self.capacity])
+        self.floor = floor
+        return self
+
+    def top(self, k):
+        items = sorted(self.counters.items(), key=lambda item: -item[1][0])[:k]
+        return [{"value": value, "count": count, "error": error} for value, (count, error) in items]
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.counters) + sum(
+            sys.getsizeof(value) + sys.getsizeof(counts) for value, counts in self.counters.items())
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "floor": self.floor,
+                "counters": [[value, count, error] for value, (count, error) in self.counters.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.counters = {value: (count, error) for value, count, error in data["counters"]}
+        sketch.floor = data["floor"]
+        return sketch
@@ -0,0 +1,555 @@
+import csv
+import itertools
+import json
+import os
+import shutil
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from chunk_store import (append_blocks, dataset_compression, dataset_size, load_manifest, open_dataset, open_stored,
+                         read_blocks)
+from decompress import decompress
+from metrics import record_read
+from profiling import DEFAULT_CHUNK_ROWS, ChunkedProfile, profile_csv
+from schema import SchemaMismatch, cast_column, check_append
+
+# pyarrow is optional: without it datasets are simply read from CSV
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Typed columnar copies live in a hidden folder next to the uploaded CSVs
+COLUMNAR_DIRNAME = ".columnar"
+
+# Serialized profile sketches and inferred schemas live in their own hidden folders
+SKETCHES_DIRNAME = ".sketches"
+SCHEMA_DIRNAME = ".schema"
+
+# Manifests of the Parquet partitions appended after a dataset was converted
+PARTITIONS_DIRNAME = ".partitions"
+
+# Rows per Parquet row group (the unit of predicate pushdown)
+ROW_GROUP_ROWS = 128_000
+
+# Bytes of CSV handed to pyarrow's multithreaded reader at a time during
+# conversion; it parses the window's blocks on all cores
+PARSE_WINDOW_BYTES = 64 * 1024 * 1024
+
+# Parquet key-value metadata entry identifying the CSV a copy was built from
+SOURCE_METADATA_KEY = b"benchviz.source"
+
+
+def columnar_path(file_path):
+    folder, name = os.path.split(file_path)
+    return os.path.join(folder, COLUMNAR_DIRNAME, name + ".parquet")
+
+
+def _source_signature(file_path):
+    st = os.stat(file_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+# Appended rows are stored as extra Parquet files in a folder next to the copy
+def partitions_path(file_path):
+    return columnar_path(file_path)[:-len(".parquet")] + ".parts"
+
+
+# Signature of the CSV a columnar copy was converted from
+def _columnar_source(path):
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        return json.loads(metadata.get(SOURCE_METADATA_KEY, b"{}"))
+    except (OSError, pa.ArrowInvalid, ValueError):
+        return None
+
+
+# Files of the columnar copy (the converted file, then any appended partitions
+# in order) if together they hold exactly the rows of the current CSV
+def fresh_columnar_paths(file_path):
+    if pa is None:
+        return None
+    path = columnar_path(file_path)
+    if not os.path.exists(path):
+        return None
+    source = _columnar_source(path)
+    if source is None:
+        return None
+    if source == _source_signature(file_path):
+        return [path]
+    manifest = _load_sidecar(file_path, PARTITIONS_DIRNAME)
+    if manifest is None or manifest.get("base") != source:
+        return None
+    parts = [os.path.join(partitions_path(file_path), name) for name in manifest["parts"]]
+    return [path] + parts if all(os.path.exists(part) for part in parts) else None
+
+
+# JSON files stored next to a dataset (sketches, schema), each tagged with the
+# signature of the file it describes so a re-upload makes it stale
+def sidecar_path(file_path, dirname):
+    folder, name = os.path.split(file_path)
+    return os.path.join(folder, dirname, name + ".json")
+
+
+def _save_sidecar(file_path, dirname, payload):
+    path = sidecar_path(file_path, dirname)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"source": _source_signature(file_path), "payload": payload}, f)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_sidecar(file_path, dirname):
+    path = sidecar_path(file_path, dirname)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("source") != _source_signature(file_path):
+        return None
+    return state.get("payload")
+
+
+# Store a profile's mergeable state (moments and sketches) next to the dataset
+def save_profile_state(file_path, profile):
+    return _save_sidecar(file_path, SKETCHES_DIRNAME, profile.to_dict())
+
+
+# The stored profile if it was built from the current version of the file
+def load_profile_state(file_path):
+    state = _load_sidecar(file_path, SKETCHES_DIRNAME)
+    if state is None:
+        return None
+    try:
+        return ChunkedProfile.from_dict(state)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# Store an inferred schema and its memory report next to the dataset
+def save_schema(file_path, schema, memory=None):
+    return _save_sidecar(file_path, SCHEMA_DIRNAME, {"schema": schema, "memory": memory})
+
+
+# {"schema": ..., "memory": ...} if inferred from the current version of the file
+def load_schema(file_path):
+    state = _load_sidecar(file_path, SCHEMA_DIRNAME)
+    return state if isinstance(state, dict) and "schema" in state else None
+
+
+def _arrow_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if pd.api.types.is_float_dtype(dtype):
+        return pa.float64()
+    return pa.string()
+
+
+# Convert a CSV into a Parquet copy with typed columns and per-row-group
+# min/max/null statistics. Returns the Parquet path, or None if pyarrow is
+# not installed.
+def convert_to_columnar(file_path, chunksize=DEFAULT_CHUNK_ROWS, progress=None):
+    if pa is None:
+        return None
+    path = columnar_path(file_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    signature = json.dumps(_source_signature(file_path)).encode()
+    # Partitions appended to a previous version belong to it
+    shutil.rmtree(partitions_path(file_path), ignore_errors=True)
+
+    try:
+        _write_arrow_csv(file_path, tmp_path, signature, progress)
+    except pa.ArrowInvalid:
+        # pyarrow's reader fixes types from the first window and
+        # rejects ragged rows; fall back to pandas chunks with merged dtypes
+        _write_pandas_chunks(file_path, tmp_path, signature, chunksize, progress)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _csv_convert_options(column_types=None):
+    return pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True, timestamp_parsers=[])
+
+
+def _write_arrow_csv(file_path, out_path, signature, progress=None):
+    writer = None
+    rows = 0
+    try:
+        with open_dataset(file_path) as f:
+            for table in _read_csv_windows(f):
+                if writer is None:
+                    schema = table.schema.with_metadata({SOURCE_METADATA_KEY: signature})
+                    writer = pq.ParquetWriter(out_path, schema)
+                writer.write_table(table.replace_schema_metadata(schema.metadata), row_group_size=ROW_GROUP_ROWS)
+                rows += table.num_rows
+                if progress is not None:
+                    progress(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    record_read("csv", rows=rows, nbytes=dataset_size(file_path))
+
+
+# Parse a CSV stream with pyarrow's multithreaded reader, one window of whole
+# lines at a time (pyarrow assumes no line breaks inside quoted values, so
+# cutting after a newline is safe). Types are inferred from the first window
+# and kept for the rest; a later value that does not fit raises ArrowInvalid.
+def _read_csv_windows(f, window_bytes=PARSE_WINDOW_BYTES):
+    read_options, convert_options = pacsv.ReadOptions(use_threads=True), _csv_convert_options()
+    first = True
+    carry = b""
+    while True:
+        block = f.read(window_bytes)
+        data = carry + block
+        if block:
+            cut = data.rfind(b"\n") + 1
+            if not cut:
+                # A single line longer than the window
+                carry = data
+                continue
+            data, carry = data[:cut], data[cut:]
+        elif not first and not data.strip():
+            return
+        table = pacsv.read_csv(pa.py_buffer(data), read_options=read_options, convert_options=convert_options)
+        if first:
+            # Later windows have no header line
+            read_options = pacsv.ReadOptions(use_threads=True, column_names=table.column_names)
+            convert_options = _csv_convert_options(table.schema)
+            first = False
+        yield table
+        if not block:
+            return
+
+
+def _write_pandas_chunks(file_path, out_path, signature, chunksize, progress=None):
+    with open_dataset(file_path) as f:
+        profile = profile_csv(f, chunksize=chunksize)
+    schema = pa.schema(
+        [(col, _arrow_type(profile.dtypes[col])) for col in profile.columns],
+        metadata={SOURCE_METADATA_KEY: signature},
+    )
+    rows = 0
+    with pq.ParquetWriter(out_path, schema) as writer, open_dataset(file_path) as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize):
+            arrays = []
+            for field in schema:
+                values = chunk[field.name]
+                if pa.types.is_string(field.type):
+                    values = values.astype(object).where(values.notna(), None).map(
+                        lambda v: v if v is None else str(v))
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema), row_group_size=ROW_GROUP_ROWS)
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+
+
+# Append the rows of the CSV at `delta_path` to a dataset in one pass over the
+# new rows. The header must match `columns` and every value must fit the stored
+# types, otherwise SchemaMismatch is raised and nothing is written. The rows
+# become the next partition of the columnar copy and are added to the end of
+# the CSV. Returns a profile of the new rows only; `on_chunk` sees every chunk.
+def append_csv(file_path, delta_path, columns, dtypes, on_chunk=None, chunksize=DEFAULT_CHUNK_ROWS):
+    compression = dataset_compression(file_path)
+    if compression is not None:
+        raise ValueError(f"Cannot append rows to a {compression} compressed dataset; upload it uncompressed")
+    with open(delta_path, newline="") as f:
+        header = next(csv.reader(f), None)
+    if header != list(columns):
+        raise SchemaMismatch(f"Expected the columns {', '.join(map(str, columns))}, got {', '.join(header or [])}")
+
+    delta = ChunkedProfile()
+
+    def add(chunk):
+        delta.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+
+    paths = fresh_columnar_paths(file_path)
+    part_path = None
+    try:
+        if paths is not None:
+            # Parse with the copy's own column types, so a value that does not
+            # fit (text in a numeric column, a fraction in an integer one) fails
+            schema = pq.read_schema(paths[0])
+            part_path = os.path.join(partitions_path(file_path), f"part-{len(paths):05d}.parquet")
+            os.makedirs(os.path.dirname(part_path), exist_ok=True)
+            try:
+                reader = pacsv.open_csv(delta_path, convert_options=_csv_convert_options(schema.remove_metadata()))
+                with pq.ParquetWriter(part_path + ".tmp", schema) as writer:
+                    for batch in reader:
+                        table = pa.Table.from_batches([batch]).replace_schema_metadata(schema.metadata)
+                        writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+                        add(batch.to_pandas())
+            except pa.ArrowInvalid as e:
+                raise SchemaMismatch(str(e)) from e
+        else:
+            for chunk in pd.read_csv(delta_path, chunksize=chunksize):
+                check_append(dtypes, chunk)
+                add(chunk)
+    except BaseException:
+        if part_path is not None and os.path.exists(part_path + ".tmp"):
+            os.remove(part_path + ".tmp")
+        raise
+
+    if not delta.total_rows:
+        if part_path is not None:
+            os.remove(part_path + ".tmp")
+        return delta
+    if part_path is not None:
+        os.replace(part_path + ".tmp", part_path)
+    _append_rows(file_path, delta_path)
+    if paths is not None:
+        parts = [os.path.basename(path) for path in paths[1:] + [part_path]]
+        _save_sidecar(file_path, PARTITIONS_DIRNAME, {"base": _columnar_source(paths[0]), "parts": parts})
+    record_read("csv", rows=delta.total_rows, nbytes=os.path.getsize(delta_path))
+    return delta
+
+
+# Copy the delta's rows (not its header) to the end of the CSV; a chunked
+# dataset only stores the new chunks and extends its manifest
+def _append_rows(file_path, delta_path):
+    if load_manifest(file_path) is not None:
+        with open_dataset(file_path) as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+            needs_newline = end > 0 and f.read(1) != b"\n"
+        with open(delta_path, "rb") as src:
+            src.readline()
+            append_blocks(file_path, itertools.chain([b"\n"] if needs_newline else [], read_blocks(src)))
+        return
+    with open(delta_path, "rb") as src, open(file_path, "rb+") as dst:
+        src.readline()
+        end = dst.seek(0, os.SEEK_END)
+        if end:
+            dst.seek(end - 1)
+            needs_newline = dst.read(1) != b"\n"
+            dst.seek(0, os.SEEK_END)
+            if needs_newline:
+                dst.write(b"\n")
+        shutil.copyfileobj(src, dst)
+
+
+# Inferred dtypes and per-row-group statistics recorded in the Parquet footers
+def columnar_metadata(file_path):
+    paths = fresh_columnar_paths(file_path)
+    if paths is None:
+        return None
+    parquet_files = [pq.ParquetFile(path) for path in paths]
+    row_groups = []
+    for parquet_file in parquet_files:
+        metadata = parquet_file.metadata
+        for i in range(metadata.num_row_groups):
+            group = metadata.row_group(i)
+            columns = {}
+            for j in range(group.num_columns):
+                column = group.column(j)
+                stats = column.statistics
+                columns[column.path_in_schema] = {
+                    "min": _plain(stats.min) if stats is not None and stats.has_min_max else None,
+                    "max": _plain(stats.max) if stats is not None and stats.has_min_max else None,
+                    "null_count": stats.null_count if stats is not None and stats.has_null_count else None,
+                }
+            row_groups.append({"num_rows": group.num_rows, "columns": columns})
+    return {
+        "path": paths[0],
+        "partitions": paths[1:],
+        "num_rows": sum(parquet_file.metadata.num_rows for parquet_file in parquet_files),
+        "size": sum(os.path.getsize(path) for path in paths),
+        "dtypes": {field.name: str(field.type) for field in parquet_files[0].schema_arrow},
+        "row_groups": row_groups,
+    }
+
+
+def _plain(value):
+    return value.decode(errors="replace") if isinstance(value, bytes) else value
+
+
+# Row count of a dataset: exact from the columnar footers, otherwise extrapolated
+# from the line density of the first block of the CSV (used for progress/ETA)
+def estimate_rows(file_path, sample_bytes=1024 * 1024):
+    paths = fresh_columnar_paths(file_path)
+    if paths is not None:
+        return sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+    size = dataset_size(file_path)
+    with open_stored(file_path) as raw, decompress(raw) as f:
+        sample = f.read(sample_bytes)
+        complete = len(sample) < sample_bytes or not f.peek(1)
+        # Stored bytes per byte of content read so far (below 1 if compressed)
+        ratio = 1.0 if f is raw else raw.tell() / max(f.raw.tell(), 1)
+    lines = sample.count(b"\n")
+    if not sample or lines == 0:
+        return 0
+    if complete:
+        return max(lines - 1 + (not sample.endswith(b"\n")), 0)
+    return max(int(size / ratio * lines / len(sample)) - 1, 0)
+
+
+# Stream a dataset in DataFrame chunks, reading only the requested columns and
+# keeping only rows matching `filters` (same DNF syntax as read_columns). The
+# columnar copy is memory-mapped when available, otherwise the CSV is parsed.
+def iter_chunks(file_path, columns=None, chunksize=DEFAULT_CHUNK_ROWS, filters=None):
+    paths = fresh_columnar_paths(file_path)
+    if paths is not None:
+        parquet_files = [pq.ParquetFile(path, memory_map=True) for path in paths]
+        record_read("parquet", nbytes=_parquet_bytes(parquet_files, columns))
+        if filters:
+            # The dataset scanner skips row groups whose statistics rule the filters out
+            batches = ds.dataset(paths, format="parquet").to_batches(
+                columns=columns, filter=pq.filters_to_expression(filters), batch_size=chunksize)
+        else:
+            batches = (batch for parquet_file in parquet_files
+                       for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns))
+        for batch in batches:
+            record_read("parquet", rows=batch.num_rows)
+            yield batch.to_pandas()
+        return
+    filter_columns = {name for conjunction in _as_dnf(filters) for name, _, _ in conjunction}
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + sorted(filter_columns)))
+    with open_dataset(file_path) as f:
+        position = 0
+        for chunk in pd.read_csv(f, chunksize=chunksize, usecols=usecols):
+            record_read("csv", rows=len(chunk), nbytes=f.tell() - position)
+            position = f.tell()
+            if filters:
+                chunk = apply_filters(chunk, filters)
+            yield chunk if columns is None else chunk[list(columns)]
+
+
+# Compressed size of the selected column chunks, i.e. what a full scan reads
+def _parquet_bytes(parquet_files, columns=None):
+    total = 0
+    for parquet_file in parquet_files:
+        metadata = parquet_file.metadata
+        for i in range(metadata.num_row_groups):
+            group = metadata.row_group(i)
+            for j in range(group.num_columns):
+                column = group.column(j)
+                if columns is None or column.path_in_schema in columns:
+                    total += column.total_compressed_size
+    return total
+
+
+# First rows of a dataset, touching only the first row group of the columnar copy
+def read_preview(file_path, nrows=100):
+    paths = fresh_columnar_paths(file_path)
+    if paths is not None:
+        batches, remaining = [], nrows
+        for path in paths:
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=max(nrows, 1)):
+                batches.append(batch.slice(0, remaining))
+                remaining -= batches[-1].num_rows
+                if not remaining:
+                    break
+            if not remaining:
+                break
+        return pa.Table.from_batches(batches, schema=parquet_file.schema_arrow).to_pandas()
+    with open_dataset(file_path) as f:
+        return pd.read_csv(f, nrows=nrows)
+
+
+# Load selected columns, letting Parquet skip row groups that cannot match
+# `filters` (pyarrow DNF filter syntax, e.g. [("Stage", "==", "III")]). With
+# optimize=True the stored schema (compact ints, categories, booleans) is applied
+# as the chunks are read; columns the data no longer fits keep their default dtype.
+def read_columns(file_path, columns=None, filters=None, optimize=False):
+    stored = load_schema(file_path) if optimize else None
+    if stored is not None and stored["schema"]:
+        return _read_narrowed(file_path, columns, filters, stored["schema"])
+    paths = fresh_columnar_paths(file_path)
+    if paths is not None:
+        table = pq.read_table(paths, columns=columns, filters=filters, memory_map=True)
+        record_read("parquet", rows=table.num_rows,
+                    nbytes=_parquet_bytes([pq.ParquetFile(path) for path in paths], columns))
+        return table.to_pandas()
+    filter_columns = {name for conjunction in _as_dnf(filters) for name, _, _ in conjunction}
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + sorted(filter_columns)))
+    with open_dataset(file_path) as f:
+        df = pd.read_csv(f, usecols=usecols)
+    record_read("csv", rows=len(df), nbytes=dataset_size(file_path))
+    df = apply_filters(df, filters)
+    return df if columns is None else df[list(columns)]
+
+
+# Every chunk is converted to the schema as soon as it is parsed, so the frame
+# is never held whole in its default dtypes. A column some chunk does not fit
+# is read again without it.
+def _read_narrowed(file_path, columns, filters, schema):
+    schema = dict(schema)
+    while True:
+        pieces, misfits = [], []
+        for chunk in iter_chunks(file_path, columns=columns, filters=filters):
+            for col in [col for col in chunk.columns if col in schema]:
+                try:
+                    chunk[col] = cast_column(chunk[col], schema[col], col)
+                except SchemaMismatch:
+                    misfits.append(col)
+            if misfits:
+                break
+            pieces.append(chunk)
+        if not misfits:
+            break
+        for col in misfits:
+            del schema[col]
+
+    if not pieces:
+        return read_preview(file_path, nrows=0)[columns] if columns is not None else read_preview(file_path, nrows=0)
+    # Chunks have their own categories; concat() would fall back to object
+    categorical = [col for col in pieces[0].columns if schema.get(col) == "category"]
+    df = pd.concat([piece.drop(columns=categorical) for piece in pieces], ignore_index=True)
+    for col in categorical:
+        df[col] = union_categoricals([piece[col] for piece in pieces], sort_categories=True)
+    return df[list(pieces[0].columns)]
+
+
+_FILTER_OPS = {
+    "==": lambda s, v: s == v,
+    "=": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "in": lambda s, v: s.isin(v),
+    "not in": lambda s, v: ~s.isin(v),
+}
+
+
+def _as_dnf(filters):
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [filters]
+    return filters
+
+
+# Apply pyarrow-style DNF filters to an in-memory frame
+def apply_filters(df, filters):
+    dnf = _as_dnf(filters)
+    if not dnf:
+        return df
+    mask = pd.Series(False, index=df.index)
+    for conjunction in dnf:
+        part = pd.Series(True, index=df.index)
+        for name, op, value in conjunction:
+            part &= _FILTER_OPS[op](df[name], value).fillna(False).astype(bool)
+        mask |= part
+    return df[mask]
@@ -0,0 +1,147 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from storage import fresh_columnar_paths, iter_chunks, pa, pq, read_columns, read_preview
+
+# Operators understood in DataTable filter queries (optionally prefixed with
+# "i"/"s" for case-insensitive/sensitive matching)
+_OPERATOR_ALIASES = {"ge": ">=", "le": "<=", "ne": "!=", "eq": "=", "gt": ">", "lt": "<"}
+
+# Position column the API adds to every page (1-based). It is not stored, so
+# sorting or filtering on it works on row positions.
+ROW_NUMBER_COLUMN = "Row #"
+
+_FILTER_TERM = re.compile(
+    r"^\{(?P<column>[^}]*)\}\s*"
+    r"(?P<case>[is])?(?P<operator>is not blank|is blank|is nil|>=|<=|!=|=|>|<|"
+    r"ge|le|ne|eq|gt|lt|contains|datestartswith)(?:\s+|$|(?<=[=<>]))(?P<value>.*)$",
+    re.DOTALL,
+)
+
+
+# Parse a Dash DataTable `filter_query` (e.g. "{Age} > 30 && {Stage} contains III")
+# into (column, operator, value, case_sensitive) terms
+def parse_filter_query(filter_query):
+    terms = []
+    if not filter_query:
+        return terms
+    for part in filter_query.split(" && "):
+        match = _FILTER_TERM.match(part.strip())
+        if match is None:
+            raise ValueError(f"Unsupported filter expression: {part}")
+        operator = _OPERATOR_ALIASES.get(match.group("operator"), match.group("operator"))
+        value = match.group("value").strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        terms.append((match.group("column"), operator, value, match.group("case") != "i"))
+    return terms
+
+
+def _coerce(series, value):
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+# Boolean mask of rows matching every parsed filter term
+def filter_mask(df, terms):
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value, case_sensitive in terms:
+        series = df[column]
+        # Text matches use the value as typed: "3" contains-matches 30, not "3.0"
+        if operator not in ("contains", "datestartswith"):
+            value = _coerce(series, value)
+        if operator in ("is blank", "is nil"):
+            matched = series.isna() | (series.astype(str).str.strip() == "")
+        elif operator == "is not blank":
+            matched = series.notna() & (series.astype(str).str.strip() != "")
+        elif operator == "contains":
+            matched = series.astype(str).str.contains(str(value), case=case_sensitive, regex=False)
+        elif isinstance(value, str) and not case_sensitive and operator in ("=", "!="):
+            matched = (series.astype(str).str.lower() == value.lower()) == (operator == "=")
+        elif operator == "datestartswith":
+            matched = series.astype(str).str.startswith(str(value))
+        elif isinstance(value, str) and pd.api.types.is_numeric_dtype(series):
+            # A non-numeric value compared against a numeric column matches nothing
+            matched = pd.Series(operator == "!=", index=series.index)
+        elif operator == "=":
+            matched = series == value
+        elif operator == "!=":
+            matched = series != value
+        elif operator == "<":
+            matched = series < value
+        elif operator == "<=":
+            matched = series <= value
+        elif operator == ">":
+            matched = series > value
+        else:
+            matched = series >= value
+        mask &= matched.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+# Positions of the rows to show, in display order, after filtering and sorting
+# the whole dataset. Only the filter and sort columns are loaded.
+def ordered_row_ids(file_path, sort_by=None, sort_dir="asc", filter_query=None):
+    terms = parse_filter_query(filter_query)
+    key_columns = list(dict.fromkeys([term[0] for term in terms] + ([sort_by] if sort_by else [])))
+    if not key_columns:
+        return None
+
+    stored_columns = [col for col in key_columns if col != ROW_NUMBER_COLUMN]
+    # With only the row number asked for, one stored column still gives the row count
+    keys = read_columns(file_path, columns=stored_columns or list(read_preview(file_path, nrows=1).columns[:1]))
+    row_ids = np.arange(len(keys))
+    if ROW_NUMBER_COLUMN in key_columns:
+        keys[ROW_NUMBER_COLUMN] = row_ids + 1
+    if terms:
+        mask = filter_mask(keys, terms)
+        keys, row_ids = keys[mask], row_ids[mask]
+    if sort_by:
+        # Stable sort, nulls last, ties kept in file order
+        order = keys[sort_by].reset_index(drop=True).sort_values(
+            ascending=sort_dir != "desc", kind="mergesort", na_position="last").index.to_numpy()
+        row_ids = row_ids[order]
+    return row_ids
+
+
+# Materialize the rows at the given file positions, in the given order
+def take_rows(file_path, row_ids):
+    if len(row_ids) == 0:
+        return read_preview(file_path, nrows=1).head(0)
+
+    paths = fresh_columnar_paths(file_path)
+    if paths is not None:
+        # Decode only the row groups that contain requested rows; row groups are
+        # numbered across the converted file and its appended partitions
+        parquet_files = [pq.ParquetFile(path, memory_map=True) for path in paths]
+        locations = [(parquet_file, i) for parquet_file in parquet_files
+                     for i in range(parquet_file.metadata.num_row_groups)]
+        starts = np.cumsum([0] + [parquet_file.metadata.row_group(i).num_rows for parquet_file, i in locations])
+        row_groups = np.searchsorted(starts, row_ids, side="right") - 1
+        groups = np.unique(row_groups)
+        table = pa.concat_tables([locations[g][0].read_row_group(locations[g][1]) for g in groups])
+        # Map file positions onto positions within the concatenated row groups
+        bases = np.cumsum(np.concatenate([[0], starts[groups + 1] - starts[groups]]))[:-1]
+        local = row_ids - starts[row_groups] + bases[np.searchsorted(groups, row_groups)]
+        return table.take(local).to_pandas()
+
+    wanted = pd.Index(row_ids)
+    last = wanted.max()
+    parts = []
+    offset = 0
+    for chunk in iter_chunks(file_path):
+        if offset > last:
+            break
+        positions = wanted[(wanted >= offset) & (wanted < offset + len(chunk))]
+        if len(positions):
+            part = chunk.iloc[positions - offset]
+            part.index = positions
+            parts.append(part)
+        offset += len(chunk)
+    return pd.concat(parts).loc[row_ids]
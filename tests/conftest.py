@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# The API in-process. back.py keeps its uploads in ./datasets, so it is
+# imported (and runs) from a temporary directory, never the repository.
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    from fastapi.testclient import TestClient
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+    try:
+        import back
+        with TestClient(back.app) as client:
+            yield client
+    finally:
+        os.chdir(cwd)
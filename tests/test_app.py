@@ -0,0 +1,59 @@
+import json
+
+import pandas as pd
+
+import app
+from app import format_stat, load_benchmark_targets, load_visualize_columns, render_dataset
+from encoding import dumps
+from profiling import profile_chunks
+
+
+def test_format_stat():
+    assert format_stat(1.234) == "1.23"
+    assert format_stat(3) == "3.00"
+    assert format_stat(None) == "N/A"
+    assert format_stat(float("nan")) == "N/A"
+
+
+# The std (and for an all-null column, every statistic) of a one-row file is
+# NaN, which the JSON encoder sends as null
+def test_render_one_row_dataset():
+    df = pd.DataFrame({"Age": [42.0], "Score": [float("nan")], "Name": ["a"]})
+    profile = profile_chunks([df])
+    summary_stats = json.loads(dumps(profile.summary_stats()))
+    assert summary_stats["Age"]["std"] is None
+    dataset_data = {
+        "columns": ["Row #"] + list(df.columns),
+        "data": {"Row #": [1], "Age": [42.0], "Score": [None], "Name": ["a"]},
+        "total_rows": 1,
+        "total_cols": 3,
+        "missing_values": 1,
+        "column_types": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "summary_stats": summary_stats,
+        "categorical_stats": json.loads(dumps(profile.categorical_stats())),
+        "numeric_columns": profile.numeric_columns(),
+        "memory": None,
+    }
+    assert "N/A" in str(render_dataset("one.csv", dataset_data))
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+# Column pickers read the catalog entry, never the full /dataset/{filename} profile
+def test_column_pickers_use_catalog_entry(monkeypatch):
+    requested = []
+    entry = {"name": "d.csv", "column_types": {"id": "int64", "name": "str", "score": "float64"},
+             "summary_stats": {"id": {}, "score": {}}}
+    monkeypatch.setattr(app.backend, "get", lambda path, **kwargs: requested.append(path) or FakeResponse(entry))
+
+    assert [option["value"] for option in load_benchmark_targets("d.csv")] == ["id", "name", "score"]
+    x_options, y_options, _, _ = load_visualize_columns("d.csv", "groupby")
+    assert [option["value"] for option in x_options] == ["id", "name", "score"]
+    assert [option["value"] for option in y_options] == ["id", "score"]
+    assert requested == ["/datasets/d.csv", "/datasets/d.csv"]
@@ -0,0 +1,48 @@
+import time
+
+
+# Uploads return an ingest job; wait for it and return its result
+def upload(api, name, content, **params):
+    job = api.post("/upload/", params=params, files={"file": (name, content, "text/csv")}).json()
+    assert job["kind"] == "ingest" and job["description"] == name
+    while job["status"] in ("queued", "running"):
+        time.sleep(0.01)
+        job = api.get(f"/jobs/{job['job_id']}").json()
+    assert job["status"] == "succeeded", job["error"]
+    return job["result"]
+
+
+# pyarrow reads ISO dates as datetime.date, which the JSON sidecars cannot hold as is
+def test_upload_date_column(api):
+    content = b"id,d,v\n1,2013-01-01,3.5\n2,2013-01-02,4\n3,2013-01-01,1\n"
+    result = upload(api, "dates.csv", content, profile="true")
+    assert result["sketches"] is True
+    assert "error" not in result["profile"]
+    assert result["profile"]["categorical_stats"]["d"]["top"][0] == {"value": "2013-01-01", "count": 2}
+
+    profile = api.get("/dataset/dates.csv").json()
+    assert profile["total_rows"] == 3
+    assert profile["categorical_stats"]["d"]["distinct"] == 2
+
+
+def test_sketch_reports_exact_distinct_counts(api):
+    rows = "".join(f"{i},{i % 60}\n" for i in range(12_000))
+    upload(api, "ages.csv", ("id,age\n" + rows).encode())
+    columns = api.get("/dataset/ages.csv/sketch").json()["columns"]
+    assert columns["age"]["distinct"] == 60 and columns["age"]["distinct_exact"] is True
+    # Past 10k distinct values the count is a HyperLogLog estimate, at most the row count
+    assert columns["id"]["distinct_exact"] is False
+    assert columns["id"]["distinct"] <= 12_000
+
+
+def test_chunked_upload_is_ingested_as_a_job(api):
+    content = b"a,b\n1,x\n2,y\n"
+    session = api.post("/uploads/", json={"filename": "parts.csv", "size": len(content)}).json()
+    api.put(f"/uploads/{session['upload_id']}/parts/1", content=content)
+    job = api.post(f"/uploads/{session['upload_id']}/complete").json()
+    assert job["kind"] == "ingest"
+    while job["status"] in ("queued", "running"):
+        time.sleep(0.01)
+        job = api.get(f"/jobs/{job['job_id']}").json()
+    assert job["result"]["status"] == "uploaded" and job["result"]["storage"]["size"] == len(content)
+    assert api.get("/datasets/parts.csv").json()["column_types"] == {"a": "int64", "b": "str"}
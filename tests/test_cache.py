@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from cache import DatasetCache, estimate_size
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_estimate_size():
+    df = pd.DataFrame({"a": np.arange(1000, dtype="int64")})
+    assert estimate_size(df) >= 8000
+    assert estimate_size({"a": np.zeros(1000)}) > estimate_size({"a": np.zeros(10)})
+    assert estimate_size([b"x" * 1000, b"y" * 1000]) > 2000
+
+
+def test_hits_and_invalidation(tmp_path):
+    path = write(tmp_path / "a.csv", "a\n1\n")
+    cache = DatasetCache()
+    loads = []
+    load = lambda p: loads.append(p) or len(loads)
+    assert cache.get_or_load(path, "profile", load) == 1
+    assert cache.get_or_load(path, "profile", load) == 1
+    assert cache.get_or_load(path, "preview", load) == 2
+    cache.invalidate(path)
+    assert cache.get_or_load(path, "profile", load) == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 1)
+
+
+# A rewritten file gets a new fingerprint, so its old entries are never served
+def test_changed_file_is_reloaded(tmp_path):
+    path = write(tmp_path / "a.csv", "a\n1\n")
+    cache = DatasetCache()
+    assert cache.get_or_load(path, "data", lambda p: open(p).read()) == "a\n1\n"
+    write(tmp_path / "a.csv", "a\n1\n2\n")
+    assert cache.get_or_load(path, "data", lambda p: open(p).read()) == "a\n1\n2\n"
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    paths = [write(tmp_path / f"{i}.csv", str(i)) for i in range(3)]
+    value = np.zeros(1000)
+    size = estimate_size(value)
+    cache = DatasetCache(max_bytes=2 * size)
+    cache.get_or_load(paths[0], "data", lambda p: np.zeros(1000))
+    cache.get_or_load(paths[1], "data", lambda p: np.zeros(1000))
+    # Touching the first entry makes the second the one to go
+    cache.get_or_load(paths[0], "data", lambda p: None)
+    cache.get_or_load(paths[2], "data", lambda p: np.zeros(1000))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2 and stats["bytes"] == 2 * size <= stats["max_bytes"]
+    loads = []
+    cache.get_or_load(paths[1], "data", lambda p: loads.append(p) or np.zeros(1000))
+    assert loads == [paths[1]]
+
+
+def test_value_over_budget_is_not_cached(tmp_path):
+    path = write(tmp_path / "a.csv", "a\n")
+    cache = DatasetCache(max_bytes=100)
+    assert len(cache.get_or_load(path, "data", lambda p: np.zeros(1000))) == 1000
+    assert cache.stats()["entries"] == 0 and cache.current_bytes == 0
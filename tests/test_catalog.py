@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from catalog import MAX_CATALOG_PAGE, Catalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = Catalog(str(tmp_path / ".catalog.sqlite3"))
+    yield catalog
+    catalog.close()
+
+
+def add(catalog, folder, name, rows=10, cols=2, size=100, uploaded_at=None):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    profile = {"total_rows": rows, "total_cols": cols, "missing_values": 0,
+               "column_types": {f"c{i}": "int64" for i in range(cols)}, "summary_stats": {"c0": {"mean": 1.0}}}
+    catalog.upsert(name, path, "hash-" + name, profile, uploaded_at)
+
+
+def names(page):
+    return [item["name"] for item in page["items"]]
+
+
+def test_get_entry(catalog, tmp_path):
+    add(catalog, str(tmp_path), "sales.csv", rows=5, cols=3, size=42, uploaded_at=1.0)
+    entry = catalog.get("sales.csv")
+    assert (entry["rows"], entry["cols"], entry["size"], entry["uploaded_at"]) == (5, 3, 42, 1.0)
+    assert entry["column_types"] == {"c0": "int64", "c1": "int64", "c2": "int64"}
+    assert entry["summary_stats"] == {"c0": {"mean": 1.0}}
+    assert catalog.get("missing.csv") is None
+
+
+# Updates keep the first upload time unless a new one is given
+def test_upsert_updates_in_place(catalog, tmp_path):
+    add(catalog, str(tmp_path), "a.csv", rows=1, uploaded_at=1.0)
+    add(catalog, str(tmp_path), "a.csv", rows=2)
+    assert catalog.get("a.csv")["rows"] == 2 and catalog.get("a.csv")["uploaded_at"] == 1.0
+    assert catalog.names() == ["a.csv"]
+    assert names(catalog.list("a.c")) == ["a.csv"]
+
+
+def test_search(catalog, tmp_path):
+    for name in ("brain_tumor.csv", "Chocolate Sales.csv", "results_with_crew.csv", "tumor_2.csv"):
+        add(catalog, str(tmp_path), name)
+    assert names(catalog.list("tumor")) == ["brain_tumor.csv", "tumor_2.csv"]
+    assert names(catalog.list("SALES")) == ["Chocolate Sales.csv"]
+    # One or two characters match name prefixes, with LIKE wildcards escaped
+    assert names(catalog.list("tu")) == ["tumor_2.csv"]
+    assert names(catalog.list("r_")) == []
+    assert names(catalog.list('"with')) == []
+    catalog.remove("tumor_2.csv")
+    assert names(catalog.list("tumor")) == ["brain_tumor.csv"]
+
+
+def test_sort_filter_and_page(catalog, tmp_path):
+    for i in range(10):
+        add(catalog, str(tmp_path), f"d{i}.csv", rows=i * 10, cols=i % 3 + 1, size=100 - i)
+    page = catalog.list(sort_by="rows", sort_dir="desc", offset=2, limit=3)
+    assert names(page) == ["d7.csv", "d6.csv", "d5.csv"] and page["total"] == 10
+    assert names(catalog.list(sort_by="size", min_rows=20, max_rows=50, min_cols=2)) == ["d5.csv", "d4.csv", "d2.csv"]
+    assert catalog.list(max_size=91)["total"] == 1
+    assert catalog.list(limit=10 ** 6)["limit"] == MAX_CATALOG_PAGE
+    with pytest.raises(ValueError):
+        catalog.list(sort_by="content_hash")
+
+
+def test_sync(catalog, tmp_path):
+    folder = str(tmp_path / "datasets")
+    os.makedirs(folder)
+    add(catalog, folder, "gone.csv")
+    os.remove(os.path.join(folder, "gone.csv"))
+    for name in ("new.csv", ".hidden"):
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(b"a\n1\n")
+    catalog.sync(folder, describe=lambda name, path: {"total_rows": 1, "total_cols": 1})
+    assert catalog.names() == ["new.csv"]
+    assert catalog.get("new.csv")["rows"] == 1 and catalog.get("new.csv")["size"] == 4
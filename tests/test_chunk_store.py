@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from chunk_store import (CHUNKS_DIRNAME, MAX_CHUNK_BYTES, MIN_CHUNK_BYTES, append_blocks, collect_garbage,
+                         load_manifest, open_dataset, split_chunks, storage_stats, store_blocks)
+
+
+def random_bytes(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=n, dtype=np.uint8).tobytes()
+
+
+def blocks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+# Boundaries depend only on the bytes, never on how the stream was blocked
+def test_split_chunks_ignores_blocking():
+    data = random_bytes(1_000_000)
+    chunks = list(split_chunks([data]))
+    assert b"".join(chunks) == data
+    assert all(MIN_CHUNK_BYTES <= len(chunk) <= MAX_CHUNK_BYTES for chunk in chunks[:-1])
+    assert list(split_chunks(blocks(data, 7_777))) == chunks
+    assert list(split_chunks([])) == []
+
+
+# Zeros never match the rolling hash, so chunks are cut at the maximum size
+def test_split_chunks_caps_size():
+    chunks = list(split_chunks([bytes(3 * MAX_CHUNK_BYTES + 5)]))
+    assert [len(chunk) for chunk in chunks] == [MAX_CHUNK_BYTES] * 3 + [5]
+
+
+def test_edit_only_stores_nearby_chunks(tmp_path):
+    data = random_bytes(1_000_000)
+    first = store_blocks(str(tmp_path / "a.csv"), [data])
+    assert first["new_chunks"] == first["chunks"] and not first["replaced"]
+    edited = data[:500_000] + b"edit" + data[500_000:]
+    second = store_blocks(str(tmp_path / "b.csv"), blocks(edited, 65_536))
+    assert second["new_chunks"] <= 2 and second["stored_bytes"] < 3 * MAX_CHUNK_BYTES
+    with open_dataset(str(tmp_path / "b.csv")) as f:
+        assert f.read() == edited
+
+
+def test_reupload_is_unchanged(tmp_path):
+    path = str(tmp_path / "a.csv")
+    data = random_bytes(200_000)
+    store_blocks(path, [data])
+    mtime = os.stat(path).st_mtime_ns
+    again = store_blocks(path, blocks(data, 1000))
+    assert again["unchanged"] and not again["replaced"] and again["new_chunks"] == 0
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_append_and_seek(tmp_path):
+    path = str(tmp_path / "a.csv")
+    head, tail = random_bytes(300_000, 1), random_bytes(100_000, 2)
+    store_blocks(path, [head])
+    append_blocks(path, [tail])
+    assert load_manifest(path)["size"] == len(head) + len(tail)
+    with open_dataset(path) as f:
+        f.seek(len(head) - 10)
+        assert f.read(20) == (head + tail)[len(head) - 10:len(head) + 10]
+
+
+def test_collect_garbage(tmp_path):
+    folder = str(tmp_path)
+    store_blocks(os.path.join(folder, "a.csv"), [random_bytes(300_000, 1)])
+    store_blocks(os.path.join(folder, "b.csv"), [random_bytes(300_000, 2)])
+    replaced = store_blocks(os.path.join(folder, "b.csv"), [random_bytes(300_000, 3)])
+    assert replaced["replaced"]
+
+    # Unreferenced chunks inside the grace period are kept
+    assert collect_garbage(folder) == 0
+    assert collect_garbage(folder, grace=0) > 0
+    stats = storage_stats(folder)
+    assert stats["datasets"] == 2 and stats["stored_bytes"] == stats["logical_bytes"] == 600_000
+    for name in ("a.csv", "b.csv"):
+        with open_dataset(os.path.join(folder, name)) as f:
+            assert len(f.read()) == 300_000
+
+    os.remove(os.path.join(folder, "a.csv"))
+    collect_garbage(folder, grace=0)
+    assert storage_stats(folder)["stored_bytes"] == 300_000
+    assert os.path.isdir(os.path.join(folder, CHUNKS_DIRNAME))
@@ -0,0 +1,64 @@
+import bz2
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from decompress import UnsupportedCompression, decompress, detect_compression, pa, zstandard
+
+CONTENT = b"a,b\n" + b"".join(b"%d,x%d\n" % (i, i) for i in range(50_000))
+
+
+def zipped(*members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def read_all(raw):
+    with decompress(io.BufferedReader(io.BytesIO(raw))) as f:
+        return f.read()
+
+
+def test_detect_compression():
+    assert detect_compression(gzip.compress(b"x")[:10]) == "gzip"
+    assert detect_compression(bz2.compress(b"x")[:10]) == "bz2"
+    assert detect_compression(zipped(("a.csv", b"x"))[:10]) == "zip"
+    assert detect_compression(b"\x28\xb5\x2f\xfd\x00") == "zstd"
+    assert detect_compression(b"BZh9 not a block") is None
+    assert detect_compression(CONTENT[:10]) is None
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress])
+def test_decompress_streams(compress):
+    assert read_all(compress(CONTENT)) == CONTENT
+
+
+def test_plain_passes_through():
+    raw = io.BufferedReader(io.BytesIO(CONTENT))
+    assert decompress(raw) is raw
+
+
+# Folders and macOS metadata come before the data file in some archives
+def test_zip_reads_first_data_file():
+    assert read_all(zipped(("__MACOSX/._a.csv", b"meta"), ("data/", b""), ("data/a.csv", CONTENT))) == CONTENT
+    with pytest.raises(UnsupportedCompression):
+        read_all(zipped(("__MACOSX/._a.csv", b"meta")))
+
+
+@pytest.mark.skipif(zstandard is None and pa is None, reason="needs zstandard or pyarrow")
+def test_zstd():
+    if zstandard is not None:
+        data = zstandard.ZstdCompressor().compress(CONTENT)
+    else:
+        data = pa.compress(CONTENT, codec="zstd", asbytes=True)
+    assert read_all(data) == CONTENT
+
+
+def test_tell_counts_decompressed_bytes():
+    with decompress(io.BufferedReader(io.BytesIO(gzip.compress(CONTENT)))) as f:
+        f.read(1000)
+        assert f.tell() == 1000
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiling import profile_chunks
+from quality import MinHash, SpillingHashSet, key_candidates, scan_quality
+
+
+def write_csv(tmp_path, df, name="data.csv"):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_spilling_hash_set_counts_repeats(tmp_path):
+    in_memory = SpillingHashSet(str(tmp_path), "a", memory_bytes=1 << 20)
+    spilled = SpillingHashSet(str(tmp_path), "b", memory_bytes=800, expected=10_000)
+    for values in (np.arange(5000), np.arange(4000, 10_000), np.array([7, 7])):
+        in_memory.add(values)
+        spilled.add(values)
+    assert not in_memory.spilled and spilled.spilled and spilled.bits > 0
+    assert in_memory.repeats() == spilled.repeats() == 1002
+    assert any(name.startswith("b-") for name in os.listdir(tmp_path))
+
+
+def test_minhash_similarity():
+    a = MinHash().update(np.arange(10_000, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    b = MinHash().update(np.arange(10_000, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    c = MinHash().update(np.arange(10_000, 20_000, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    assert a.similarity(b) == 1.0
+    assert a.similarity(c) < 0.1
+    assert MinHash().similarity(MinHash()) == 0.0
+
+
+# 1 and 1.0 are the same value, whichever dtype a chunk parsed them as
+def test_duplicate_rows_and_keys(tmp_path):
+    df = pd.DataFrame({"user_id": [1, 2, 2, 3, 1, 1], "name": ["a", "b", "b", "c", "a", "z"],
+                       "score": [1.0, 2.0, 2.0, 3.0, 1.0, np.nan]})
+    result = scan_quality(write_csv(tmp_path, df), keys=["user_id"])
+    assert result["rows"] == 6 and result["duplicate_rows"] == 2
+    assert result["keys"] == [{"column": "user_id", "duplicates": 3, "nulls": 0}]
+    assert not result["spilled"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".quality-")]
+
+
+def test_constant_and_near_duplicate_columns(tmp_path):
+    n = 2000
+    df = pd.DataFrame({"a": np.arange(n), "b": np.arange(n), "c": np.arange(n)[::-1], "k": ["x"] * n,
+                       "e": [np.nan] * n})
+    result = scan_quality(write_csv(tmp_path, df))
+    assert result["constant_columns"] == [{"column": "k", "value": "x"}, {"column": "e", "value": None}]
+    assert result["near_duplicate_columns"] == [{"columns": ["a", "b"], "similarity": 1.0}]
+
+
+# Possible keys are only reported when the scan finds them exactly unique
+def test_possible_keys(tmp_path):
+    df = pd.DataFrame({"code": [f"c{i}" for i in range(100)], "ref": list(range(99)) + [5]})
+    result = scan_quality(write_csv(tmp_path, df), possible_keys=["code", "ref"])
+    assert [key["column"] for key in result["keys"]] == ["code"]
+
+
+def test_key_candidates():
+    n = 1000
+    df = pd.DataFrame({"id": np.arange(n) % 10, "order_key": np.arange(n), "code": [f"c{i}" for i in range(n)],
+                       "price": np.random.default_rng(0).random(n), "group": np.arange(n) % 3})
+    profile = profile_chunks([df])
+    assert key_candidates(profile) == (["id", "order_key"], ["code"])
+
+
+def test_unknown_key(tmp_path):
+    path = write_csv(tmp_path, pd.DataFrame({"a": [1]}))
+    with pytest.raises(ValueError, match="Unknown column"):
+        scan_quality(path, keys=["b"])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from query import MAX_QUERY_ROWS, QueryError, QueryTimeout, parse_spec, query_limits, run_spec
+
+COLUMNS = ["Stage", "Age", "Rate"]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"Stage": ["I", "II", "I", "III", "II", "I"], "Age": [30, 50, 40, 70, 60, 20],
+                  "Rate": [0.5, 0.25, np.nan, 0.75, 1.0, 0.25]}).to_csv(path, index=False)
+    return str(path)
+
+
+def run(path, spec, limit=100, timeout=10):
+    return pd.concat(list(run_spec(path, spec, limit, timeout)), ignore_index=True)
+
+
+def test_parse_spec():
+    parsed = parse_spec({"where": [["Stage", "=", "I"], ["Age", ">", 20]], "group_by": "Stage",
+                         "aggregates": [{"agg": "mean", "column": "Rate"}, {"agg": "count", "as": "n"}],
+                         "order_by": [["n", "desc"]]}, COLUMNS)
+    assert parsed["filters"] == [[("Stage", "==", "I"), ("Age", ">", 20)]]
+    assert parsed["select"] == ["Stage", "mean(Rate)", "n"]
+    assert parsed["aggregates"] == [("mean", "Rate", "mean(Rate)"), ("count", None, "n")]
+    assert parsed["order_by"] == [("n", False)]
+    assert parse_spec({}, COLUMNS)["select"] == COLUMNS
+
+
+@pytest.mark.parametrize("spec", [
+    {"select": ["Nope"]},
+    {"where": [["Age", "~", 1]]},
+    {"aggregates": [{"agg": "median", "column": "Age"}]},
+    {"aggregates": [{"agg": "sum"}]},
+    {"select": ["Age"], "order_by": ["Rate"]},
+    {"order_by": [["Age", "up"]]},
+])
+def test_parse_spec_rejects(spec):
+    with pytest.raises(QueryError):
+        parse_spec(spec, COLUMNS)
+
+
+def test_query_limits():
+    assert query_limits(10 ** 9, 0)[0] == MAX_QUERY_ROWS
+    assert query_limits(-5, 1000) == (0, 60)
+
+
+def test_filter_select_order(csv_path):
+    result = run(csv_path, {"select": ["Age", "Stage"], "where": [["Stage", "in", ["I", "II"]]],
+                            "order_by": [["Age", "desc"]]}, limit=3)
+    assert result.to_dict("list") == {"Age": [60, 50, 40], "Stage": ["II", "II", "I"]}
+
+
+# mean is sum / count of non-null values, merged across chunks
+def test_group_by_aggregate(csv_path, monkeypatch):
+    monkeypatch.setattr("query.QUERY_BATCH_ROWS", 2)
+    result = run(csv_path, {"group_by": ["Stage"], "order_by": ["Stage"],
+                            "aggregates": [{"agg": "count", "as": "n"}, {"agg": "mean", "column": "Rate"},
+                                           {"agg": "max", "column": "Age"}, {"agg": "count", "column": "Rate"}]})
+    assert result.to_dict("list") == {"Stage": ["I", "II", "III"], "n": [3, 2, 1], "mean(Rate)": [0.375, 0.625, 0.75],
+                                      "max(Age)": [40, 60, 70], "count(Rate)": [2, 2, 1]}
+
+
+def test_aggregate_without_rows(csv_path):
+    where = [["Age", ">", 100]]
+    total = run(csv_path, {"where": where, "aggregates": [{"agg": "count"}, {"agg": "sum", "column": "Age"}]})
+    assert total["count"].tolist() == [0] and np.isnan(total["sum(Age)"][0])
+    grouped = run(csv_path, {"where": where, "group_by": ["Stage"], "aggregates": [{"agg": "count"}]})
+    assert grouped.empty and grouped.columns.tolist() == ["Stage", "count"]
+
+
+def test_sum_of_text_column(csv_path):
+    with pytest.raises(QueryError):
+        run(csv_path, {"aggregates": [{"agg": "sum", "column": "Stage"}]})
+
+
+def test_timeout(csv_path):
+    with pytest.raises(QueryTimeout):
+        run(csv_path, {}, timeout=-1)
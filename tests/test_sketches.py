@@ -0,0 +1,86 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, KLLSketch, SpaceSaving
+
+
+def round_trip(sketch):
+    return type(sketch).from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+
+def test_kll_exact_below_threshold():
+    sketch = KLLSketch().update(np.arange(1000.0)).update([np.nan])
+    assert sketch.exact and sketch.n == 1000
+    assert sketch.quantiles([0.0, 0.5, 1.0]) == [0.0, 499.5, 999.0]
+
+
+def test_kll_merge_matches_one_pass():
+    values = np.random.default_rng(1).normal(size=200_000)
+    whole = KLLSketch(exact_values=0).update(values)
+    merged = KLLSketch(exact_values=0, seed=1)
+    for part in np.array_split(values, 7):
+        merged.merge(KLLSketch(exact_values=0, seed=2).update(part))
+    assert not merged.exact and merged.n == whole.n == len(values)
+    assert merged.min == values.min() and merged.max == values.max()
+    # Rank error stays around a percent with the default capacity
+    for q, estimate in zip((0.1, 0.5, 0.9), merged.quantiles([0.1, 0.5, 0.9])):
+        assert abs((values < estimate).mean() - q) < 0.01
+
+
+def test_kll_round_trip():
+    sketch = KLLSketch(capacity=64, exact_values=0).update(np.arange(10_000.0))
+    restored = round_trip(sketch)
+    assert restored.n == sketch.n and len(restored.levels) == len(sketch.levels)
+    assert restored.quantiles([0.25, 0.75]) == sketch.quantiles([0.25, 0.75])
+    empty = round_trip(KLLSketch())
+    assert empty.n == 0 and np.isnan(empty.quantiles([0.5])[0])
+
+
+def test_hll_counts_exactly_then_estimates():
+    hll = HyperLogLog(exact_values=100).update(np.arange(50) % 20)
+    assert hll.hashes is not None and hll.count() == 20
+    hll.update(np.arange(100_000))
+    assert hll.hashes is None
+    assert abs(hll.count() - 100_000) < 0.05 * 100_000
+
+
+# Ints and floats hash alike, so chunks parsed with different dtypes merge
+def test_hll_merge():
+    a = HyperLogLog().update(pd.Series([1, 2, 3]))
+    b = HyperLogLog().update(pd.Series([2.0, 3.0, 4.0, np.nan]))
+    assert a.merge(b).count() == 4
+    big = HyperLogLog(exact_values=10).update(np.arange(1000))
+    assert HyperLogLog().update([1, 2]).merge(big).hashes is None
+
+
+def test_hll_round_trip():
+    for hll in (HyperLogLog().update(["a", "b", "a"]), HyperLogLog(exact_values=10).update(np.arange(5000))):
+        restored = round_trip(hll)
+        assert restored.count() == hll.count()
+        assert (restored.registers == hll.registers).all()
+
+
+def test_space_saving_merge_bounds():
+    values = ["a"] * 50 + ["b"] * 30 + list("cdefghij") * 2
+    sketch = SpaceSaving(capacity=3)
+    for part in (values[:40], values[40:70], values[70:]):
+        sketch.merge(SpaceSaving(capacity=3).update(part))
+    top = sketch.top(2)
+    assert [item["value"] for item in top] == ["a", "b"]
+    # count is an upper bound and count - error a lower bound
+    assert top[0]["count"] - top[0]["error"] <= 50 <= top[0]["count"]
+    assert top[1]["count"] - top[1]["error"] <= 30 <= top[1]["count"]
+    assert len(sketch.counters) == 3 and sketch.floor <= 2
+
+
+# Values are stored as JSON scalars: NumPy numbers unwrapped, dates as ISO strings
+def test_space_saving_round_trip():
+    sketch = SpaceSaving().update_counts(pd.Series([3, 1], index=[np.int64(7), np.int64(8)]))
+    sketch.update([datetime.date(2013, 1, 1)] * 2)
+    restored = round_trip(sketch)
+    assert restored.top(3) == sketch.top(3) == [{"value": 7, "count": 3, "error": 0},
+                                                {"value": "2013-01-01", "count": 2, "error": 0},
+                                                {"value": 8, "count": 1, "error": 0}]
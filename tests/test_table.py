@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from table import ROW_NUMBER_COLUMN, filter_mask, ordered_row_ids, parse_filter_query
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"Age": [30, 10, 20, 10, 40], "Name": list("abcde")}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_sort_by_row_number(csv_path):
+    assert ordered_row_ids(csv_path, ROW_NUMBER_COLUMN, "asc").tolist() == [0, 1, 2, 3, 4]
+    assert ordered_row_ids(csv_path, ROW_NUMBER_COLUMN, "desc").tolist() == [4, 3, 2, 1, 0]
+
+
+def test_filter_by_row_number(csv_path):
+    row_ids = ordered_row_ids(csv_path, "Age", "asc", "{Row #} >= 2 && {Row #} <= 4")
+    assert row_ids.tolist() == [1, 3, 2]
+
+
+def test_sort_is_stable_with_nulls_last(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"Age": [2, np.nan, 1, 2]}).to_csv(path, index=False)
+    assert ordered_row_ids(str(path), "Age", "asc").tolist() == [2, 0, 3, 1]
+    assert ordered_row_ids(str(path)) is None
+
+
+# Untyped DataTable columns filter with `contains`, numeric ones included
+def test_contains_on_numeric_column():
+    df = pd.DataFrame({"Age": [30, 13, 20, 3], "Score": [1.5, 3.25, 2.0, np.nan]})
+    assert filter_mask(df, parse_filter_query("{Age} contains 3")).tolist() == [True, True, False, True]
+    assert filter_mask(df, parse_filter_query("{Score} contains 3")).tolist() == [False, True, False, False]
+    assert filter_mask(df, parse_filter_query("{Age} > 3")).tolist() == [True, True, True, False]
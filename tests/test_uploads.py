@@ -0,0 +1,51 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from chunk_store import open_dataset
+from uploads import MIN_PART_SIZE, UploadError, complete_upload, init_upload, received_parts, write_part
+
+
+async def stream(data, block_size=16 * 1024):
+    for start in range(0, len(data), block_size):
+        await asyncio.sleep(0)
+        yield data[start:start + block_size]
+
+
+def test_parts_are_assembled_in_order(tmp_path):
+    data = os.urandom(2 * MIN_PART_SIZE + 100)
+    session = init_upload(str(tmp_path), "data.bin", len(data), MIN_PART_SIZE)
+    for part_number in (3, 1, 2):
+        part = data[(part_number - 1) * MIN_PART_SIZE:part_number * MIN_PART_SIZE]
+        asyncio.run(write_part(str(tmp_path), session["upload_id"], part_number, stream(part),
+                               hashlib.sha256(part).hexdigest()))
+    assert received_parts(str(tmp_path), session["upload_id"]) == [1, 2, 3]
+    _, file_path, _ = complete_upload(str(tmp_path), session["upload_id"])
+    with open_dataset(file_path) as f:
+        assert f.read() == data
+
+
+# A retry racing the original request must not interleave their bytes
+def test_concurrent_writes_of_one_part(tmp_path):
+    first, second = b"a" * MIN_PART_SIZE, b"b" * MIN_PART_SIZE
+    session = init_upload(str(tmp_path), "data.bin", MIN_PART_SIZE, MIN_PART_SIZE)
+
+    async def both():
+        await asyncio.gather(write_part(str(tmp_path), session["upload_id"], 1, stream(first)),
+                             write_part(str(tmp_path), session["upload_id"], 1, stream(second)))
+
+    asyncio.run(both())
+    session_dir = os.path.join(str(tmp_path), ".uploads", session["upload_id"])
+    with open(os.path.join(session_dir, "part-000001"), "rb") as f:
+        assert f.read() in (first, second)
+    assert sorted(os.listdir(session_dir)) == ["part-000001", "session.json"]
+
+
+def test_rejected_part_leaves_nothing_behind(tmp_path):
+    session = init_upload(str(tmp_path), "data.bin", MIN_PART_SIZE, MIN_PART_SIZE)
+    with pytest.raises(UploadError):
+        asyncio.run(write_part(str(tmp_path), session["upload_id"], 1, stream(b"x" * MIN_PART_SIZE), "0" * 64))
+    assert received_parts(str(tmp_path), session["upload_id"]) == []
+    assert sorted(os.listdir(os.path.join(str(tmp_path), ".uploads", session["upload_id"]))) == ["session.json"]
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from chunk_store import read_blocks, store_blocks
+
+# In-progress chunked uploads are staged in a hidden folder next to the datasets
+UPLOAD_SESSIONS_DIRNAME = ".uploads"
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MIN_PART_SIZE = 256 * 1024
+MAX_PART_SIZE = 64 * 1024 * 1024
+
+# Abandoned sessions older than this are removed when a new one starts
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+
+class UploadError(Exception):
+    pass
+
+
+def sessions_folder(upload_folder):
+    return os.path.join(upload_folder, UPLOAD_SESSIONS_DIRNAME)
+
+
+def _session_dir(upload_folder, upload_id):
+    # Upload ids are uuid hex strings; anything else could escape the folder
+    if len(upload_id) != 32 or any(c not in "0123456789abcdef" for c in upload_id):
+        raise UploadError("Unknown upload id")
+    path = os.path.join(sessions_folder(upload_folder), upload_id)
+    if not os.path.isdir(path):
+        raise UploadError("Unknown upload id")
+    return path
+
+
+def _part_path(session_dir, part_number):
+    return os.path.join(session_dir, f"part-{part_number:06d}")
+
+
+def load_session(upload_folder, upload_id):
+    with open(os.path.join(_session_dir(upload_folder, upload_id), "session.json")) as f:
+        return json.load(f)
+
+
+def _save_session(session_dir, session):
+    tmp_path = os.path.join(session_dir, "session.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(session, f)
+    os.replace(tmp_path, os.path.join(session_dir, "session.json"))
+
+
+# Start a chunked upload of `size` bytes that will be stored as `filename`
+def init_upload(upload_folder, filename, size, part_size=None):
+    filename = os.path.basename(filename or "")
+    if not filename or filename.startswith("."):
+        raise UploadError("Invalid filename")
+    if size < 0:
+        raise UploadError("Invalid size")
+    part_size = min(max(part_size or DEFAULT_PART_SIZE, MIN_PART_SIZE), MAX_PART_SIZE)
+
+    expire_sessions(upload_folder)
+    upload_id = uuid.uuid4().hex
+    session_dir = os.path.join(sessions_folder(upload_folder), upload_id)
+    os.makedirs(session_dir)
+    session = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "size": size,
+        "part_size": part_size,
+        "total_parts": max((size + part_size - 1) // part_size, 1),
+        "created": time.time(),
+    }
+    _save_session(session_dir, session)
+    return session
+
+
+def _write_block(f, digest, block):
+    digest.update(block)
+    f.write(block)
+
+
+# Write one part from an async iterable of byte blocks, verifying its SHA-256
+# when the client sent one. Re-sending a part replaces it, so retries are safe.
+# File I/O and hashing run in worker threads so the event loop keeps serving
+# the other parts.
+async def write_part(upload_folder, upload_id, part_number, blocks, checksum=None):
+    session = await asyncio.to_thread(load_session, upload_folder, upload_id)
+    session_dir = _session_dir(upload_folder, upload_id)
+    if not 1 <= part_number <= session["total_parts"]:
+        raise UploadError("Part number out of range")
+
+    expected_size = min(session["part_size"], session["size"] - (part_number - 1) * session["part_size"])
+    digest = hashlib.sha256()
+    written = 0
+    part_path = _part_path(session_dir, part_number)
+    # A retry can send the same part while the first attempt is still running,
+    # so each request writes its own temporary file
+    fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, prefix=".part-", dir=session_dir)
+    f = os.fdopen(fd, "wb")
+    try:
+        try:
+            async for block in blocks:
+                written += len(block)
+                if written > expected_size:
+                    break
+                await asyncio.to_thread(_write_block, f, digest, block)
+        finally:
+            await asyncio.to_thread(f.close)
+        if written != expected_size:
+            raise UploadError(f"Part {part_number} should be {expected_size} bytes, got {written}")
+        if checksum and checksum.lower() != digest.hexdigest():
+            raise UploadError(f"Checksum mismatch for part {part_number}")
+    except BaseException:
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+    await asyncio.to_thread(os.replace, tmp_path, part_path)
+    return {"part_number": part_number, "size": written, "sha256": digest.hexdigest()}
+
+
+# Parts already stored, so an interrupted client can resume where it stopped
+def received_parts(upload_folder, upload_id):
+    session_dir = _session_dir(upload_folder, upload_id)
+    return sorted(
+        int(name[len("part-"):]) for name in os.listdir(session_dir)
+        if name.startswith("part-") and not name.endswith(".tmp")
+    )
+
+
+# Store the parts, in order, as the final dataset and drop the session. Returns
+# the filename, its path and the chunk store's stats for the upload.
+def complete_upload(upload_folder, upload_id):
+    session = load_session(upload_folder, upload_id)
+    session_dir = _session_dir(upload_folder, upload_id)
+    missing = sorted(set(range(1, session["total_parts"] + 1)) - set(received_parts(upload_folder, upload_id)))
+    if missing and session["size"] > 0:
+        raise UploadError(f"Missing parts: {missing[:20]}")
+
+    file_path = os.path.join(upload_folder, session["filename"])
+    stored = store_blocks(file_path, _part_blocks(session_dir, session["total_parts"]))
+    shutil.rmtree(session_dir, ignore_errors=True)
+    return session["filename"], file_path, stored
+
+
+def _part_blocks(session_dir, total_parts):
+    for part_number in range(1, total_parts + 1):
+        part_path = _part_path(session_dir, part_number)
+        if os.path.exists(part_path):
+            with open(part_path, "rb") as part:
+                yield from read_blocks(part)
+
+
+def abort_upload(upload_folder, upload_id):
+    shutil.rmtree(_session_dir(upload_folder, upload_id), ignore_errors=True)
+
+
+def expire_sessions(upload_folder, ttl=SESSION_TTL_SECONDS):
+    folder = sessions_folder(upload_folder)
+    if not os.path.isdir(folder):
+        return
+    cutoff = time.time() - ttl
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from storage import iter_chunks
+
+# Upper bounds on what a chart request may ask for, so every response stays
+# small no matter how many rows the dataset has
+MAX_BINS = 1000
+MAX_GRID_BINS = 256
+MAX_POINTS = 5000
+MAX_GROUPS = 200
+
+# Distinct keys a group-by may accumulate before it is refused
+MAX_GROUP_KEYS = 100_000
+
+# Line series keep at most this many times the requested points between
+# chunks before downsampling what they have again
+LINE_CANDIDATES = 4
+
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+# How per-chunk partial aggregates combine
+_MERGE_PARTIALS = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+def _numeric(values, column):
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        raise ValueError(f"Column {column} is not numeric")
+    return values.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _clamp(value, lo, hi):
+    return min(max(int(value), lo), hi)
+
+
+# Fixed-edge histogram of a numeric column, accumulated chunk by chunk. Only
+# values inside [lo, hi] are counted, so a zoomed axis gets its own bins.
+def histogram(file_path, column, lo, hi, bins=50):
+    bins = _clamp(bins, 1, MAX_BINS)
+    if not hi > lo:
+        hi = lo + 1
+    edges = np.linspace(lo, hi, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for chunk in iter_chunks(file_path, columns=[column]):
+        values = _numeric(chunk[column], column)
+        counts += np.histogram(values[~np.isnan(values)], bins=edges)[0]
+    return {"edges": edges.tolist(), "counts": counts.tolist(), "total": int(counts.sum())}
+
+
+# 2-D grid density (counts per cell) of two numeric columns over a viewport
+def density_grid(file_path, x, y, x_range, y_range, bins=64):
+    bins = _clamp(bins, 1, MAX_GRID_BINS)
+    ranges = [r if r[1] > r[0] else (r[0], r[0] + 1) for r in (x_range, y_range)]
+    x_edges = np.linspace(*ranges[0], bins + 1)
+    y_edges = np.linspace(*ranges[1], bins + 1)
+    counts = np.zeros((bins, bins), dtype=np.int64)
+    for chunk in iter_chunks(file_path, columns=list(dict.fromkeys([x, y]))):
+        xs, ys = _numeric(chunk[x], x), _numeric(chunk[y], y)
+        valid = ~(np.isnan(xs) | np.isnan(ys))
+        counts += np.histogram2d(xs[valid], ys[valid], bins=[x_edges, y_edges])[0].astype(np.int64)
+    # Rows of z follow the y axis, as Plotly heatmaps expect
+    return {"x_edges": x_edges.tolist(), "y_edges": y_edges.tolist(), "z": counts.T.tolist(),
+            "total": int(counts.sum())}
+
+
+# Count/sum/min/max per key, merged across chunks; mean is derived at the end
+def group_by(file_path, by, value=None, agg="count", limit=50):
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {agg}")
+    if agg != "count" and value is None:
+        raise ValueError(f"Aggregate {agg} needs a value column")
+    limit = _clamp(limit, 1, MAX_GROUPS)
+
+    totals = None
+    columns = [by] if value is None or value == by else [by, value]
+    for chunk in iter_chunks(file_path, columns=columns):
+        if value is None:
+            part = chunk.groupby(by, sort=False).size().to_frame("count")
+        else:
+            values = pd.Series(_numeric(chunk[value], value), index=chunk.index)
+            part = values.groupby(chunk[by], sort=False).agg(["count", "sum", "min", "max"])
+        if totals is not None:
+            part = pd.concat([totals, part]).groupby(level=0, sort=False).agg(
+                {name: _MERGE_PARTIALS[name] for name in part.columns})
+        totals = part
+        if len(totals) > MAX_GROUP_KEYS:
+            raise ValueError(f"Column {by} has too many distinct values to group by")
+
+    if totals is None or not len(totals):
+        return {"groups": [], "total_groups": 0, "other_count": 0}
+    if agg == "mean":
+        totals["mean"] = totals["sum"] / totals["count"].where(totals["count"] > 0)
+    top = totals.sort_values("count", ascending=False, kind="mergesort")
+    shown = top.head(limit)
+    return {
+        "groups": [
+            {"key": key.item() if isinstance(key, np.generic) else key,
+             "value": None if pd.isna(row[agg]) else float(row[agg]),
+             "count": int(row["count"])}
+            for key, row in shown.iterrows()
+        ],
+        "total_groups": int(len(totals)),
+        "other_count": int(top["count"].iloc[limit:].sum()),
+    }
+
+
+# Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013): keeps the
+# first and last points and, from each bucket in between, the point forming
+# the largest triangle with the previous pick and the next bucket's average
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    edges = np.append((np.arange(threshold - 1) * every).astype(np.int64) + 1, n)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_x, next_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+# Points sorted by x and reduced to at most `points` with LTTB
+def _downsample(xs, ys, points):
+    if len(xs) > 1 and np.any(np.diff(xs) < 0):
+        order = np.argsort(xs, kind="stable")
+        xs, ys = xs[order], ys[order]
+    picked = lttb(xs, ys, points)
+    return xs[picked], ys[picked]
+
+
+# A y column against x (or against row position when x is None), restricted to
+# an x window and reduced to at most `points` points with LTTB. Each chunk is
+# downsampled as it is read and the survivors are merged, so memory depends on
+# `points`, not on the number of rows.
+def line_series(file_path, y, x=None, x_range=None, points=1000):
+    points = _clamp(points, 3, MAX_POINTS)
+    # Row groups entirely outside the window are skipped by the columnar reader
+    filters = [(x, ">=", x_range[0]), (x, "<=", x_range[1])] if x is not None and x_range else None
+    columns = [y] if x is None else list(dict.fromkeys([x, y]))
+    kept_x, kept_y = [], []
+    kept = total = position = 0
+    for chunk in iter_chunks(file_path, columns=columns, filters=filters):
+        ys = _numeric(chunk[y], y)
+        if x is None:
+            xs = np.arange(position + 1, position + len(ys) + 1, dtype="float64")
+        else:
+            xs = _numeric(chunk[x], x)
+        position += len(chunk)
+
+        keep = ~(np.isnan(xs) | np.isnan(ys))
+        if x_range:
+            keep &= (xs >= x_range[0]) & (xs <= x_range[1])
+        total += int(keep.sum())
+        xs, ys = _downsample(xs[keep], ys[keep], points)
+        kept_x.append(xs)
+        kept_y.append(ys)
+        kept += len(xs)
+        if kept > LINE_CANDIDATES * points:
+            xs, ys = _downsample(np.concatenate(kept_x), np.concatenate(kept_y), 2 * points)
+            kept_x, kept_y, kept = [xs], [ys], len(xs)
+
+    if not kept_x:
+        return {"x": [], "y": [], "total": 0}
+    xs, ys = _downsample(np.concatenate(kept_x), np.concatenate(kept_y), points)
+    return {"x": xs.tolist(), "y": ys.tolist(), "total": total}